@@ -1 +1 @@
-from . import faces, users 
+from . import faces, users, thumbnails, metrics, health
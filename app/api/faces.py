@@ -1,11 +1,20 @@
-from fastapi import APIRouter, File, UploadFile, Depends, Request, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, File, Query, Request, HTTPException, UploadFile
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.templating import Jinja2Templates
-from app.database import get_db
-from app.services import face_service
-from app.repository import user_service 
+from fastapi.encoders import jsonable_encoder
+from typing import Optional
+from app.database import get_async_db, get_db
+from app.services import face_service, metrics, upload_stream
+from app.repository import job_service
+from app.services.detection import ENCODING_PROFILES
+from app.services.ingest_queue import ingest_queue
 from app.config.logging import setup_logger
+from app.config.settings import settings
+import asyncio
+import os
+import uuid
 
 
 logger = setup_logger(__name__)
@@ -20,88 +29,276 @@ templates = Jinja2Templates(directory="app/templates")
 async def upload_page(request: Request):
     return templates.TemplateResponse("upload.html", {"request": request})
 
-@router.post("/upload/")
+# Gövde FastAPI tarafından ayrıştırılmadığı için form şeması dokümana elle eklenir
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}}
+                    },
+                    "required": ["files"]
+                }
+            }
+        }
+    }
+}
+
+def _queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Yükleme kuyruğu dolu, lütfen daha sonra tekrar deneyin",
+        headers={"Retry-After": "30"}
+    )
+
+@router.post("/upload/", status_code=202, openapi_extra=UPLOAD_OPENAPI)
 async def upload_files(
-    files: list[UploadFile] = File(...),
+    request: Request,
+    profile: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Birden fazla resim yükler ve yüz tespiti yapar."""
+    """
+    Birden fazla resmi kuyruğa alır; yüz tespiti arka planda yapılır.
+    Dosyalar istek gövdesinden bloklar halinde doğrudan diske yazılır.
+    `profile` (fast / accurate) işin encoding profilini seçer.
+    """
+    saved_files = []
     try:
-        processed_count = 0
-        for file in files:
-            # Dosya uzantısı kontrolü
-            if not file.filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                logger.warning(f"Desteklenmeyen dosya formatı: {file.filename}")
-                continue
-                
-            try:
-                await face_service.process_uploaded_image(file, db)
-                processed_count += 1
-            except Exception as file_error:
-                logger.error(f"Dosya işleme hatası - {file.filename}: {str(file_error)}")
-                continue
-
-        if processed_count == 0:
+        if profile is not None and profile not in ENCODING_PROFILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Geçersiz encoding profili, seçenekler: {', '.join(ENCODING_PROFILES)}"
+            )
+
+        # Kuyruk zaten doluysa gövde hiç okunmadan reddedilir
+        if await asyncio.to_thread(job_service.count_pending_files, db) >= settings.INGEST_MAX_PENDING:
+            raise _queue_full()
+
+        try:
+            with metrics.time_stage("upload_receive"):
+                result = await upload_stream.stream_upload(request, face_service.IMAGE_FOLDER)
+        except upload_stream.UploadRejected as rejected:
+            raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
+        saved_files = result.saved
+
+        if not saved_files:
             raise HTTPException(
                 status_code=400,
                 detail="Hiçbir resim işlenemedi"
             )
 
-        return RedirectResponse(
-            url="/faces/unknown",
-            status_code=303
+        pending = await asyncio.to_thread(job_service.count_pending_files, db)
+        if pending + len(saved_files) > settings.INGEST_MAX_PENDING:
+            raise _queue_full()
+
+        # Senkron DB çağrıları event loop'u bloklamasın diye thread'de
+        job = await asyncio.to_thread(
+            job_service.create_job,
+            db,
+            [(upload.original_name, upload.path) for upload in saved_files],
+            profile_id=getattr(request.state, "profile_id", None),
+            encoding_profile=profile
+        )
+        saved_files = []
+        ingest_queue.notify()
+
+        return JSONResponse(
+            status_code=202,
+            content={
+                "job_id": str(job.uuid),
+                "status": job.status,
+                "total_files": job.total_files,
+                "rejected_files": result.rejected,
+                "status_url": f"/faces/jobs/{job.uuid}"
+            }
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Toplu yükleme hatası: {str(e)}")
         raise HTTPException(status_code=500, detail="Yükleme başarısız")
+    finally:
+        # İşe bağlanamayan dosyalar diskte bırakılmaz
+        for upload in saved_files:
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+
+@router.post("/search")
+async def search_by_photo(
+    file: UploadFile = File(...),
+    k: int = Query(settings.SEARCH_TOP_K, ge=1, le=settings.SEARCH_MAX_K),
+    tolerance: Optional[float] = Query(None, gt=0),
+    profile: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Sorgu resmindeki yüzler için en yakın k kişiyi döner; hiçbir kayıt ya da dosya oluşturmaz.
+    Tespit, encoding ve eşleştirme SEARCH_TIMEOUT saniyeyi aşarsa 504 döner.
+    """
+    try:
+        if profile is not None and profile not in ENCODING_PROFILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Geçersiz encoding profili, seçenekler: {', '.join(ENCODING_PROFILES)}"
+            )
+        try:
+            data = await face_service.read_query_image(file)
+        except upload_stream.UploadRejected as rejected:
+            raise HTTPException(status_code=rejected.status_code, detail=rejected.detail)
+
+        # İndeks yüklemesi tek seferlik bir maliyet, süre bütçesine dahil edilmez
+        await asyncio.to_thread(face_service.ensure_index_loaded)
+        try:
+            faces = await asyncio.wait_for(
+                face_service.search_faces(data, db, k=k, tolerance=tolerance, encoding_profile=profile),
+                timeout=settings.SEARCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            metrics.SEARCH_REQUESTS.labels(result="timeout").inc()
+            raise HTTPException(status_code=504, detail="Arama süre sınırını aştı")
+
+        if not faces:
+            result = "no_face"
+        elif any(face['candidates'] for face in faces):
+            result = "matched"
+        else:
+            result = "no_match"
+        metrics.SEARCH_REQUESTS.labels(result=result).inc()
+        return {"faces_detected": len(faces), "k": k, "faces": faces}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Fotoğrafla arama hatası: {str(e)}")
+        raise HTTPException(status_code=500, detail="Arama başarısız")
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str, db: Session = Depends(get_db)):
+    """Yükleme işinin durumunu ve dosya bazında sonuçlarını döner."""
+    try:
+        try:
+            job_uuid = uuid.UUID(job_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="İş bulunamadı")
+
+        job = job_service.get_job_by_uuid(db, job_uuid)
+        if not job:
+            raise HTTPException(status_code=404, detail="İş bulunamadı")
+
+        return {
+            "job_id": str(job.uuid),
+            "status": job.status,
+            "total_files": job.total_files,
+            "encoding_profile": job.encoding_profile or settings.ENCODING_PROFILE,
+            "processed_files": job.processed_files,
+            "failed_files": job.failed_files,
+            "created_at": job.created_at.isoformat(),
+            "updated_at": job.updated_at.isoformat(),
+            "files": [
+                {
+                    "name": job_file.original_name,
+                    "status": job_file.status,
+                    "error": job_file.error,
+                    "image_id": str(job_file.image_id) if job_file.image_id else None,
+                    "faces_detected": job_file.faces_detected,
+                    "new_faces": job_file.new_faces
+                }
+                for job_file in job.files
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"İş durumu endpoint hatası: {str(e)}")
+        raise HTTPException(status_code=500, detail="İşlem başarısız")
 
 @router.get("/known_users", response_class=HTMLResponse)
-async def known_users(request: Request, db: Session = Depends(get_db)):
-    """Bilinen yüzleri listeler."""
+async def known_users(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Bilinen yüzleri sayfa sayfa listeler."""
     try:
-        known_faces = face_service.get_known_faces(db)
+        page = await face_service.get_known_faces_async(db, cursor, limit)
         return templates.TemplateResponse(
             "known_users.html", 
             {
                 "request": request, 
-                "faces": known_faces
+                "faces": page["faces"],
+                "next_cursor": page["next_cursor"]
             }
         )
     except Exception as e:
         logger.error(f"Bilinen yüzler endpoint hatası: {str(e)}")
         raise HTTPException(status_code=500, detail="İşlem başarısız")
 
+@router.get("/api/known_users")
+async def known_users_json(
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Bilinen yüzlerin bir sayfasını JSON olarak döner."""
+    try:
+        return jsonable_encoder(await face_service.get_known_faces_async(db, cursor, limit))
+    except Exception as e:
+        logger.error(f"Bilinen yüzler JSON endpoint hatası: {str(e)}")
+        raise HTTPException(status_code=500, detail="İşlem başarısız")
+
 @router.get("/unknown", response_class=HTMLResponse)
-async def unknown_faces(request: Request, db: Session = Depends(get_db)):
-    """Tanınmayan yüzleri listeler."""
+async def unknown_faces(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Tanınmayan yüzleri sayfa sayfa listeler."""
     try:
-        unknown_faces = face_service.get_unknown_faces(db)
-        logger.info(f"Tanınmayan yüzler: {unknown_faces}")
+        page = await face_service.get_unknown_faces_async(db, cursor, limit)
         return templates.TemplateResponse(
             "unknown_faces.html", 
             {
                 "request": request, 
-                "faces": unknown_faces
+                "faces": page["faces"],
+                "next_cursor": page["next_cursor"]
             }
         )
     except Exception as e:
         logger.error(f"Tanınmayan yüzler endpoint hatası: {str(e)}")
         raise HTTPException(status_code=500, detail="İşlem başarısız")
+
+@router.get("/api/unknown")
+async def unknown_faces_json(
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Tanınmayan yüzlerin bir sayfasını JSON olarak döner."""
+    try:
+        return jsonable_encoder(await face_service.get_unknown_faces_async(db, cursor, limit))
+    except Exception as e:
+        logger.error(f"Tanınmayan yüzler JSON endpoint hatası: {str(e)}")
+        raise HTTPException(status_code=500, detail="İşlem başarısız")
     
 @router.get("/person/{person_id}", response_class=HTMLResponse)
 async def person_details(
     person_id: str, 
     request: Request, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Kişinin tüm eşleşmelerini gösterir."""
     try:
-        person = user_service.get_user_by_uuid(db, person_id)
+        person = await face_service.get_person_async(db, person_id)
         if not person:
             raise HTTPException(status_code=404, detail="Kişi bulunamadı")
             
-        matches = face_service.get_person_matches(db, person_id)
+        matches = await face_service.get_person_matches_async(db, person_id)
         
         return templates.TemplateResponse(
             "person_details.html",
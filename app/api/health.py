@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.startup import startup_state
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"]
+)
+
+@router.get("/live")
+async def live():
+    """Süreç ayakta mı (ısınma beklenmez)."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready():
+    """Modeller ısınıp indeks yüklendikten sonra 200, öncesinde 503 döner."""
+    if not startup_state.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "phases": startup_state.phases}
+        )
+    return {
+        "status": "ready",
+        "startup_seconds": startup_state.total_seconds,
+        "phases": startup_state.phases
+    }
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from app.services import metrics
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics")
+async def get_metrics():
+    """Uygulama metriklerini Prometheus metin formatında döner."""
+    body, content_type = await run_in_threadpool(metrics.render)
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import FileResponse, Response
+from app.config.settings import settings
+import os
+import re
+
+router = APIRouter(
+    prefix="/thumbs",
+    tags=["thumbnails"]
+)
+
+# Dosya adı içeriğin özetidir: '<32 hex>.webp' / '<32 hex>.jpg'
+THUMBNAIL_NAME = re.compile(r"([0-9a-f]{32})\.(webp|jpg)")
+MEDIA_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+@router.get("/{name}")
+async def thumbnail(name: str, request: Request):
+    """İçerik özetli küçük resmi uzun ömürlü önbellek başlıklarıyla sunar."""
+    match = THUMBNAIL_NAME.fullmatch(name)
+    if not match:
+        raise HTTPException(status_code=404, detail="Küçük resim bulunamadı")
+
+    # İçerik değişmediği için ETag doğrudan dosya adındaki özettir
+    etag = f'"{match.group(1)}"'
+    headers = {**CACHE_HEADERS, "ETag": etag}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    path = os.path.join(settings.THUMBNAIL_FOLDER, name)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Küçük resim bulunamadı")
+    return FileResponse(path, media_type=MEDIA_TYPES[match.group(2)], headers=headers)
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Form, Depends, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import Person
-from app.repository import user_service
+from app.repository import merge_service
+from app.services import clustering, face_service
 from app.config.logging import setup_logger
 import uuid
 
@@ -19,7 +22,7 @@ async def update_person(
     user_uuid: str,
     name: str = Form(...),
     surname: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Tanınmayan kullanıcıyı günceller.
@@ -50,9 +53,9 @@ async def update_person(
             )
 
         # Kullanıcıyı güncelle
-        updated_user = user_service.update_user(
-            db=db,
-            user_id=user_id,
+        updated_user = await face_service.update_person_async(
+            db,
+            user_id,
             name=name.strip(),
             surname=surname.strip()
         )
@@ -77,4 +80,59 @@ async def update_person(
         raise HTTPException(
             status_code=500,
             detail="Kullanıcı güncellenirken bir hata oluştu"
-        )
\ No newline at end of file
+        )
+
+@router.get("/merge_proposals")
+async def list_merge_proposals(limit: int = 100, db: Session = Depends(get_db)):
+    """Kümelemenin ürettiği bekleyen birleştirme önerilerini listeler."""
+    try:
+        proposals = merge_service.get_pending_proposals(db, limit=min(max(limit, 1), 500))
+        return JSONResponse(content=jsonable_encoder([
+            {
+                "id": proposal.id,
+                "source_person_id": proposal.source_person_id,
+                "target_person_id": proposal.target_person_id,
+                "distance": proposal.distance,
+                "created_at": proposal.created_at
+            }
+            for proposal in proposals
+        ]))
+    except Exception as e:
+        logger.error(f"Birleştirme önerileri listeleme hatası: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Birleştirme önerileri getirilirken bir hata oluştu"
+        )
+
+@router.post("/merge_proposals/{proposal_id}/apply")
+async def apply_merge_proposal(proposal_id: int, db: Session = Depends(get_db)):
+    """Bekleyen bir birleştirme önerisini uygular."""
+    try:
+        if not clustering.apply_proposal(db, proposal_id):
+            raise HTTPException(
+                status_code=409,
+                detail="Öneri bulunamadı veya artık uygulanamaz"
+            )
+        logger.info(f"Birleştirme önerisi uygulandı: {proposal_id}")
+        return {"status": "applied", "id": proposal_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Birleştirme önerisi uygulama hatası - ID {proposal_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Birleştirme önerisi uygulanırken bir hata oluştu"
+        )
+
+@router.post("/merge_proposals/{proposal_id}/reject")
+async def reject_merge_proposal(proposal_id: int, db: Session = Depends(get_db)):
+    """Bekleyen bir birleştirme önerisini reddeder."""
+    try:
+        merge_service.set_proposal_status(db, proposal_id, "rejected")
+        return {"status": "rejected", "id": proposal_id}
+    except Exception as e:
+        logger.error(f"Birleştirme önerisi reddetme hatası - ID {proposal_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Birleştirme önerisi reddedilirken bir hata oluştu"
+        )
@@ -1,29 +1,89 @@
+import atexit
+import json
 import logging
 import logging.handlers
 import os
+import queue
 from datetime import datetime
 import sys
+from app.config.settings import settings
 
 # Log dizini oluşturma
 LOG_DIR = "logs"
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
+# LogRecord'un standart alanları; bunların dışındakiler 'extra' ile gelen yapısal alanlardır
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
 def get_log_file():
     current_date = datetime.now().strftime('%Y-%m-%d')
     return f"{LOG_DIR}/{current_date}.log"
 
+class JsonFormatter(logging.Formatter):
+    """Kaydı tek satırlık JSON olarak biçimlendirir; 'extra' alanları da eklenir."""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Kaydı biçimlendirmeden kuyruğa bırakır; mesaj birleştirme ve yazma işi
+    dinleyici iş parçacığında yapılır. Kuyruk doluysa kayıt bekletilmeden atılır.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Aynı süreç içinde kalan queue.Queue kullanıldığı için kayıt olduğu gibi taşınabilir
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _parse_levels(spec: str) -> dict:
+    """'app.repository=WARNING,uvicorn.access=ERROR' biçimindeki modül seviyelerini çözer."""
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
 def configure_logging():
     # Temel log formatı
     log_format = '%(asctime)s - %(name)s - [%(levelname)s] - %(message)s'
-    
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(log_format)
+
     # Kök logger'ı yapılandır
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    
+    root_logger.setLevel(settings.LOG_LEVEL.upper())
+
     # Tüm handler'ları temizle
     root_logger.handlers.clear()
-    
+
     # Dosya handler'ı
     file_handler = logging.handlers.TimedRotatingFileHandler(
         filename=get_log_file(),
@@ -32,19 +92,39 @@ def configure_logging():
         backupCount=30,
         encoding='utf-8'
     )
-    file_handler.setFormatter(logging.Formatter(log_format))
-    root_logger.addHandler(file_handler)
-    
+    file_handler.setFormatter(formatter)
+
     # Konsol handler'ı
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(logging.Formatter(log_format))
-    root_logger.addHandler(console_handler)
-    
+    console_handler.setFormatter(formatter)
+
+    # Disk ve konsol yazmaları event loop yerine arka plandaki dinleyici iş parçacığında yapılır
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = LazyQueueHandler(log_queue)
+    root_logger.addHandler(queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
     # FastAPI ve uvicorn loggerlarını yapılandır
     for logger_name in ['fastapi', 'uvicorn', 'uvicorn.access', 'uvicorn.error']:
         logger = logging.getLogger(logger_name)
         logger.handlers = root_logger.handlers
         logger.propagate = False
 
+    # Modül bazında seviyeler (ör. LOG_LEVELS=app.repository=WARNING)
+    for logger_name, level in _parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(logger_name).setLevel(level)
+
+def shutdown_logging():
+    """Kuyrukta bekleyen kayıtları yazar ve dinleyiciyi durdurur."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 def setup_logger(name):
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine, Column, Integer, String, LargeBinary
+from sqlalchemy import create_engine, text, Column, Integer, String, LargeBinary
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config.settings import settings
@@ -18,7 +20,6 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
-Base.metadata.create_all(bind=engine)
 
 def get_db():
     db = SessionLocal()
@@ -27,12 +28,109 @@ def get_db():
     finally:
         db.close()
 
+# Senkron sürücülerin async karşılıkları
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL'i async sürücülü karşılığına çevirir (ör. postgresql:// -> postgresql+asyncpg://)."""
+    url = make_url(url)
+    url = url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+    return url.render_as_string(hide_password=False)
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    """Async engine'i ilk kullanımda oluşturur; sürücü (asyncpg/aiosqlite) sadece o zaman gerekir."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url = settings.ASYNC_DATABASE_URL or async_database_url(database_url)
+        options = {"pool_pre_ping": True}
+        if make_url(url).get_backend_name() != "sqlite":
+            options.update(
+                pool_size=settings.ASYNC_DB_POOL_SIZE,
+                max_overflow=settings.ASYNC_DB_MAX_OVERFLOW,
+                pool_timeout=30,
+                pool_recycle=3600
+            )
+        _async_engine = create_async_engine(url, **options)
+        _AsyncSessionLocal = sessionmaker(
+            _async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+        )
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _AsyncSessionLocal()
+
+async def get_async_db():
+    """Event loop'u bloklamayan async oturum (okuma ağırlıklı endpoint'ler için)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+
+# create_all mevcut tablolara sonradan eklenen kolon ve indeksleri eklemez; migration aracı
+# olmadığı için bunlar idempotent DDL olarak burada tutulur (sadece PostgreSQL)
+SCHEMA_UPGRADES = [
+    # Tekrar yükleme tespiti: SHA-256 ve dHash bantları
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64)",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS phash BIGINT",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS phash_band0 INTEGER",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS phash_band1 INTEGER",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS phash_band2 INTEGER",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS phash_band3 INTEGER",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_images_sha256 ON images (sha256)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_images_phash_band0 ON images (phash_band0)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_images_phash_band1 ON images (phash_band1)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_images_phash_band2 ON images (phash_band2)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_images_phash_band3 ON images (phash_band3)",
+    # Galeri sayfalama: kişi bazlı encoding/eşleşme sorguları
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_encods_person_id ON encods (person_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_matches_person_id ON matches (person_id)",
+    # İçerik özetli küçük resimler
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS thumb_small VARCHAR",
+    "ALTER TABLE images ADD COLUMN IF NOT EXISTS thumb_medium VARCHAR",
+    "ALTER TABLE encods ADD COLUMN IF NOT EXISTS thumb_small VARCHAR",
+    "ALTER TABLE encods ADD COLUMN IF NOT EXISTS thumb_medium VARCHAR",
+    # İstek profilleme: işin hangi profil isteğiyle oluşturulduğu
+    "ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS profile_id VARCHAR",
+    # İş bazında encoding profili
+    "ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS encoding_profile VARCHAR",
+    # Kümeleme eşiğinin geride bıraktığı, henüz commit edilmemiş encoding ID'leri
+    "ALTER TABLE clustering_state ADD COLUMN IF NOT EXISTS pending_gaps TEXT",
+]
+
+def upgrade_schema():
+    """SCHEMA_UPGRADES'i sırayla uygular; indeksler yazmaları kilitlemeden oluşturulur."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(text(statement))
+
 def init_db():
+    """
+    Eksik tabloları oluşturur ve mevcut şemaya sonradan eklenen kolon/indeksleri
+    uygular; uygulama açılışında bir kez ya da `make init-db` ile çalıştırılır.
+    """
     from app.models.person import Person
     from app.models.image import Image
     from app.models.encoding import Encoding
     from app.models.match import Match
+    from app.models.job import IngestJob, IngestJobFile
+    from app.models.clustering import ClusteringState, MergeProposal
+    from app.models.prototype import PersonPrototype
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
 
 if __name__ == "__main__":
     init_db()
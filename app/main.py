@@ -1,19 +1,30 @@
+# Soğuk başlangıç ölçümü import'lardan önce başlar
+from app.services.startup import startup_state
+import asyncio
+import time
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
-from app.api import faces, users
+from app.api import faces, users, thumbnails, metrics, health
 from app.config.logging import configure_logging, setup_logger
+from app.config.settings import settings
 import uvicorn
-from app.database import init_db
+from app.database import dispose_async_engine, init_db
+from app.services import compute_pool, face_service
+from app.services.ingest_queue import ingest_queue
+from app.services.clustering import clustering_scheduler
 from app.middleware.logging import log_request_middleware
+from app.middleware.profiling import profile_request_middleware
 from fastapi.staticfiles import StaticFiles
 
 configure_logging()
 logger = setup_logger(__name__)
+startup_state.record("imports", time.perf_counter() - startup_state.started_at)
 
 app = FastAPI()
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
+app.middleware("http")(profile_request_middleware)
 app.middleware("http")(log_request_middleware)
 app.include_router(faces.router)
 
@@ -23,12 +34,34 @@ async def root():
 
 app.include_router(faces.router)
 app.include_router(users.router)
+app.include_router(thumbnails.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 @app.on_event("startup")
 async def startup_event():
-    init_db()
+    if settings.SCHEMA_CHECK_ON_STARTUP:
+        with startup_state.phase("schema"):
+            await asyncio.to_thread(init_db)
+    # Modeller ve indeks ilk istekten önce hazırlanır; /health/ready bunlar bitince 200 döner
+    with startup_state.phase("compute_pool"):
+        workers = await compute_pool.prewarm()
+    logger.info("Hesaplama havuzu ısındı: %s işçi", workers)
+    if settings.PREWARM_INDEX:
+        with startup_state.phase("index"):
+            await asyncio.to_thread(face_service.ensure_index_loaded)
+    await ingest_queue.start()
+    clustering_scheduler.start()
+    startup_state.mark_ready()
     logger.info("Application started")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await clustering_scheduler.stop()
+    await ingest_queue.stop()
+    compute_pool.shutdown()
+    await dispose_async_engine()
+
 if __name__ == "__main__":
     uvicorn_config = uvicorn.Config(
         "app.main:app",
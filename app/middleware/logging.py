@@ -1,39 +1,56 @@
 from fastapi import Request
 from time import time
 from app.config.logging import setup_logger
+from app.services.metrics import HTTP_REQUEST_SECONDS
 import json
+import logging
 
 logger = setup_logger(__name__)
 
 async def log_request_middleware(request: Request, call_next):
     start_time = time()
     
-    request_details = {
-        "client_ip": request.client.host,
-        "method": request.method,
-        "url": str(request.url),
-        "headers": dict(request.headers),
-        "path_params": dict(request.path_params),
-        "query_params": dict(request.query_params)
-    }
-    
-    logger.info(
-        f"İstek alındı - IP: {request_details['client_ip']} "
-        f"Method: {request_details['method']} URL: {request_details['url']}"
-    )
+    # Seviye kapalıysa istek ayrıntıları hiç toplanmaz/biçimlendirilmez
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "İstek alındı - IP: %s Method: %s URL: %s",
+            request.client.host if request.client else None,
+            request.method,
+            request.url,
+            extra={"client_ip": request.client.host if request.client else None, "method": request.method}
+        )
 
     response = await call_next(request)
     
     process_time = time() - start_time
+    # Yüksek kardinaliteyi önlemek için gerçek URL yerine route şablonu kullanılır
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=route,
+        status=str(response.status_code)
+    ).observe(process_time)
     
-    logger.info(
-        f"Yanıt gönderildi - Durum Kodu: {response.status_code} "
-        f"İşlem Süresi: {process_time:.2f}s"
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Yanıt gönderildi - Durum Kodu: %s İşlem Süresi: %.2fs",
+            response.status_code,
+            process_time,
+            extra={"route": route, "status": response.status_code, "duration_ms": round(process_time * 1000, 1)}
+        )
 
-    logger.debug(
-        "Detaylı istek bilgileri: \n" + 
-        json.dumps(request_details, indent=2, ensure_ascii=False)
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        request_details = {
+            "client_ip": request.client.host if request.client else None,
+            "method": request.method,
+            "url": str(request.url),
+            "headers": dict(request.headers),
+            "path_params": dict(request.path_params),
+            "query_params": dict(request.query_params)
+        }
+        logger.debug(
+            "Detaylı istek bilgileri: \n%s",
+            json.dumps(request_details, indent=2, ensure_ascii=False)
+        )
 
-    return response
\ No newline at end of file
+    return response
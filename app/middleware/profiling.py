@@ -0,0 +1,18 @@
+from fastapi import Request
+from app.services import profiling
+
+async def profile_request_middleware(request: Request, call_next):
+    """
+    PROFILING_ENABLED açıksa ve istek profil istiyorsa (başlık ya da sorgu parametresi)
+    isteği profiller. Kimlik request.state.profile_id ile sonraki aşamalara taşınır
+    ve yanıtta X-Profile-Id başlığıyla döner.
+    """
+    if not profiling.is_requested(request) or not profiling.limiter.allow():
+        return await call_next(request)
+
+    profile_id = profiling.new_profile_id(request)
+    request.state.profile_id = profile_id
+    with profiling.profile(f"{profile_id}-request", async_mode=True):
+        response = await call_next(request)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
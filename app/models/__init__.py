@@ -2,5 +2,8 @@ from .person import Person
 from .image import Image
 from .encoding import Encoding
 from .match import Match
+from .job import IngestJob, IngestJobFile
+from .clustering import ClusteringState, MergeProposal
+from .prototype import PersonPrototype
 
-__all__ = ["Person", "Image", "Encoding", "Match"]
+__all__ = ["Person", "Image", "Encoding", "Match", "IngestJob", "IngestJobFile", "ClusteringState", "MergeProposal", "PersonPrototype"]
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, Boolean, Float, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from app.database import Base
+import uuid
+from datetime import datetime
+
+class ClusteringState(Base):
+    __tablename__ = "clustering_state"
+
+    id = Column(Integer, primary_key=True)
+    last_encoding_id = Column(Integer, nullable=False, default=0)
+    # Eşik geçilirken henüz commit edilmemiş ID'ler: {"<encoding id>": ilk görülme zamanı (epoch)}
+    pending_gaps = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class MergeProposal(Base):
+    __tablename__ = "merge_proposals"
+
+    id = Column(Integer, primary_key=True)
+    source_person_id = Column(UUID(as_uuid=True), ForeignKey("persons.uuid"), nullable=False, index=True)
+    target_person_id = Column(UUID(as_uuid=True), ForeignKey("persons.uuid"), nullable=False, index=True)
+    distance = Column(Float, nullable=False)
+    status = Column(String, nullable=False, default="pending", index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -10,8 +10,11 @@ class Encoding(Base):
 
     id = Column(Integer, primary_key=True)
     uuid = Column(UUID(as_uuid=True), unique=True, default=uuid.uuid4, index=True)
-    person_id = Column(UUID(as_uuid=True), ForeignKey("persons.uuid"), nullable=False)
+    person_id = Column(UUID(as_uuid=True), ForeignKey("persons.uuid"), nullable=False, index=True)
     face_path = Column(String, nullable=False)
+    # İçerik özetli küçük resim dosya adları (THUMBNAIL_FOLDER altında)
+    thumb_small = Column(String, nullable=True)
+    thumb_medium = Column(String, nullable=True)
     encoding = Column(LargeBinary, nullable=False)
     
     person = relationship("Person", back_populates="encodings")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, LargeBinary, DateTime, ForeignKey, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -11,6 +11,17 @@ class Image(Base):
     id = Column(Integer, primary_key=True)
     uuid = Column(UUID(as_uuid=True), unique=True, default=uuid.uuid4, index=True)
     file_path = Column(String, nullable=False)
+    # İçerik özetli küçük resim dosya adları (THUMBNAIL_FOLDER altında)
+    thumb_small = Column(String, nullable=True)
+    thumb_medium = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Tekrar yükleme tespiti: birebir aynı dosya (SHA-256) ve algısal benzerlik (64 bit dHash)
+    sha256 = Column(String(64), nullable=True, index=True)
+    phash = Column(BigInteger, nullable=True)
+    # dHash'in 16 bitlik dört bandı; yakın kopya aramasında aday daraltmak için
+    phash_band0 = Column(Integer, nullable=True, index=True)
+    phash_band1 = Column(Integer, nullable=True, index=True)
+    phash_band2 = Column(Integer, nullable=True, index=True)
+    phash_band3 = Column(Integer, nullable=True, index=True)
     
     matches = relationship("Match", back_populates="image")
\ No newline at end of file
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from app.database import Base
+import uuid
+from datetime import datetime
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, default=uuid.uuid4, index=True)
+    status = Column(String, nullable=False, default="pending")
+    total_files = Column(Integer, nullable=False, default=0)
+    processed_files = Column(Integer, nullable=False, default=0)
+    failed_files = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Yükleme isteği profillendiyse dosyaların işlenmesi de bu kimlikle profillenir
+    profile_id = Column(String, nullable=True)
+    # fast / accurate; boşsa ENCODING_PROFILE kullanılır
+    encoding_profile = Column(String, nullable=True)
+
+    files = relationship("IngestJobFile", back_populates="job", order_by="IngestJobFile.id")
+
+class IngestJobFile(Base):
+    __tablename__ = "ingest_job_files"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("ingest_jobs.uuid"), nullable=False, index=True)
+    original_name = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending", index=True)
+    error = Column(Text, nullable=True)
+    image_id = Column(UUID(as_uuid=True), nullable=True)
+    faces_detected = Column(Integer, nullable=True)
+    new_faces = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    job = relationship("IngestJob", back_populates="files")
@@ -9,7 +9,7 @@ class Match(Base):
     __tablename__ = "matches"
 
     id = Column(Integer, primary_key=True)
-    person_id = Column(UUID(as_uuid=True), ForeignKey("persons.uuid"), nullable=False)
+    person_id = Column(UUID(as_uuid=True), ForeignKey("persons.uuid"), nullable=False, index=True)
     matched_image_id = Column(UUID(as_uuid=True), ForeignKey("images.uuid"), nullable=False)
     confidence_score = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, LargeBinary, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from datetime import datetime
+
+class PersonPrototype(Base):
+    __tablename__ = "person_prototypes"
+
+    person_id = Column(UUID(as_uuid=True), ForeignKey("persons.uuid"), primary_key=True)
+    encoding_count = Column(Integer, nullable=False, default=0)
+    # Kişinin encoding ortalaması (float32) ve temsilci encoding'leri (medoid x float32)
+    centroid = Column(LargeBinary, nullable=False)
+    medoids = Column(LargeBinary, nullable=False)
+    # Son tam yeniden hesaplamadan sonra eklenen encoding sayısı
+    pending_updates = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
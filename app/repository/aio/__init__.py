@@ -0,0 +1,6 @@
+"""
+Repository modüllerinin AsyncSession ile çalışan karşılıkları.
+
+Okuma ağırlıklı endpoint'ler event loop'u bloklamadan bu modülleri kullanır;
+yükleme hattı ve arka plan işleri senkron modüllerle devam eder.
+"""
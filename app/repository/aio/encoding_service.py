@@ -0,0 +1,97 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Encoding, Match, Image
+from app.config.logging import setup_logger
+import uuid
+from typing import Optional, List
+
+logger = setup_logger(__name__)
+
+async def get_encoding_by_id(db: AsyncSession, encoding_id: int) -> Optional[Encoding]:
+    """ID'ye göre encoding getirir."""
+    try:
+        result = await db.execute(select(Encoding).where(Encoding.id == encoding_id).limit(1))
+        encoding = result.scalars().first()
+        if encoding:
+            logger.info("ID: %s olan encoding getirildi", encoding_id)
+        else:
+            logger.warning("ID: %s olan encoding bulunamadı", encoding_id)
+        return encoding
+    except Exception as e:
+        logger.error("Encoding getirme hatası - ID %s: %s", encoding_id, e)
+        raise
+
+async def get_encoding_by_uuid(db: AsyncSession, uuid_str: str) -> Optional[Encoding]:
+    """UUID'ye göre encoding getirir."""
+    try:
+        result = await db.execute(select(Encoding).where(Encoding.uuid == uuid_str).limit(1))
+        encoding = result.scalars().first()
+        if encoding:
+            logger.info("UUID: %s olan encoding getirildi", uuid_str)
+        return encoding
+    except Exception as e:
+        logger.error("UUID ile encoding getirme hatası: %s", e)
+        raise
+
+async def get_encodings_by_person(db: AsyncSession, person_id: uuid.UUID) -> List[Encoding]:
+    """Kişiye ait tüm encoding'leri en yeniden eskiye getirir."""
+    try:
+        result = await db.execute(
+            select(Encoding)
+            .where(Encoding.person_id == person_id)
+            .order_by(Encoding.id.desc())
+        )
+        encodings = result.scalars().all()
+        logger.info("Kişi ID: %s için %s encoding bulundu", person_id, len(encodings))
+        return encodings
+    except Exception as e:
+        logger.error("Kişi encoding'leri getirme hatası - Kişi ID %s: %s", person_id, e)
+        raise
+
+async def get_first_faces(db: AsyncSession, person_ids: List[uuid.UUID]) -> list:
+    """
+    Her kişinin temsilci yüzünü (ilk encoding'i) tek sorguda getirir.
+
+    Returns:
+        list: (person_id, face_path, thumb_small) satırları
+    """
+    try:
+        if not person_ids:
+            return []
+        first_ids = (
+            select(func.min(Encoding.id))
+            .where(Encoding.person_id.in_(person_ids))
+            .group_by(Encoding.person_id)
+        )
+        result = await db.execute(
+            select(Encoding.person_id, Encoding.face_path, Encoding.thumb_small)
+            .where(Encoding.id.in_(first_ids))
+        )
+        return result.all()
+    except Exception as e:
+        logger.error("Temsilci yüz getirme hatası: %s", e)
+        raise
+
+async def get_person_images(db: AsyncSession, person_id: uuid.UUID) -> List[dict]:
+    """Bir kişinin eşleştiği tüm resimleri güven skoruna göre getirir."""
+    try:
+        result = await db.execute(
+            select(Match, Image)
+            .join(Image, Match.matched_image_id == Image.uuid)
+            .where(Match.person_id == person_id)
+            .order_by(Match.confidence_score.desc())
+        )
+        results = [
+            {
+                "image_path": image.file_path,
+                "confidence_score": match.confidence_score,
+                "match_date": match.created_at,
+                "image_uuid": str(image.uuid)
+            }
+            for match, image in result.all()
+        ]
+        logger.info("Kişi %s için %s resim bulundu", person_id, len(results))
+        return results
+    except Exception as e:
+        logger.error("Kişi resimleri getirme hatası - Kişi ID %s: %s", person_id, e)
+        raise
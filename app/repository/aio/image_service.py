@@ -0,0 +1,82 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Image
+from app.config.logging import setup_logger
+from datetime import datetime
+from typing import Optional, List
+
+logger = setup_logger(__name__)
+
+async def get_all_images(db: AsyncSession) -> List[Image]:
+    """Tüm görüntüleri getirir."""
+    try:
+        images = (await db.execute(select(Image))).scalars().all()
+        logger.info("Toplam %s görüntü getirildi", len(images))
+        return images
+    except Exception as e:
+        logger.error("Görüntüler getirilirken hata oluştu: %s", e)
+        raise
+
+async def get_image_by_id(db: AsyncSession, image_id: int) -> Optional[Image]:
+    """ID'ye göre görüntü getirir."""
+    try:
+        image = (await db.execute(select(Image).where(Image.id == image_id).limit(1))).scalars().first()
+        if image:
+            logger.info("ID: %s olan görüntü getirildi", image_id)
+        else:
+            logger.warning("ID: %s olan görüntü bulunamadı", image_id)
+        return image
+    except Exception as e:
+        logger.error("Görüntü getirme hatası - ID %s: %s", image_id, e)
+        raise
+
+async def get_image_by_uuid(db: AsyncSession, uuid_str: str) -> Optional[Image]:
+    """UUID'ye göre görüntü getirir."""
+    try:
+        image = (await db.execute(select(Image).where(Image.uuid == uuid_str).limit(1))).scalars().first()
+        if image:
+            logger.info("UUID: %s olan görüntü getirildi", uuid_str)
+        return image
+    except Exception as e:
+        logger.error("UUID ile görüntü getirme hatası: %s", e)
+        raise
+
+async def get_image_by_sha256(db: AsyncSession, sha256: str) -> Optional[Image]:
+    """İçerik özetine göre birebir aynı görüntüyü getirir."""
+    try:
+        result = await db.execute(
+            select(Image).where(Image.sha256 == sha256).order_by(Image.id).limit(1)
+        )
+        return result.scalars().first()
+    except Exception as e:
+        logger.error("SHA-256 ile görüntü getirme hatası: %s", e)
+        raise
+
+async def update_image_path(db: AsyncSession, image_id: int, new_file_path: str) -> Optional[Image]:
+    """Görüntü dosya yolunu günceller."""
+    try:
+        image = await get_image_by_id(db, image_id)
+        if image:
+            image.file_path = new_file_path
+            await db.commit()
+            logger.info("Görüntü yolu güncellendi - ID: %s", image_id)
+            return image
+        logger.warning("Güncellenecek görüntü bulunamadı - ID: %s", image_id)
+        return None
+    except Exception as e:
+        await db.rollback()
+        logger.error("Görüntü güncelleme hatası - ID %s: %s", image_id, e)
+        raise
+
+async def get_images_by_date_range(db: AsyncSession, start_date: datetime, end_date: datetime) -> List[Image]:
+    """Belirli tarih aralığındaki görüntüleri getirir."""
+    try:
+        result = await db.execute(
+            select(Image).where(Image.created_at >= start_date, Image.created_at <= end_date)
+        )
+        images = result.scalars().all()
+        logger.info("Tarih aralığında %s görüntü bulundu", len(images))
+        return images
+    except Exception as e:
+        logger.error("Tarih aralığı ile görüntü getirme hatası: %s", e)
+        raise
@@ -0,0 +1,83 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Match, Image, Encoding
+from app.config.logging import setup_logger
+import uuid
+from typing import Optional, List
+
+logger = setup_logger(__name__)
+
+async def get_match_by_id(db: AsyncSession, match_id: int) -> Optional[Match]:
+    """ID'ye göre eşleşme getirir."""
+    try:
+        match = (await db.execute(select(Match).where(Match.id == match_id).limit(1))).scalars().first()
+        if match:
+            logger.info("ID: %s olan eşleşme getirildi", match_id)
+        else:
+            logger.warning("ID: %s olan eşleşme bulunamadı", match_id)
+        return match
+    except Exception as e:
+        logger.error("Eşleşme getirme hatası - ID %s: %s", match_id, e)
+        raise
+
+async def get_matches_by_person(db: AsyncSession, person_id: uuid.UUID) -> List[Match]:
+    """Kişiye ait tüm eşleşmeleri getirir."""
+    try:
+        matches = (await db.execute(select(Match).where(Match.person_id == person_id))).scalars().all()
+        logger.info("Kişi ID: %s için %s eşleşme bulundu", person_id, len(matches))
+        return matches
+    except Exception as e:
+        logger.error("Kişi eşleşmeleri getirme hatası - Kişi ID %s: %s", person_id, e)
+        raise
+
+async def get_matches_by_image(db: AsyncSession, image_id: uuid.UUID) -> List[Match]:
+    """Görüntüye ait tüm eşleşmeleri getirir."""
+    try:
+        matches = (await db.execute(select(Match).where(Match.matched_image_id == image_id))).scalars().all()
+        logger.info("Görüntü ID: %s için %s eşleşme bulundu", image_id, len(matches))
+        return matches
+    except Exception as e:
+        logger.error("Görüntü eşleşmeleri getirme hatası - Görüntü ID %s: %s", image_id, e)
+        raise
+
+async def get_recent_matches(db: AsyncSession, limit: int = 10) -> List[Match]:
+    """En son eşleşmeleri getirir."""
+    try:
+        result = await db.execute(select(Match).order_by(Match.created_at.desc()).limit(limit))
+        matches = result.scalars().all()
+        logger.info("Son %s eşleşme getirildi", limit)
+        return matches
+    except Exception as e:
+        logger.error("Son eşleşmeleri getirme hatası: %s", e)
+        raise
+
+async def get_last_matches(db: AsyncSession, person_ids: List[uuid.UUID]) -> dict:
+    """Her kişinin son eşleşmesini tek sorguda getirir (person_id -> Match)."""
+    try:
+        if not person_ids:
+            return {}
+        last_ids = (
+            select(func.max(Match.id))
+            .where(Match.person_id.in_(person_ids))
+            .group_by(Match.person_id)
+        )
+        result = await db.execute(select(Match).where(Match.id.in_(last_ids)))
+        return {match.person_id: match for match in result.scalars().all()}
+    except Exception as e:
+        logger.error("Son eşleşmeleri getirme hatası: %s", e)
+        raise
+
+async def get_person_match_rows(db: AsyncSession, person_id: str) -> list:
+    """Kişinin eşleşmelerini görüntü ve encoding kayıtlarıyla birlikte, yeniden eskiye getirir."""
+    try:
+        result = await db.execute(
+            select(Match, Image, Encoding)
+            .join(Image, Match.matched_image_id == Image.uuid)
+            .join(Encoding, Match.person_id == Encoding.person_id)
+            .where(Match.person_id == person_id)
+            .order_by(Match.created_at.desc())
+        )
+        return result.all()
+    except Exception as e:
+        logger.error("Kişi eşleşmelerini getirme hatası - Kişi ID %s: %s", person_id, e)
+        raise
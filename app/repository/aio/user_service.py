@@ -0,0 +1,133 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Person
+from app.config.logging import setup_logger
+import uuid
+from datetime import datetime
+
+logger = setup_logger(__name__)
+
+async def get_all_users(db: AsyncSession):
+    """Tüm aktif kullanıcıları getirir."""
+    try:
+        result = await db.execute(select(Person).where(Person.is_active == True))
+        users = result.scalars().all()
+        logger.info("Toplam %s aktif kullanıcı getirildi", len(users))
+        return users
+    except Exception as e:
+        logger.error("Kullanıcılar getirilirken hata oluştu: %s", e)
+        raise
+
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    """ID'ye göre kullanıcı getirir."""
+    try:
+        result = await db.execute(
+            select(Person).where(Person.id == user_id, Person.is_active == True).limit(1)
+        )
+        user = result.scalars().first()
+        if user:
+            logger.info("ID: %s olan kullanıcı getirildi", user_id)
+        else:
+            logger.warning("ID: %s olan kullanıcı bulunamadı", user_id)
+        return user
+    except Exception as e:
+        logger.error("Kullanıcı getirme hatası - ID %s: %s", user_id, e)
+        raise
+
+async def get_user_by_uuid(db: AsyncSession, uuid_str: str):
+    """UUID'ye göre kullanıcı getirir."""
+    try:
+        result = await db.execute(
+            select(Person).where(Person.uuid == uuid_str, Person.is_active == True).limit(1)
+        )
+        user = result.scalars().first()
+        if user:
+            logger.info("UUID: %s olan kullanıcı getirildi", uuid_str)
+        return user
+    except Exception as e:
+        logger.error("UUID ile kullanıcı getirme hatası: %s", e)
+        raise
+
+async def get_users_by_uuids(db: AsyncSession, uuids: list):
+    """Verilen UUID'lerden aktif olan kullanıcıları tek sorguda getirir."""
+    try:
+        if not uuids:
+            return []
+        result = await db.execute(
+            select(Person).where(Person.uuid.in_(uuids), Person.is_active == True)
+        )
+        return result.scalars().all()
+    except Exception as e:
+        logger.error("UUID listesiyle kullanıcı getirme hatası: %s", e)
+        raise
+
+async def create_user(db: AsyncSession, name: str, surname: str):
+    """Yeni kullanıcı oluşturur."""
+    try:
+        new_user = Person(
+            uuid=uuid.uuid4(),
+            name=name,
+            surname=surname,
+            is_active=True,
+            created_at=datetime.utcnow()
+        )
+        db.add(new_user)
+        await db.commit()
+        await db.refresh(new_user)
+        logger.info("Yeni kullanıcı oluşturuldu: %s %s", name, surname)
+        return new_user
+    except Exception as e:
+        await db.rollback()
+        logger.error("Kullanıcı oluşturma hatası: %s", e)
+        raise
+
+async def update_user(db: AsyncSession, user_id: int, name: str = None, surname: str = None):
+    """Kullanıcı bilgilerini günceller."""
+    try:
+        user = await get_user_by_uuid(db, user_id)
+        if user:
+            if name:
+                user.name = name
+            if surname:
+                user.surname = surname
+            await db.commit()
+            logger.info("Kullanıcı güncellendi - ID: %s", user_id)
+            return user
+        logger.warning("Güncellenecek kullanıcı bulunamadı - ID: %s", user_id)
+        return None
+    except Exception as e:
+        await db.rollback()
+        logger.error("Kullanıcı güncelleme hatası - ID %s: %s", user_id, e)
+        raise
+
+async def delete_user(db: AsyncSession, user_id: int):
+    """Kullanıcıyı soft delete yapar."""
+    try:
+        user = await get_user_by_id(db, user_id)
+        if user:
+            user.is_active = False
+            await db.commit()
+            logger.info("Kullanıcı silindi - ID: %s", user_id)
+            return True
+        logger.warning("Silinecek kullanıcı bulunamadı - ID: %s", user_id)
+        return False
+    except Exception as e:
+        await db.rollback()
+        logger.error("Kullanıcı silme hatası - ID %s: %s", user_id, e)
+        raise
+
+async def search_users(db: AsyncSession, search_term: str):
+    """İsim veya soyisme göre kullanıcı arar."""
+    try:
+        result = await db.execute(
+            select(Person).where(
+                Person.is_active == True,
+                (Person.name.ilike(f"%{search_term}%") | Person.surname.ilike(f"%{search_term}%"))
+            )
+        )
+        users = result.scalars().all()
+        logger.info("'%s' için %s kullanıcı bulundu", search_term, len(users))
+        return users
+    except Exception as e:
+        logger.error("Kullanıcı arama hatası: %s", e)
+        raise
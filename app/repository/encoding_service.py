@@ -1,13 +1,179 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models import Encoding, Match, Image
 from app.config.logging import setup_logger
+from app.config.settings import settings
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import uuid
 import numpy as np
 
 logger = setup_logger(__name__)
 
+# Encoding saklama formatları:
+#   eski (başlıksız): 128 x float64 = 1024 bayt
+#   v1: 1 bayt başlık + 128 x float32 (little-endian) = 513 bayt
+#       başlık: üst 4 bit sürüm, bit 0 normalize edilmiş mi
+ENCODING_DIM = 128
+LEGACY_ENCODING_SIZE = ENCODING_DIM * 8
+FORMAT_V1 = 0x10
+FLAG_NORMALIZED = 0x01
+V1_ENCODING_SIZE = 1 + ENCODING_DIM * 4
+
+def encode_vector(vector: np.ndarray, normalize: bool = None) -> bytes:
+    """Encoding vektörünü başlıklı float32 formatına çevirir."""
+    if normalize is None:
+        normalize = settings.ENCODING_NORMALIZE
+    data = np.asarray(vector, dtype=np.float32).reshape(ENCODING_DIM)
+    header = FORMAT_V1
+    if normalize:
+        data = data / max(float(np.linalg.norm(data)), 1e-12)
+        header |= FLAG_NORMALIZED
+    return bytes([header]) + data.astype("<f4").tobytes()
+
+def prepare_query(vectors) -> np.ndarray:
+    """Sorgu vektörlerini saklama formatıyla aynı uzaya getirir (normalize açıksa birim uzunluk)."""
+    queries = np.asarray(vectors, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    if settings.ENCODING_NORMALIZE and len(queries):
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.maximum(norms, 1e-12)
+    return queries
+
+def _normalize_rows(vectors: np.ndarray, rows: list):
+    """Verilen satırları yerinde birim uzunluğa getirir."""
+    if rows:
+        norms = np.linalg.norm(vectors[rows], axis=1, keepdims=True)
+        vectors[rows] = vectors[rows] / np.maximum(norms, 1e-12)
+
+def decode_vector(data: bytes, normalize: bool = None) -> np.ndarray:
+    """
+    Saklanan encoding'i (eski float64 ya da v1 float32) float32 vektöre çevirir.
+    Normalize açıkken normalize bayrağı olmayan (eski ya da göç etmemiş) satırlar
+    da birim uzunlukta döner; böylece sorgular ve indeks aynı uzayda kalır.
+    """
+    if normalize is None:
+        normalize = settings.ENCODING_NORMALIZE
+    if len(data) == LEGACY_ENCODING_SIZE:
+        vector = np.frombuffer(data, dtype=np.float64).astype(np.float32)
+        flagged = False
+    elif len(data) == V1_ENCODING_SIZE and data[0] & 0xF0 == FORMAT_V1:
+        vector = np.frombuffer(data, dtype="<f4", offset=1).astype(np.float32)
+        flagged = bool(data[0] & FLAG_NORMALIZED)
+    else:
+        raise ValueError(f"Bilinmeyen encoding formatı ({len(data)} bayt)")
+    if normalize and not flagged:
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+    return vector
+
+def decode_vectors(blobs: List[bytes], out: np.ndarray = None, normalize: bool = None) -> np.ndarray:
+    """
+    Bir grup encoding'i tek seferde çözer. Aynı formattaki satırlar birleştirilip
+    tek bir np.frombuffer çağrısıyla dönüştürülür. Normalize açıkken (varsayılan
+    ENCODING_NORMALIZE) bayraksız satırlar decode sırasında normalize edilir.
+    """
+    if normalize is None:
+        normalize = settings.ENCODING_NORMALIZE
+    if out is None:
+        out = np.empty((len(blobs), ENCODING_DIM), dtype=np.float32)
+    v1_rows = [i for i, blob in enumerate(blobs) if len(blob) == V1_ENCODING_SIZE]
+    legacy_rows = [i for i, blob in enumerate(blobs) if len(blob) == LEGACY_ENCODING_SIZE]
+    if len(v1_rows) + len(legacy_rows) != len(blobs):
+        raise ValueError("Bilinmeyen encoding formatı")
+    if v1_rows:
+        raw = np.frombuffer(b"".join(blobs[i] for i in v1_rows), dtype=np.uint8)
+        payload = np.ascontiguousarray(raw.reshape(-1, V1_ENCODING_SIZE)[:, 1:])
+        out[v1_rows] = payload.view("<f4")
+    if legacy_rows:
+        raw = np.frombuffer(b"".join(blobs[i] for i in legacy_rows), dtype=np.float64)
+        out[legacy_rows] = raw.reshape(-1, ENCODING_DIM)
+    if normalize:
+        _normalize_rows(out, legacy_rows + [i for i in v1_rows if not blobs[i][0] & FLAG_NORMALIZED])
+    return out
+
+def load_encoding_matrix(
+    db: Session,
+    batch_size: int = 10000
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    encods tablosunu sunucu tarafı imleçle bloklar halinde okuyup önceden
+    ayrılmış float32 matrise yazar.
+
+    Returns:
+        tuple: (encoding ID'leri, kişi UUID'leri, (N, 128) float32 matris)
+    """
+    try:
+        total = db.query(func.count(Encoding.id)).scalar() or 0
+        encoding_ids = np.empty(total, dtype=np.int64)
+        person_ids = np.empty(total, dtype=object)
+        matrix = np.empty((total, ENCODING_DIM), dtype=np.float32)
+
+        query = (
+            db.query(Encoding.id, Encoding.person_id, Encoding.encoding)
+            .order_by(Encoding.id)
+            .execution_options(stream_results=True)
+            .yield_per(batch_size)
+        )
+        row_count = 0
+        batch = []
+        for row in query:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                row_count = _fill_batch(batch, row_count, encoding_ids, person_ids, matrix)
+                batch = []
+        if batch:
+            row_count = _fill_batch(batch, row_count, encoding_ids, person_ids, matrix)
+
+        # Sayım ile okuma arasında eklenen/silinen satırlar için kırp
+        logger.info("%s encoding matrise yüklendi", row_count)
+        return encoding_ids[:row_count], person_ids[:row_count], matrix[:row_count]
+    except Exception as e:
+        logger.error("Encoding matrisi yükleme hatası: %s", e)
+        raise
+
+def load_encoding_ids(db: Session, batch_size: int = 50000) -> np.ndarray:
+    """Tüm encoding ID'lerini (vektörler olmadan) artan sırada okur."""
+    try:
+        query = (
+            db.query(Encoding.id)
+            .order_by(Encoding.id)
+            .execution_options(stream_results=True)
+            .yield_per(batch_size)
+        )
+        return np.fromiter((row.id for row in query), dtype=np.int64)
+    except Exception as e:
+        logger.error("Encoding ID'leri okuma hatası: %s", e)
+        raise
+
+def iter_encoding_rows(db: Session, encoding_ids, batch_size: int = 10000):
+    """Verilen ID'lerin (id, person_id, encoding) satırlarını bloklar halinde döner."""
+    encoding_ids = [int(encoding_id) for encoding_id in encoding_ids]
+    for start in range(0, len(encoding_ids), batch_size):
+        chunk = encoding_ids[start:start + batch_size]
+        yield (
+            db.query(Encoding.id, Encoding.person_id, Encoding.encoding)
+            .filter(Encoding.id.in_(chunk))
+            .order_by(Encoding.id)
+            .all()
+        )
+
+def missing_encoding_ids(db: Session, known_ids) -> np.ndarray:
+    """
+    Veritabanında olup known_ids içinde olmayan encoding ID'lerini döner.
+    Satırlar ID sırasıyla commit edilmeyebildiği için indeks tamamlama en büyük
+    ID'ye değil, ID kümesi farkına dayanır.
+    """
+    db_ids = load_encoding_ids(db)
+    known = np.asarray(list(known_ids) if isinstance(known_ids, set) else known_ids, dtype=np.int64)
+    return db_ids[~np.isin(db_ids, known)]
+
+def _fill_batch(batch, start, encoding_ids, person_ids, matrix) -> int:
+    stop = min(start + len(batch), len(matrix))
+    batch = batch[:stop - start]
+    encoding_ids[start:stop] = [row.id for row in batch]
+    person_ids[start:stop] = [row.person_id for row in batch]
+    decode_vectors([row.encoding for row in batch], out=matrix[start:stop])
+    return stop
+
 def create_encoding(
     db: Session, 
     person_id: uuid.UUID, 
@@ -31,13 +197,43 @@ def create_encoding(
             face_path=face_path 
         )
         db.add(new_encoding)
+        db.flush()
+        # Döngüsel import olmaması için burada yükleniyor
+        from app.repository import prototype_service
+        prototype_service.add_to_prototypes(
+            db, {person_id: decode_vector(encoding_data)}, commit=False
+        )
         db.commit()
         db.refresh(new_encoding)
-        logger.info(f"Yeni encoding kaydı oluşturuldu: Kişi={person_id}, Face Path={face_path}")
+        logger.info("Yeni encoding kaydı oluşturuldu: Kişi=%s, Face Path=%s", person_id, face_path)
         return new_encoding
     except Exception as e:
         db.rollback()
-        logger.error(f"Encoding oluşturma hatası: {str(e)}")
+        logger.error("Encoding oluşturma hatası: %s", e)
+        raise
+
+def bulk_create_encodings(db: Session, encodings: List[dict]) -> int:
+    """
+    Encoding kayıtlarını tek INSERT ile ekler, commit etmez.
+    Çağıran taraf tek bir transaction içinde commit etmelidir.
+    """
+    try:
+        if encodings:
+            db.bulk_insert_mappings(Encoding, encodings)
+        return len(encodings)
+    except Exception as e:
+        logger.error("Toplu encoding oluşturma hatası: %s", e)
+        raise
+
+def get_encoding_ids_by_uuids(db: Session, uuids: List[uuid.UUID]) -> dict:
+    """Verilen encoding UUID'lerinin ID'lerini tek sorguda getirir."""
+    try:
+        if not uuids:
+            return {}
+        rows = db.query(Encoding.uuid, Encoding.id).filter(Encoding.uuid.in_(uuids)).all()
+        return {row.uuid: row.id for row in rows}
+    except Exception as e:
+        logger.error("Encoding ID getirme hatası: %s", e)
         raise
 
 def get_encoding_by_id(db: Session, encoding_id: int) -> Optional[Encoding]:
@@ -45,12 +241,12 @@ def get_encoding_by_id(db: Session, encoding_id: int) -> Optional[Encoding]:
     try:
         encoding = db.query(Encoding).filter(Encoding.id == encoding_id).first()
         if encoding:
-            logger.info(f"ID: {encoding_id} olan encoding getirildi")
+            logger.info("ID: %s olan encoding getirildi", encoding_id)
         else:
-            logger.warning(f"ID: {encoding_id} olan encoding bulunamadı")
+            logger.warning("ID: %s olan encoding bulunamadı", encoding_id)
         return encoding
     except Exception as e:
-        logger.error(f"Encoding getirme hatası - ID {encoding_id}: {str(e)}")
+        logger.error("Encoding getirme hatası - ID %s: %s", encoding_id, e)
         raise
 
 def get_encoding_by_uuid(db: Session, uuid_str: str) -> Optional[Encoding]:
@@ -58,10 +254,10 @@ def get_encoding_by_uuid(db: Session, uuid_str: str) -> Optional[Encoding]:
     try:
         encoding = db.query(Encoding).filter(Encoding.uuid == uuid_str).first()
         if encoding:
-            logger.info(f"UUID: {uuid_str} olan encoding getirildi")
+            logger.info("UUID: %s olan encoding getirildi", uuid_str)
         return encoding
     except Exception as e:
-        logger.error(f"UUID ile encoding getirme hatası: {str(e)}")
+        logger.error("UUID ile encoding getirme hatası: %s", e)
         raise
 
 def get_encodings_by_person(db: Session, person_id: uuid.UUID) -> List[Encoding]:
@@ -75,14 +271,14 @@ def get_encodings_by_person(db: Session, person_id: uuid.UUID) -> List[Encoding]
         encodings = (
             db.query(Encoding)
             .filter(Encoding.person_id == person_id)
-            .order_by(Encoding.created_at.desc())  # En son eklenenler önce
+            .order_by(Encoding.id.desc())  # En son eklenenler önce (encods tablosunda created_at yok)
             .all()
         )
         
-        logger.info(f"Kişi ID: {person_id} için {len(encodings)} encoding bulundu")
+        logger.info("Kişi ID: %s için %s encoding bulundu", person_id, len(encodings))
         return encodings
     except Exception as e:
-        logger.error(f"Kişi encoding'leri getirme hatası - Kişi ID {person_id}: {str(e)}")
+        logger.error("Kişi encoding'leri getirme hatası - Kişi ID %s: %s", person_id, e)
         raise
 
 def delete_encoding(db: Session, encoding_id: int) -> bool:
@@ -92,13 +288,13 @@ def delete_encoding(db: Session, encoding_id: int) -> bool:
         if encoding:
             db.delete(encoding)
             db.commit()
-            logger.info(f"Encoding silindi - ID: {encoding_id}")
+            logger.info("Encoding silindi - ID: %s", encoding_id)
             return True
-        logger.warning(f"Silinecek encoding bulunamadı - ID: {encoding_id}")
+        logger.warning("Silinecek encoding bulunamadı - ID: %s", encoding_id)
         return False
     except Exception as e:
         db.rollback()
-        logger.error(f"Encoding silme hatası - ID {encoding_id}: {str(e)}")
+        logger.error("Encoding silme hatası - ID %s: %s", encoding_id, e)
         raise
 
 def update_encoding(
@@ -123,28 +319,28 @@ def update_encoding(
             if new_face_path:  # Eğer yeni yüz yolu verildiyse
                 encoding.face_path = new_face_path
             db.commit()
-            logger.info(f"Encoding güncellendi - ID: {encoding_id}")
+            logger.info("Encoding güncellendi - ID: %s", encoding_id)
             return encoding
-        logger.warning(f"Güncellenecek encoding bulunamadı - ID: {encoding_id}")
+        logger.warning("Güncellenecek encoding bulunamadı - ID: %s", encoding_id)
         return None
     except Exception as e:
         db.rollback()
-        logger.error(f"Encoding güncelleme hatası - ID {encoding_id}: {str(e)}")
+        logger.error("Encoding güncelleme hatası - ID %s: %s", encoding_id, e)
         raise
 
 def compare_encodings(encoding1: bytes, encoding2: bytes) -> float:
     """İki encoding arasındaki benzerliği hesaplar."""
     try:
         # NumPy array'lerine dönüştür
-        enc1_array = np.frombuffer(encoding1, dtype=np.float64)
-        enc2_array = np.frombuffer(encoding2, dtype=np.float64)
+        enc1_array = decode_vector(encoding1)
+        enc2_array = decode_vector(encoding2)
         
         # Cosine similarity hesapla
         similarity = np.dot(enc1_array, enc2_array)
-        logger.debug(f"Encoding karşılaştırma sonucu: {similarity}")
+        logger.debug("Encoding karşılaştırma sonucu: %s", similarity)
         return similarity
     except Exception as e:
-        logger.error(f"Encoding karşılaştırma hatası: {str(e)}")
+        logger.error("Encoding karşılaştırma hatası: %s", e)
         raise
 
 def get_person_images(db: Session, person_id: uuid.UUID) -> List[dict]:
@@ -172,9 +368,9 @@ def get_person_images(db: Session, person_id: uuid.UUID) -> List[dict]:
                 "image_uuid": str(image.uuid)
             })
 
-        logger.info(f"Kişi {person_id} için {len(results)} resim bulundu")
+        logger.info("Kişi %s için %s resim bulundu", person_id, len(results))
         return results
 
     except Exception as e:
-        logger.error(f"Kişi resimleri getirme hatası - Kişi ID {person_id}: {str(e)}")
+        logger.error("Kişi resimleri getirme hatası - Kişi ID %s: %s", person_id, e)
         raise
\ No newline at end of file
@@ -1,3 +1,4 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from app.models import Image
 from app.config.logging import setup_logger
@@ -7,14 +8,25 @@ from typing import Optional, List
 
 logger = setup_logger(__name__)
 
+PHASH_BANDS = 4
+PHASH_BAND_BITS = 16
+
+def _to_signed64(value: int) -> int:
+    """64 bitlik işaretsiz hash'i BigInteger kolonuna sığacak şekilde işaretli yapar."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def _phash_bands(phash: int) -> list[int]:
+    mask = (1 << PHASH_BAND_BITS) - 1
+    return [(phash >> (i * PHASH_BAND_BITS)) & mask for i in range(PHASH_BANDS)]
+
 def get_all_images(db: Session) -> List[Image]:
     """Tüm görüntüleri getirir."""
     try:
         images = db.query(Image).all()
-        logger.info(f"Toplam {len(images)} görüntü getirildi")
+        logger.info("Toplam %s görüntü getirildi", len(images))
         return images
     except Exception as e:
-        logger.error(f"Görüntüler getirilirken hata oluştu: {str(e)}")
+        logger.error("Görüntüler getirilirken hata oluştu: %s", e)
         raise
 
 def get_image_by_id(db: Session, image_id: int) -> Optional[Image]:
@@ -22,12 +34,12 @@ def get_image_by_id(db: Session, image_id: int) -> Optional[Image]:
     try:
         image = db.query(Image).filter(Image.id == image_id).first()
         if image:
-            logger.info(f"ID: {image_id} olan görüntü getirildi")
+            logger.info("ID: %s olan görüntü getirildi", image_id)
         else:
-            logger.warning(f"ID: {image_id} olan görüntü bulunamadı")
+            logger.warning("ID: %s olan görüntü bulunamadı", image_id)
         return image
     except Exception as e:
-        logger.error(f"Görüntü getirme hatası - ID {image_id}: {str(e)}")
+        logger.error("Görüntü getirme hatası - ID %s: %s", image_id, e)
         raise
 
 def get_image_by_uuid(db: Session, uuid_str: str) -> Optional[Image]:
@@ -35,28 +47,101 @@ def get_image_by_uuid(db: Session, uuid_str: str) -> Optional[Image]:
     try:
         image = db.query(Image).filter(Image.uuid == uuid_str).first()
         if image:
-            logger.info(f"UUID: {uuid_str} olan görüntü getirildi")
+            logger.info("UUID: %s olan görüntü getirildi", uuid_str)
         return image
     except Exception as e:
-        logger.error(f"UUID ile görüntü getirme hatası: {str(e)}")
+        logger.error("UUID ile görüntü getirme hatası: %s", e)
         raise
 
-def create_image(db: Session, file_path: str) -> Image:
-    """Yeni görüntü kaydı oluşturur."""
+def create_image(
+    db: Session,
+    file_path: str,
+    image_uuid: uuid.UUID = None,
+    commit: bool = True,
+    sha256: str = None,
+    phash: int = None,
+    thumbnails: dict = None
+) -> Image:
+    """
+    Yeni görüntü kaydı oluşturur.
+
+    Args:
+        db: Veritabanı oturumu
+        file_path: Görüntü dosyasının yolu
+        image_uuid: Önceden belirlenmiş UUID (opsiyonel)
+        commit: False ise sadece flush edilir, commit çağıran tarafa bırakılır
+        sha256: Dosya içeriğinin SHA-256 özeti (opsiyonel)
+        phash: 64 bitlik algısal hash (opsiyonel)
+        thumbnails: Küçük resim dosya adları, ör. {'small': ..., 'medium': ...} (opsiyonel)
+    """
     try:
         new_image = Image(
-            uuid=uuid.uuid4(),
+            uuid=image_uuid or uuid.uuid4(),
             file_path=file_path,
-            created_at=datetime.utcnow()
+            created_at=datetime.utcnow(),
+            sha256=sha256,
+            thumb_small=(thumbnails or {}).get("small"),
+            thumb_medium=(thumbnails or {}).get("medium")
         )
+        if phash is not None:
+            new_image.phash = _to_signed64(phash)
+            (
+                new_image.phash_band0,
+                new_image.phash_band1,
+                new_image.phash_band2,
+                new_image.phash_band3
+            ) = _phash_bands(phash)
         db.add(new_image)
-        db.commit()
-        db.refresh(new_image)
-        logger.info(f"Yeni görüntü kaydı oluşturuldu: {file_path}")
+        if commit:
+            db.commit()
+            db.refresh(new_image)
+        else:
+            db.flush()
+        logger.info("Yeni görüntü kaydı oluşturuldu: %s", file_path)
         return new_image
     except Exception as e:
-        db.rollback()
-        logger.error(f"Görüntü oluşturma hatası: {str(e)}")
+        if commit:
+            db.rollback()
+        logger.error("Görüntü oluşturma hatası: %s", e)
+        raise
+
+def get_image_by_sha256(db: Session, sha256: str) -> Optional[Image]:
+    """İçerik özetine göre birebir aynı görüntüyü getirir."""
+    try:
+        return db.query(Image).filter(Image.sha256 == sha256).order_by(Image.id).first()
+    except Exception as e:
+        logger.error("SHA-256 ile görüntü getirme hatası: %s", e)
+        raise
+
+def find_similar_image(db: Session, phash: int, max_distance: int) -> Optional[tuple]:
+    """
+    Algısal hash'i max_distance bit farkı içinde olan en benzer görüntüyü getirir.
+    Adaylar 16 bitlik bantlardan en az biri eşit olan kayıtlardır; bu yüzden
+    max_distance en fazla 3 olduğunda hiçbir yakın kopya kaçırılmaz.
+
+    Returns:
+        Optional[tuple]: (Image, hamming mesafesi) ya da None
+    """
+    try:
+        bands = _phash_bands(phash)
+        candidates = (
+            db.query(Image)
+            .filter(or_(
+                Image.phash_band0 == bands[0],
+                Image.phash_band1 == bands[1],
+                Image.phash_band2 == bands[2],
+                Image.phash_band3 == bands[3]
+            ))
+            .all()
+        )
+        best = None
+        for image in candidates:
+            distance = bin((image.phash & ((1 << 64) - 1)) ^ phash).count("1")
+            if distance <= max_distance and (best is None or distance < best[1]):
+                best = (image, distance)
+        return best
+    except Exception as e:
+        logger.error("Benzer görüntü arama hatası: %s", e)
         raise
 
 def update_image_path(db: Session, image_id: int, new_file_path: str) -> Optional[Image]:
@@ -66,13 +151,13 @@ def update_image_path(db: Session, image_id: int, new_file_path: str) -> Optiona
         if image:
             image.file_path = new_file_path
             db.commit()
-            logger.info(f"Görüntü yolu güncellendi - ID: {image_id}")
+            logger.info("Görüntü yolu güncellendi - ID: %s", image_id)
             return image
-        logger.warning(f"Güncellenecek görüntü bulunamadı - ID: {image_id}")
+        logger.warning("Güncellenecek görüntü bulunamadı - ID: %s", image_id)
         return None
     except Exception as e:
         db.rollback()
-        logger.error(f"Görüntü güncelleme hatası - ID {image_id}: {str(e)}")
+        logger.error("Görüntü güncelleme hatası - ID %s: %s", image_id, e)
         raise
 
 def delete_image(db: Session, image_id: int) -> bool:
@@ -82,13 +167,13 @@ def delete_image(db: Session, image_id: int) -> bool:
         if image:
             db.delete(image)
             db.commit()
-            logger.info(f"Görüntü silindi - ID: {image_id}")
+            logger.info("Görüntü silindi - ID: %s", image_id)
             return True
-        logger.warning(f"Silinecek görüntü bulunamadı - ID: {image_id}")
+        logger.warning("Silinecek görüntü bulunamadı - ID: %s", image_id)
         return False
     except Exception as e:
         db.rollback()
-        logger.error(f"Görüntü silme hatası - ID {image_id}: {str(e)}")
+        logger.error("Görüntü silme hatası - ID %s: %s", image_id, e)
         raise
 
 def get_images_by_date_range(db: Session, start_date: datetime, end_date: datetime) -> List[Image]:
@@ -98,8 +183,8 @@ def get_images_by_date_range(db: Session, start_date: datetime, end_date: dateti
             Image.created_at >= start_date,
             Image.created_at <= end_date
         ).all()
-        logger.info(f"Tarih aralığında {len(images)} görüntü bulundu")
+        logger.info("Tarih aralığında %s görüntü bulundu", len(images))
         return images
     except Exception as e:
-        logger.error(f"Tarih aralığı ile görüntü getirme hatası: {str(e)}")
+        logger.error("Tarih aralığı ile görüntü getirme hatası: %s", e)
         raise
\ No newline at end of file
@@ -0,0 +1,229 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import IngestJob, IngestJobFile
+from app.config.logging import setup_logger
+from datetime import datetime
+from typing import Optional, List, Tuple
+import uuid
+
+logger = setup_logger(__name__)
+
+# Koşullu alımda yarışı kaybeden işçinin kaç kez yeni dosya deneyeceği
+CLAIM_ATTEMPTS = 3
+
+def create_job(
+    db: Session,
+    files: List[Tuple[str, str]],
+    profile_id: str = None,
+    encoding_profile: str = None
+) -> IngestJob:
+    """
+    Yeni yükleme işi ve dosya kayıtlarını oluşturur.
+
+    Args:
+        db: Veritabanı oturumu
+        files: (orijinal dosya adı, diske kaydedilen yol) listesi
+        profile_id: Verilirse dosyalar işlenirken profil alınır
+        encoding_profile: İşin dosyaları için encoding profili (fast / accurate)
+    """
+    try:
+        now = datetime.utcnow()
+        job = IngestJob(
+            uuid=uuid.uuid4(),
+            status="pending",
+            total_files=len(files),
+            profile_id=profile_id,
+            encoding_profile=encoding_profile,
+            created_at=now,
+            updated_at=now
+        )
+        db.add(job)
+        for original_name, file_path in files:
+            db.add(IngestJobFile(
+                job_id=job.uuid,
+                original_name=original_name,
+                file_path=file_path,
+                status="pending",
+                created_at=now,
+                updated_at=now
+            ))
+        db.commit()
+        db.refresh(job)
+        logger.info("Yeni yükleme işi oluşturuldu: %s - %s dosya", job.uuid, len(files))
+        return job
+    except Exception as e:
+        db.rollback()
+        logger.error("Yükleme işi oluşturma hatası: %s", e)
+        raise
+
+def get_job_by_uuid(db: Session, job_id: uuid.UUID) -> Optional[IngestJob]:
+    """UUID'ye göre yükleme işini dosyalarıyla birlikte getirir."""
+    try:
+        return db.query(IngestJob).filter(IngestJob.uuid == job_id).first()
+    except Exception as e:
+        logger.error("Yükleme işi getirme hatası - %s: %s", job_id, e)
+        raise
+
+def count_pending_files(db: Session) -> int:
+    """Kuyrukta bekleyen ve işlenen dosya sayısını döner."""
+    try:
+        return (
+            db.query(IngestJobFile)
+            .filter(IngestJobFile.status.in_(("pending", "processing")))
+            .count()
+        )
+    except Exception as e:
+        logger.error("Kuyruk sayma hatası: %s", e)
+        raise
+
+def claim_next_file(db: Session, job_limit: int = 0) -> Optional[IngestJobFile]:
+    """
+    Sıradaki bekleyen dosyayı 'processing' olarak işaretleyip döner.
+    Postgres'te SKIP LOCKED ile birden fazla süreç aynı dosyayı almaz. Satır kilidi
+    olmayan veritabanlarında (SQLite) alım 'pending' koşullu UPDATE ile yapılır;
+    yarışı kaybeden işçi sıradaki dosyayı dener.
+
+    Args:
+        job_limit: 0'dan büyükse, bu kadar dosyası işlenmekte olan işler atlanır
+            (eşzamanlı alımlarda sınır yaklaşık olarak uygulanır)
+    """
+    try:
+        for _ in range(CLAIM_ATTEMPTS):
+            query = db.query(IngestJobFile).filter(IngestJobFile.status == "pending")
+            if job_limit > 0:
+                busy_jobs = (
+                    db.query(IngestJobFile.job_id)
+                    .filter(IngestJobFile.status == "processing")
+                    .group_by(IngestJobFile.job_id)
+                    .having(func.count(IngestJobFile.id) >= job_limit)
+                )
+                query = query.filter(IngestJobFile.job_id.notin_(busy_jobs))
+            job_file = (
+                query
+                .order_by(IngestJobFile.id)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job_file is None:
+                db.rollback()
+                return None
+            now = datetime.utcnow()
+            claimed = db.query(IngestJobFile).filter(
+                IngestJobFile.id == job_file.id,
+                IngestJobFile.status == "pending"
+            ).update({IngestJobFile.status: "processing", IngestJobFile.updated_at: now}, synchronize_session=False)
+            if not claimed:
+                # Başka bir işçi aynı dosyayı seçip önce aldı
+                db.rollback()
+                continue
+            db.query(IngestJob).filter(
+                IngestJob.uuid == job_file.job_id,
+                IngestJob.status == "pending"
+            ).update({IngestJob.status: "processing", IngestJob.updated_at: now}, synchronize_session=False)
+            db.commit()
+            db.refresh(job_file)
+            return job_file
+        return None
+    except Exception as e:
+        db.rollback()
+        logger.error("Kuyruktan dosya alma hatası: %s", e)
+        raise
+
+def _finish_file(db: Session, job_file_id: int, counter, values: dict):
+    now = datetime.utcnow()
+    job_file = db.query(IngestJobFile).filter(IngestJobFile.id == job_file_id).first()
+    if job_file is None:
+        logger.warning("Yükleme dosyası bulunamadı - ID: %s", job_file_id)
+        return
+    if job_file.status in ("done", "failed"):
+        # Kurtarma sonrası iki kez işlenen dosya sayaçları ikinci kez artırmaz
+        logger.warning("Yükleme dosyası zaten sonuçlanmış - ID: %s", job_file_id)
+        db.rollback()
+        return
+    for key, value in values.items():
+        setattr(job_file, key, value)
+    job_file.updated_at = now
+    db.query(IngestJob).filter(IngestJob.uuid == job_file.job_id).update(
+        {counter: counter + 1, IngestJob.updated_at: now},
+        synchronize_session=False
+    )
+    db.flush()
+    job = db.query(IngestJob).populate_existing().filter(IngestJob.uuid == job_file.job_id).first()
+    if job.processed_files + job.failed_files >= job.total_files:
+        job.status = "failed" if job.processed_files == 0 else "completed"
+    db.commit()
+
+def complete_file(
+    db: Session,
+    job_file_id: int,
+    image_id: uuid.UUID,
+    faces_detected: int,
+    new_faces: int
+):
+    """Dosyayı başarıyla işlenmiş olarak işaretler."""
+    try:
+        _finish_file(db, job_file_id, IngestJob.processed_files, {
+            "status": "done",
+            "image_id": image_id,
+            "faces_detected": faces_detected,
+            "new_faces": new_faces
+        })
+        logger.info("Yükleme dosyası işlendi - ID: %s", job_file_id)
+    except Exception as e:
+        db.rollback()
+        logger.error("Yükleme dosyası tamamlama hatası - ID %s: %s", job_file_id, e)
+        raise
+
+def fail_file(db: Session, job_file_id: int, error: str):
+    """Dosyayı hatalı olarak işaretler."""
+    try:
+        _finish_file(db, job_file_id, IngestJob.failed_files, {
+            "status": "failed",
+            "error": error
+        })
+        logger.warning("Yükleme dosyası başarısız - ID: %s: %s", job_file_id, error)
+    except Exception as e:
+        db.rollback()
+        logger.error("Yükleme dosyası hata kaydı hatası - ID %s: %s", job_file_id, e)
+        raise
+
+def touch_files(db: Session, job_file_ids: list[int]):
+    """İşlenmekte olan dosyaların updated_at'ini yeniler; canlı işçinin dosyaları kurtarılmaz."""
+    try:
+        if not job_file_ids:
+            return
+        (
+            db.query(IngestJobFile)
+            .filter(IngestJobFile.id.in_(job_file_ids))
+            .filter(IngestJobFile.status == "processing")
+            .update({IngestJobFile.updated_at: datetime.utcnow()}, synchronize_session=False)
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error("Kuyruk nabız hatası: %s", e)
+        raise
+
+def requeue_interrupted_files(db: Session, stale_before: datetime) -> int:
+    """
+    stale_before'dan beri nabzı gelmeyen, yani işçisi çöken ya da kapanan
+    'processing' dosyalarını tekrar kuyruğa alır.
+    """
+    try:
+        count = (
+            db.query(IngestJobFile)
+            .filter(IngestJobFile.status == "processing")
+            .filter(IngestJobFile.updated_at < stale_before)
+            .update(
+                {IngestJobFile.status: "pending", IngestJobFile.updated_at: datetime.utcnow()},
+                synchronize_session=False
+            )
+        )
+        db.commit()
+        if count:
+            logger.info("Yarım kalan %s dosya tekrar kuyruğa alındı", count)
+        return count
+    except Exception as e:
+        db.rollback()
+        logger.error("Kuyruk kurtarma hatası: %s", e)
+        raise
@@ -24,11 +24,24 @@ def create_match(
         db.add(new_match)
         db.commit()
         db.refresh(new_match)
-        logger.info(f"Yeni eşleşme kaydı oluşturuldu: Kişi={person_id}, Görüntü={matched_image_id}")
+        logger.info("Yeni eşleşme kaydı oluşturuldu: Kişi=%s, Görüntü=%s", person_id, matched_image_id)
         return new_match
     except Exception as e:
         db.rollback()
-        logger.error(f"Eşleşme oluşturma hatası: {str(e)}")
+        logger.error("Eşleşme oluşturma hatası: %s", e)
+        raise
+
+def bulk_create_matches(db: Session, matches: List[dict]) -> int:
+    """
+    Eşleşme kayıtlarını tek INSERT ile ekler, commit etmez.
+    Çağıran taraf tek bir transaction içinde commit etmelidir.
+    """
+    try:
+        if matches:
+            db.bulk_insert_mappings(Match, matches)
+        return len(matches)
+    except Exception as e:
+        logger.error("Toplu eşleşme oluşturma hatası: %s", e)
         raise
 
 def get_match_by_id(db: Session, match_id: int) -> Optional[Match]:
@@ -36,32 +49,32 @@ def get_match_by_id(db: Session, match_id: int) -> Optional[Match]:
     try:
         match = db.query(Match).filter(Match.id == match_id).first()
         if match:
-            logger.info(f"ID: {match_id} olan eşleşme getirildi")
+            logger.info("ID: %s olan eşleşme getirildi", match_id)
         else:
-            logger.warning(f"ID: {match_id} olan eşleşme bulunamadı")
+            logger.warning("ID: %s olan eşleşme bulunamadı", match_id)
         return match
     except Exception as e:
-        logger.error(f"Eşleşme getirme hatası - ID {match_id}: {str(e)}")
+        logger.error("Eşleşme getirme hatası - ID %s: %s", match_id, e)
         raise
 
 def get_matches_by_person(db: Session, person_id: uuid.UUID) -> List[Match]:
     """Kişiye ait tüm eşleşmeleri getirir."""
     try:
         matches = db.query(Match).filter(Match.person_id == person_id).all()
-        logger.info(f"Kişi ID: {person_id} için {len(matches)} eşleşme bulundu")
+        logger.info("Kişi ID: %s için %s eşleşme bulundu", person_id, len(matches))
         return matches
     except Exception as e:
-        logger.error(f"Kişi eşleşmeleri getirme hatası - Kişi ID {person_id}: {str(e)}")
+        logger.error("Kişi eşleşmeleri getirme hatası - Kişi ID %s: %s", person_id, e)
         raise
 
 def get_matches_by_image(db: Session, image_id: uuid.UUID) -> List[Match]:
     """Görüntüye ait tüm eşleşmeleri getirir."""
     try:
         matches = db.query(Match).filter(Match.matched_image_id == image_id).all()
-        logger.info(f"Görüntü ID: {image_id} için {len(matches)} eşleşme bulundu")
+        logger.info("Görüntü ID: %s için %s eşleşme bulundu", image_id, len(matches))
         return matches
     except Exception as e:
-        logger.error(f"Görüntü eşleşmeleri getirme hatası - Görüntü ID {image_id}: {str(e)}")
+        logger.error("Görüntü eşleşmeleri getirme hatası - Görüntü ID %s: %s", image_id, e)
         raise
 
 def get_matches_by_confidence_threshold(
@@ -71,10 +84,10 @@ def get_matches_by_confidence_threshold(
     """Belirli güven skorunun üstündeki eşleşmeleri getirir."""
     try:
         matches = db.query(Match).filter(Match.confidence_score >= threshold).all()
-        logger.info(f"Güven skoru {threshold} üzerinde {len(matches)} eşleşme bulundu")
+        logger.info("Güven skoru %s üzerinde %s eşleşme bulundu", threshold, len(matches))
         return matches
     except Exception as e:
-        logger.error(f"Güven skoru filtreleme hatası: {str(e)}")
+        logger.error("Güven skoru filtreleme hatası: %s", e)
         raise
 
 def get_recent_matches(
@@ -84,10 +97,10 @@ def get_recent_matches(
     """En son eşleşmeleri getirir."""
     try:
         matches = db.query(Match).order_by(Match.created_at.desc()).limit(limit).all()
-        logger.info(f"Son {limit} eşleşme getirildi")
+        logger.info("Son %s eşleşme getirildi", limit)
         return matches
     except Exception as e:
-        logger.error(f"Son eşleşmeleri getirme hatası: {str(e)}")
+        logger.error("Son eşleşmeleri getirme hatası: %s", e)
         raise
 
 def delete_match(db: Session, match_id: int) -> bool:
@@ -97,11 +110,11 @@ def delete_match(db: Session, match_id: int) -> bool:
         if match:
             db.delete(match)
             db.commit()
-            logger.info(f"Eşleşme silindi - ID: {match_id}")
+            logger.info("Eşleşme silindi - ID: %s", match_id)
             return True
-        logger.warning(f"Silinecek eşleşme bulunamadı - ID: {match_id}")
+        logger.warning("Silinecek eşleşme bulunamadı - ID: %s", match_id)
         return False
     except Exception as e:
         db.rollback()
-        logger.error(f"Eşleşme silme hatası - ID {match_id}: {str(e)}")
+        logger.error("Eşleşme silme hatası - ID %s: %s", match_id, e)
         raise
\ No newline at end of file
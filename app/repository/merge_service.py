@@ -0,0 +1,164 @@
+from sqlalchemy.orm import Session
+from app.models import Person, Encoding, Match, ClusteringState, MergeProposal
+from app.repository import prototype_service
+from app.config.logging import setup_logger
+from datetime import datetime
+import json
+from typing import Optional, List
+import uuid
+
+logger = setup_logger(__name__)
+
+def get_last_clustered_encoding_id(db: Session) -> int:
+    """Kümelemenin en son işlediği encoding ID'sini döner."""
+    try:
+        state = db.query(ClusteringState).filter(ClusteringState.id == 1).first()
+        return state.last_encoding_id if state else 0
+    except Exception as e:
+        logger.error("Kümeleme durumu getirme hatası: %s", e)
+        raise
+
+def get_clustering_gaps(db: Session) -> dict:
+    """Kümeleme eşiğinin altında kalıp henüz görülmemiş encoding ID'lerini {id: ilk görülme zamanı} olarak döner."""
+    try:
+        state = db.query(ClusteringState).filter(ClusteringState.id == 1).first()
+        if state is None or not state.pending_gaps:
+            return {}
+        return {int(encoding_id): seen_at for encoding_id, seen_at in json.loads(state.pending_gaps).items()}
+    except Exception as e:
+        logger.error("Kümeleme boşlukları getirme hatası: %s", e)
+        raise
+
+def set_last_clustered_encoding_id(
+    db: Session,
+    encoding_id: int,
+    gaps: Optional[dict] = None,
+    commit: bool = True
+):
+    """Kümelemenin en son işlediği encoding ID'sini ve verilirse bekleyen boşlukları kaydeder."""
+    try:
+        state = db.query(ClusteringState).filter(ClusteringState.id == 1).first()
+        if state is None:
+            state = ClusteringState(id=1)
+            db.add(state)
+        state.last_encoding_id = encoding_id
+        if gaps is not None:
+            state.pending_gaps = json.dumps({str(gap_id): seen_at for gap_id, seen_at in gaps.items()})
+        state.updated_at = datetime.utcnow()
+        if commit:
+            db.commit()
+    except Exception as e:
+        if commit:
+            db.rollback()
+        logger.error("Kümeleme durumu kaydetme hatası: %s", e)
+        raise
+
+def merge_persons(
+    db: Session,
+    target_person_id: uuid.UUID,
+    source_person_ids: List[uuid.UUID],
+    commit: bool = True
+) -> int:
+    """
+    Kaynak kişilerin tüm encoding ve eşleşme kayıtlarını hedef kişiye taşır ve
+    kaynak kişileri pasif yapar. Güncellemeler toplu UPDATE ile yapılır.
+    Önbellek geçersiz kılma commit sonrasında çağıranın (servis katmanı) işidir.
+
+    Returns:
+        int: Birleştirilen kişi sayısı
+    """
+    try:
+        source_person_ids = [pid for pid in source_person_ids if pid != target_person_id]
+        if not source_person_ids:
+            return 0
+        db.query(Encoding).filter(Encoding.person_id.in_(source_person_ids)).update(
+            {Encoding.person_id: target_person_id}, synchronize_session=False
+        )
+        db.query(Match).filter(Match.person_id.in_(source_person_ids)).update(
+            {Match.person_id: target_person_id}, synchronize_session=False
+        )
+        db.query(Person).filter(Person.uuid.in_(source_person_ids)).update(
+            {Person.is_active: False}, synchronize_session=False
+        )
+        prototype_service.delete_prototypes(db, source_person_ids, commit=False)
+        prototype_service.rebuild_prototypes(db, [target_person_id], commit=False)
+        if commit:
+            db.commit()
+        logger.info("%s kişi %s ile birleştirildi", len(source_person_ids), target_person_id)
+        return len(source_person_ids)
+    except Exception as e:
+        if commit:
+            db.rollback()
+        logger.error("Kişi birleştirme hatası - Hedef %s: %s", target_person_id, e)
+        raise
+
+def create_merge_proposals(db: Session, proposals: List[dict], commit: bool = True) -> int:
+    """
+    Birleştirme önerilerini kaydeder. Aynı kaynak için bekleyen öneri varsa tekrar eklenmez.
+
+    Args:
+        proposals: 'source_person_id', 'target_person_id', 'distance' anahtarlı sözlükler
+    """
+    try:
+        if not proposals:
+            return 0
+        pending_sources = {
+            row.source_person_id
+            for row in db.query(MergeProposal.source_person_id)
+            .filter(MergeProposal.status == "pending")
+            .filter(MergeProposal.source_person_id.in_([p["source_person_id"] for p in proposals]))
+            .all()
+        }
+        now = datetime.utcnow()
+        rows = [
+            {**proposal, "status": "pending", "created_at": now}
+            for proposal in proposals
+            if proposal["source_person_id"] not in pending_sources
+        ]
+        if rows:
+            db.bulk_insert_mappings(MergeProposal, rows)
+        if commit:
+            db.commit()
+        logger.info("%s birleştirme önerisi oluşturuldu", len(rows))
+        return len(rows)
+    except Exception as e:
+        if commit:
+            db.rollback()
+        logger.error("Birleştirme önerisi oluşturma hatası: %s", e)
+        raise
+
+def get_pending_proposals(db: Session, limit: int = 100) -> List[MergeProposal]:
+    """Bekleyen birleştirme önerilerini getirir."""
+    try:
+        return (
+            db.query(MergeProposal)
+            .filter(MergeProposal.status == "pending")
+            .order_by(MergeProposal.distance)
+            .limit(limit)
+            .all()
+        )
+    except Exception as e:
+        logger.error("Birleştirme önerileri getirme hatası: %s", e)
+        raise
+
+def get_proposal_by_id(db: Session, proposal_id: int) -> Optional[MergeProposal]:
+    """ID'ye göre birleştirme önerisini getirir."""
+    try:
+        return db.query(MergeProposal).filter(MergeProposal.id == proposal_id).first()
+    except Exception as e:
+        logger.error("Birleştirme önerisi getirme hatası - ID %s: %s", proposal_id, e)
+        raise
+
+def set_proposal_status(db: Session, proposal_id: int, status: str, commit: bool = True):
+    """Birleştirme önerisinin durumunu günceller (applied / rejected)."""
+    try:
+        db.query(MergeProposal).filter(MergeProposal.id == proposal_id).update(
+            {MergeProposal.status: status}, synchronize_session=False
+        )
+        if commit:
+            db.commit()
+    except Exception as e:
+        if commit:
+            db.rollback()
+        logger.error("Birleştirme önerisi güncelleme hatası - ID %s: %s", proposal_id, e)
+        raise
@@ -0,0 +1,216 @@
+from sqlalchemy.orm import Session
+from app.models import Encoding, PersonPrototype
+from app.repository.encoding_service import ENCODING_DIM, decode_vectors, prepare_query
+from app.config.logging import setup_logger
+from app.config.settings import settings
+from datetime import datetime
+from typing import List, Tuple
+import uuid
+import numpy as np
+
+logger = setup_logger(__name__)
+
+# Prototipi olmayan kişiler bu kadarlık gruplar halinde hesaplanır
+BACKFILL_BATCH_SIZE = 500
+
+def select_medoids(vectors: np.ndarray, count: int = None) -> np.ndarray:
+    """
+    Kişinin encoding'leri arasından temsilci seçer: ilki merkeze en yakın encoding,
+    sonrakiler seçilmişlere en uzak olanlar (farklı poz/ışık koşullarını kapsar).
+    """
+    if count is None:
+        count = settings.PROTOTYPE_MEDOIDS
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    if len(vectors) <= count:
+        return vectors.copy()
+    centroid = vectors.mean(axis=0)
+    chosen = [int(np.argmin(((vectors - centroid) ** 2).sum(axis=1)))]
+    min_dist = ((vectors - vectors[chosen[0]]) ** 2).sum(axis=1)
+    while len(chosen) < count:
+        idx = int(np.argmax(min_dist))
+        chosen.append(idx)
+        min_dist = np.minimum(min_dist, ((vectors - vectors[idx]) ** 2).sum(axis=1))
+    return vectors[chosen].copy()
+
+def update_prototype(
+    centroid: np.ndarray,
+    count: int,
+    medoids: np.ndarray,
+    pending: int,
+    new_vectors: np.ndarray
+) -> Tuple[np.ndarray, int, np.ndarray, int, bool]:
+    """
+    Yeni encoding'leri mevcut prototipe artımlı olarak ekler. Merkez koşan ortalama
+    ile güncellenir; temsilci sayısı dolana kadar yeni encoding'ler temsilci olur.
+
+    Returns:
+        tuple: (merkez, encoding sayısı, temsilciler, bekleyen güncelleme, yeniden seçim gerekli mi)
+    """
+    new_vectors = np.asarray(new_vectors, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    total = count + len(new_vectors)
+    centroid = (centroid * count + new_vectors.sum(axis=0)) / max(total, 1)
+    free = settings.PROTOTYPE_MEDOIDS - len(medoids)
+    if free > 0:
+        medoids = np.vstack([medoids, new_vectors[:free]])
+    pending += len(new_vectors)
+    return centroid.astype(np.float32), total, medoids, pending, pending >= settings.PROTOTYPE_REFRESH_EVERY
+
+def _to_blob(vectors: np.ndarray) -> bytes:
+    return np.asarray(vectors, dtype="<f4").tobytes()
+
+def _from_blob(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<f4").astype(np.float32).reshape(-1, ENCODING_DIM)
+
+def _person_vectors(db: Session, person_ids: List[uuid.UUID]) -> dict:
+    rows = (
+        db.query(Encoding.person_id, Encoding.encoding)
+        .filter(Encoding.person_id.in_(person_ids))
+        .all()
+    )
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.person_id, []).append(row.encoding)
+    return {person_id: decode_vectors(blobs) for person_id, blobs in grouped.items()}
+
+def rebuild_prototypes(db: Session, person_ids: List[uuid.UUID], commit: bool = True) -> int:
+    """Verilen kişilerin prototiplerini tüm encoding'lerinden baştan hesaplar."""
+    try:
+        person_ids = list(set(person_ids))
+        if not person_ids:
+            return 0
+        vectors_by_person = _person_vectors(db, person_ids)
+        existing = {
+            row.person_id: row
+            for row in db.query(PersonPrototype).filter(PersonPrototype.person_id.in_(person_ids)).all()
+        }
+        now = datetime.utcnow()
+        for person_id in person_ids:
+            vectors = vectors_by_person.get(person_id)
+            row = existing.get(person_id)
+            if vectors is None:
+                if row is not None:
+                    db.delete(row)
+                continue
+            if row is None:
+                row = PersonPrototype(person_id=person_id)
+                db.add(row)
+            row.encoding_count = len(vectors)
+            row.centroid = _to_blob(vectors.mean(axis=0))
+            row.medoids = _to_blob(select_medoids(vectors))
+            row.pending_updates = 0
+            row.updated_at = now
+        if commit:
+            db.commit()
+        return len(vectors_by_person)
+    except Exception as e:
+        if commit:
+            db.rollback()
+        logger.error("Prototip yeniden hesaplama hatası: %s", e)
+        raise
+
+def add_to_prototypes(db: Session, vectors_by_person: dict, commit: bool = True):
+    """
+    Kişilere eklenen yeni encoding'leri prototiplerine artımlı olarak işler.
+    Prototipi olmayan ya da yeniden seçim zamanı gelen kişiler DB'deki tüm
+    encoding'lerinden (yeni eklenenler dahil) baştan hesaplanır.
+
+    Args:
+        vectors_by_person: kişi UUID'si -> yeni encoding vektörleri
+    """
+    try:
+        if not vectors_by_person:
+            return
+        existing = {
+            row.person_id: row
+            for row in db.query(PersonPrototype)
+            .filter(PersonPrototype.person_id.in_(list(vectors_by_person)))
+            .all()
+        }
+        rebuild = []
+        now = datetime.utcnow()
+        for person_id, vectors in vectors_by_person.items():
+            row = existing.get(person_id)
+            if row is None:
+                rebuild.append(person_id)
+                continue
+            centroid, count, medoids, pending, refresh = update_prototype(
+                _from_blob(row.centroid)[0],
+                row.encoding_count,
+                _from_blob(row.medoids),
+                row.pending_updates,
+                prepare_query(vectors)
+            )
+            if refresh:
+                rebuild.append(person_id)
+                continue
+            row.centroid = _to_blob(centroid)
+            row.encoding_count = count
+            row.medoids = _to_blob(medoids)
+            row.pending_updates = pending
+            row.updated_at = now
+        if rebuild:
+            db.flush()
+            rebuild_prototypes(db, rebuild, commit=False)
+        if commit:
+            db.commit()
+    except Exception as e:
+        if commit:
+            db.rollback()
+        logger.error("Prototip güncelleme hatası: %s", e)
+        raise
+
+def delete_prototypes(db: Session, person_ids: List[uuid.UUID], commit: bool = True):
+    """Kişilerin prototiplerini siler."""
+    try:
+        if person_ids:
+            db.query(PersonPrototype).filter(PersonPrototype.person_id.in_(person_ids)).delete(
+                synchronize_session=False
+            )
+        if commit:
+            db.commit()
+    except Exception as e:
+        if commit:
+            db.rollback()
+        logger.error("Prototip silme hatası: %s", e)
+        raise
+
+def backfill_prototypes(db: Session) -> int:
+    """Encoding'i olup prototipi olmayan kişilerin prototiplerini hesaplar."""
+    total = 0
+    while True:
+        missing = [
+            row.person_id
+            for row in db.query(Encoding.person_id)
+            .outerjoin(PersonPrototype, PersonPrototype.person_id == Encoding.person_id)
+            .filter(PersonPrototype.person_id == None)
+            .distinct()
+            .limit(BACKFILL_BATCH_SIZE)
+            .all()
+        ]
+        if not missing:
+            break
+        total += rebuild_prototypes(db, missing)
+    if total:
+        logger.info("%s kişi için prototip hesaplandı", total)
+    return total
+
+def load_prototypes(db: Session) -> dict:
+    """
+    Tüm prototipleri getirir.
+
+    Returns:
+        dict: kişi UUID'si -> (merkez, encoding sayısı, temsilciler, bekleyen güncelleme)
+    """
+    try:
+        return {
+            row.person_id: (
+                _from_blob(row.centroid)[0],
+                row.encoding_count,
+                _from_blob(row.medoids),
+                row.pending_updates
+            )
+            for row in db.query(PersonPrototype).all()
+        }
+    except Exception as e:
+        logger.error("Prototip yükleme hatası: %s", e)
+        raise
@@ -10,10 +10,10 @@ def get_all_users(db: Session):
     """Tüm aktif kullanıcıları getirir."""
     try:
         users = db.query(Person).filter(Person.is_active == True).all()
-        logger.info(f"Toplam {len(users)} aktif kullanıcı getirildi")
+        logger.info("Toplam %s aktif kullanıcı getirildi", len(users))
         return users
     except Exception as e:
-        logger.error(f"Kullanıcılar getirilirken hata oluştu: {str(e)}")
+        logger.error("Kullanıcılar getirilirken hata oluştu: %s", e)
         raise
 
 def get_user_by_id(db: Session, user_id: int):
@@ -21,12 +21,12 @@ def get_user_by_id(db: Session, user_id: int):
     try:
         user = db.query(Person).filter(Person.id == user_id, Person.is_active == True).first()
         if user:
-            logger.info(f"ID: {user_id} olan kullanıcı getirildi")
+            logger.info("ID: %s olan kullanıcı getirildi", user_id)
         else:
-            logger.warning(f"ID: {user_id} olan kullanıcı bulunamadı")
+            logger.warning("ID: %s olan kullanıcı bulunamadı", user_id)
         return user
     except Exception as e:
-        logger.error(f"Kullanıcı getirme hatası - ID {user_id}: {str(e)}")
+        logger.error("Kullanıcı getirme hatası - ID %s: %s", user_id, e)
         raise
 
 def get_user_by_uuid(db: Session, uuid_str: str):
@@ -34,10 +34,10 @@ def get_user_by_uuid(db: Session, uuid_str: str):
     try:
         user = db.query(Person).filter(Person.uuid == uuid_str, Person.is_active == True).first()
         if user:
-            logger.info(f"UUID: {uuid_str} olan kullanıcı getirildi")
+            logger.info("UUID: %s olan kullanıcı getirildi", uuid_str)
         return user
     except Exception as e:
-        logger.error(f"UUID ile kullanıcı getirme hatası: {str(e)}")
+        logger.error("UUID ile kullanıcı getirme hatası: %s", e)
         raise
 
 def create_user(db: Session, name: str, surname: str):
@@ -53,11 +53,28 @@ def create_user(db: Session, name: str, surname: str):
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
-        logger.info(f"Yeni kullanıcı oluşturuldu: {name} {surname}")
+        logger.info("Yeni kullanıcı oluşturuldu: %s %s", name, surname)
         return new_user
     except Exception as e:
         db.rollback()
-        logger.error(f"Kullanıcı oluşturma hatası: {str(e)}")
+        logger.error("Kullanıcı oluşturma hatası: %s", e)
+        raise
+
+def bulk_create_unknown_users(db: Session, user_uuids: list):
+    """
+    İsimsiz kullanıcıları verilen UUID'lerle tek INSERT ile ekler, commit etmez.
+    Çağıran taraf tek bir transaction içinde commit etmelidir.
+    """
+    try:
+        if user_uuids:
+            now = datetime.utcnow()
+            db.bulk_insert_mappings(Person, [
+                {"uuid": user_uuid, "is_active": True, "created_at": now}
+                for user_uuid in user_uuids
+            ])
+        return len(user_uuids)
+    except Exception as e:
+        logger.error("Toplu kullanıcı oluşturma hatası: %s", e)
         raise
 
 def update_user(db: Session, user_id: int, name: str = None, surname: str = None):
@@ -70,13 +87,13 @@ def update_user(db: Session, user_id: int, name: str = None, surname: str = None
             if surname:
                 user.surname = surname
             db.commit()
-            logger.info(f"Kullanıcı güncellendi - ID: {user_id}")
+            logger.info("Kullanıcı güncellendi - ID: %s", user_id)
             return user
-        logger.warning(f"Güncellenecek kullanıcı bulunamadı - ID: {user_id}")
+        logger.warning("Güncellenecek kullanıcı bulunamadı - ID: %s", user_id)
         return None
     except Exception as e:
         db.rollback()
-        logger.error(f"Kullanıcı güncelleme hatası - ID {user_id}: {str(e)}")
+        logger.error("Kullanıcı güncelleme hatası - ID %s: %s", user_id, e)
         raise
 
 def delete_user(db: Session, user_id: int):
@@ -86,13 +103,13 @@ def delete_user(db: Session, user_id: int):
         if user:
             user.is_active = False
             db.commit()
-            logger.info(f"Kullanıcı silindi - ID: {user_id}")
+            logger.info("Kullanıcı silindi - ID: %s", user_id)
             return True
-        logger.warning(f"Silinecek kullanıcı bulunamadı - ID: {user_id}")
+        logger.warning("Silinecek kullanıcı bulunamadı - ID: %s", user_id)
         return False
     except Exception as e:
         db.rollback()
-        logger.error(f"Kullanıcı silme hatası - ID {user_id}: {str(e)}")
+        logger.error("Kullanıcı silme hatası - ID %s: %s", user_id, e)
         raise
 
 def search_users(db: Session, search_term: str):
@@ -102,8 +119,8 @@ def search_users(db: Session, search_term: str):
             Person.is_active == True,
             (Person.name.ilike(f"%{search_term}%") | Person.surname.ilike(f"%{search_term}%"))
         ).all()
-        logger.info(f"'{search_term}' için {len(users)} kullanıcı bulundu")
+        logger.info("'%s' için %s kullanıcı bulundu", search_term, len(users))
         return users
     except Exception as e:
-        logger.error(f"Kullanıcı arama hatası: {str(e)}")
+        logger.error("Kullanıcı arama hatası: %s", e)
         raise
\ No newline at end of file
@@ -0,0 +1,336 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import numpy as np
+from sqlalchemy import func
+from app.models import Encoding
+from app.repository import encoding_service
+from app.config.logging import setup_logger
+from app.config.settings import settings
+from app.services.encoding_index import ENCODING_DIM, EncodingIndex
+
+try:
+    import hnswlib
+except ImportError:  # Opsiyonel bağımlılık, sadece MATCH_ENGINE=hnsw için gerekli
+    hnswlib = None
+
+try:
+    import fcntl
+except ImportError:  # POSIX dışında kayıtlar süreçler arası kilitlenmez
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+# DB'den indekse aktarımda kullanılan blok boyutu
+LOAD_BATCH_SIZE = 10000
+
+
+@contextmanager
+def _file_lock(path: str, exclusive: bool):
+    """Aynı indeks dosyasını kullanan süreçler arasında kaydetme/okuma kilidi."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a+b") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class HnswEncodingIndex:
+    """
+    HNSW grafı üzerinde yaklaşık en yakın komşu (ANN) encoding indeksi.
+
+    EncodingIndex ile aynı arayüzü sunar. Kurulan indeks diske kaydedilir;
+    açılışta diskten yüklenir ve sadece indekste olmayan Encoding satırları
+    (ID kümesi farkıyla bulunur) indekse eklenir.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.ANN_INDEX_PATH,
+        m: int = settings.HNSW_M,
+        ef_construction: int = settings.HNSW_EF_CONSTRUCTION,
+        ef_search: int = settings.HNSW_EF_SEARCH,
+        save_every: int = settings.ANN_SAVE_EVERY
+    ):
+        if hnswlib is None:
+            raise RuntimeError("MATCH_ENGINE=hnsw için hnswlib paketi kurulu olmalı")
+        self.path = path
+        self.meta_path = f"{path}.meta.npz"
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.save_every = save_every
+        self._lock = threading.RLock()
+        self._index = None
+        self._person_ids = []  # HNSW etiketi -> kişi UUID'si
+        self._encoding_ids = []  # HNSW etiketi -> encoding ID'si (bilinmiyorsa 0)
+        self._unsaved = 0
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return len(self._person_ids)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def _new_index(self, max_elements: int):
+        index = hnswlib.Index(space="l2", dim=ENCODING_DIM)
+        index.init_index(
+            max_elements=max(max_elements, 1024),
+            ef_construction=self.ef_construction,
+            M=self.m
+        )
+        return index
+
+    def _add_batch(self, encoding_ids, person_ids, vectors: np.ndarray):
+        """Bir grup encoding'i indekse ekler, gerekirse kapasiteyi büyütür."""
+        count = len(self._person_ids)
+        required = count + len(vectors)
+        if required > self._index.get_max_elements():
+            self._index.resize_index(max(self._index.get_max_elements() * 2, required))
+        labels = np.arange(count, required)
+        self._index.add_items(vectors.astype(np.float32), labels)
+        self._person_ids.extend(person_ids)
+        self._encoding_ids.extend(encoding_id or 0 for encoding_id in encoding_ids)
+
+    def _load_from_disk(self) -> bool:
+        with _file_lock(self.path, exclusive=False):
+            if not (os.path.exists(self.path) and os.path.exists(self.meta_path)):
+                return False
+            meta = np.load(self.meta_path)
+            if "encoding_ids" not in meta.files:
+                logger.warning("ANN indeks meta dosyası eski formatta, indeks yeniden kurulacak")
+                return False
+            if int(meta["m"]) != self.m or int(meta["ef_construction"]) != self.ef_construction:
+                logger.warning("ANN indeks parametreleri değişmiş, indeks yeniden kurulacak")
+                return False
+            person_ids = [uuid.UUID(bytes=raw.tobytes()) for raw in meta["person_ids"]]
+            index = hnswlib.Index(space="l2", dim=ENCODING_DIM)
+            index.load_index(self.path, max_elements=max(len(person_ids), 1024))
+        self._index = index
+        self._person_ids = person_ids
+        self._encoding_ids = meta["encoding_ids"].tolist()
+        logger.info(f"ANN indeksi diskten yüklendi: {len(person_ids)} kayıt")
+        return True
+
+    def load(self, db):
+        """İndeksi diskten yükler (yoksa DB'den kurar) ve eksik satırları ekler."""
+        with self._lock:
+            self._person_ids = []
+            self._encoding_ids = []
+            if not self._load_from_disk():
+                total = db.query(func.count(Encoding.id)).scalar() or 0
+                self._index = self._new_index(int(total * 1.2))
+
+            # Diskteki indekste olmayan satırları blok blok ekle. Diğer işçilerin
+            # eklediği ya da ID sırası dışında commit edilen satırlar da dahil.
+            missing = encoding_service.missing_encoding_ids(db, self._encoding_ids)
+            added = 0
+            for rows in encoding_service.iter_encoding_rows(db, missing, LOAD_BATCH_SIZE):
+                added += self._add_rows(rows)
+
+            self._index.set_ef(self.ef_search)
+            self._loaded = True
+            if added:
+                self.save()
+        logger.info(f"ANN indeksi hazır: {len(self)} kayıt ({added} yeni eklendi)")
+
+    def _add_rows(self, rows) -> int:
+        vectors = encoding_service.decode_vectors([row.encoding for row in rows])
+        self._add_batch([row.id for row in rows], [row.person_id for row in rows], vectors)
+        return len(rows)
+
+    def ensure_loaded(self, db):
+        """İndeks henüz yüklenmediyse yükler."""
+        if not self._loaded:
+            self.load(db)
+
+    def invalidate(self):
+        """İndeksi geçersiz kılar; bir sonraki kullanımda diskten/DB'den yeniden yüklenir."""
+        with self._lock:
+            self._loaded = False
+            self._index = None
+            self._person_ids = []
+            self._encoding_ids = []
+
+    def remap_persons(self, mapping: dict):
+        """Birleştirilen kişilerin etiketlerini yeni kişi UUID'sine taşır ve diske kaydeder."""
+        if not mapping:
+            return
+        with self._lock:
+            if not self._loaded:
+                # Diskteki indeks eski kişi UUID'lerini içeriyor, bir sonraki yüklemede yeniden kurulsun
+                for path in (self.path, self.meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return
+            self._person_ids = [mapping.get(pid, pid) for pid in self._person_ids]
+            self.save()
+
+    def add(self, person_id, encoding: np.ndarray, encoding_id: int = None):
+        """Yeni bir encoding'i indekse ekler; belirli aralıklarla diske kaydeder."""
+        vector = encoding_service.prepare_query(encoding)
+        with self._lock:
+            if not self._loaded:
+                return
+            self._add_batch([encoding_id], [person_id], vector)
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self.save()
+
+    def save(self):
+        """
+        İndeksi ve kişi eşlemesini atomik olarak diske yazar. Geçici dosyalar
+        süreçe özgüdür ve değiştirme kilit altında yapılır; aynı anda kaydeden
+        işçiler birbirinin dosyasını bozmaz.
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".hnsw-", suffix=".tmp")
+            os.close(fd)
+            fd, tmp_meta_path = tempfile.mkstemp(dir=directory, prefix=".hnsw-meta-", suffix=".tmp")
+            try:
+                self._index.save_index(tmp_path)
+                with os.fdopen(fd, "wb") as meta_file:
+                    np.savez(
+                        meta_file,
+                        person_ids=np.frombuffer(
+                            b"".join(pid.bytes for pid in self._person_ids), dtype=np.uint8
+                        ).reshape(-1, 16),
+                        encoding_ids=np.asarray(self._encoding_ids, dtype=np.int64),
+                        m=self.m,
+                        ef_construction=self.ef_construction
+                    )
+                with _file_lock(self.path, exclusive=True):
+                    os.replace(tmp_path, self.path)
+                    os.replace(tmp_meta_path, self.meta_path)
+            finally:
+                for path in (tmp_path, tmp_meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            self._unsaved = 0
+        logger.info(f"ANN indeksi kaydedildi: {self.path}")
+
+    def search(self, encodings, tolerance: float, k: int = 1) -> list[list[tuple]]:
+        """
+        Her sorgu encoding'i için tolerans altındaki yaklaşık en yakın k kaydı döner.
+
+        Returns:
+            list[list[tuple]]: Her sorgu için mesafeye göre sıralı (person_id, mesafe) listesi
+        """
+        queries = encoding_service.prepare_query(encodings)
+        results = [[] for _ in range(len(queries))]
+        with self._lock:
+            count = len(self._person_ids)
+            if count == 0 or len(queries) == 0:
+                return results
+            k = min(k, count)
+            self._index.set_ef(max(self.ef_search, k))
+            labels, sq_distances = self._index.knn_query(queries, k=k)
+            person_ids = self._person_ids
+
+        # hnswlib "l2" uzayı karesi alınmış mesafe döner
+        distances = np.sqrt(np.maximum(sq_distances, 0.0))
+        for q in range(len(queries)):
+            for distance, label in zip(distances[q], labels[q]):
+                if distance > tolerance:
+                    break
+                results[q].append((person_ids[label], float(distance)))
+        return results
+
+    def best_matches(self, encodings, tolerance: float) -> list:
+        """Her sorgu için tolerans altındaki en yakın (person_id, mesafe) çiftini, yoksa None döner."""
+        return [hits[0] if hits else None for hits in self.search(encodings, tolerance, k=1)]
+
+
+def verify_recall(db, sample_size: int = 1000, k: int = 10, noise: float = 0.02) -> dict:
+    """
+    ANN indeksini tam taramaya karşı doğrular.
+
+    Rastgele seçilen encoding'lere küçük gürültü eklenerek sorgu yapılır ve
+    recall@k, ilk eşleşme uyumu ve sorgu süreleri raporlanır.
+    """
+    exact = EncodingIndex()
+    exact.load(db)
+    ann = HnswEncodingIndex()
+    ann.load(db)
+
+    rows = db.query(Encoding.encoding).order_by(func.random()).limit(sample_size).all()
+    if not rows:
+        return {"samples": 0}
+    rng = np.random.default_rng(0)
+    queries = encoding_service.decode_vectors([row.encoding for row in rows])
+    queries = queries + rng.normal(0.0, noise, queries.shape)
+
+    start = time.perf_counter()
+    exact_hits = exact.search(queries, tolerance=float("inf"), k=k)
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ann_hits = ann.search(queries, tolerance=float("inf"), k=k)
+    ann_time = time.perf_counter() - start
+
+    found = 0
+    expected = 0
+    top1_agree = 0
+    tolerance = settings.FACE_MATCH_TOLERANCE
+    for exact_q, ann_q in zip(exact_hits, ann_hits):
+        # Mesafe tabanlı recall: ANN sonucu tam taramanın k. mesafesinden yakınsa bulunmuş sayılır
+        kth_distance = exact_q[-1][1] + 1e-6
+        expected += len(exact_q)
+        found += sum(1 for _, distance in ann_q if distance <= kth_distance)
+
+        exact_top = exact_q[0][0] if exact_q and exact_q[0][1] <= tolerance else None
+        ann_top = ann_q[0][0] if ann_q and ann_q[0][1] <= tolerance else None
+        top1_agree += int(exact_top == ann_top)
+
+    return {
+        "samples": len(queries),
+        "index_size": len(ann),
+        "k": k,
+        "ef_search": ann.ef_search,
+        "recall_at_k": found / expected if expected else 1.0,
+        "top1_match_agreement": top1_agree / len(queries),
+        "exact_ms_per_query": exact_time * 1000 / len(queries),
+        "ann_ms_per_query": ann_time * 1000 / len(queries)
+    }
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="HNSW encoding indeksi araçları")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="İndeksi DB'den baştan kurar ve diske kaydeder")
+    verify_parser = subparsers.add_parser("verify", help="Tam taramaya karşı recall ölçer")
+    verify_parser.add_argument("--sample", type=int, default=1000)
+    verify_parser.add_argument("--k", type=int, default=10)
+    verify_parser.add_argument("--noise", type=float, default=0.02)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "build":
+            for stale in (settings.ANN_INDEX_PATH, f"{settings.ANN_INDEX_PATH}.meta.npz"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            index = HnswEncodingIndex()
+            index.load(db)
+            index.save()
+        else:
+            print(json.dumps(verify_recall(db, args.sample, args.k, args.noise), indent=2))
+    finally:
+        db.close()
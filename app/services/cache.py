@@ -0,0 +1,205 @@
+import asyncio
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable
+from app.config.logging import setup_logger
+from app.config.settings import settings
+from app.services.metrics import CACHE_REQUESTS
+
+try:
+    import redis
+except ImportError:  # Opsiyonel bağımlılık, sadece CACHE_BACKEND=redis için gerekli
+    redis = None
+
+logger = setup_logger(__name__)
+
+_MISSING = object()
+
+
+class LocalBackend:
+    """Süreç içi TTL + LRU önbellek; paylaşımlı backend yokken onun yerine geçer."""
+
+    # Çağrılar bellek içinde ve kısa; event loop üzerinde doğrudan çalıştırılabilir
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(max_entries, 1)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def bump(self, key: str) -> int:
+        """Sürüm anahtarını öncekinden büyük, benzersiz bir değere taşır."""
+        with self._lock:
+            entry = self._data.get(key)
+            current = entry[1] if entry is not None else 0
+            version = max(current + 1, time.time_ns())
+            self._data[key] = (None, version)
+            self._data.move_to_end(key)
+            return version
+
+    def version(self, key: str) -> int:
+        value = self.get(key)
+        if value is _MISSING:
+            # LRU'dan düşen sürüm eski kayıtları geri getirmesin diye yeni bir değerle başlar
+            return self.bump(key)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Birden fazla süreç/sunucu arasında paylaşılan Redis önbelleği."""
+
+    # Sürüm anahtarları kayıtlardan uzun yaşar; düşerlerse yeni değerle başlanır
+    VERSION_TTL = 7 * 24 * 3600
+    # Senkron istemci ağ gidiş-dönüşü bekler; async yoldan thread'de çağrılmalı
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "pixid:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis için redis paketi kurulu olmalı")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str):
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return _MISSING
+        return pickle.loads(data)
+
+    def set(self, key: str, value, ttl: float = None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def bump(self, key: str) -> int:
+        pipe = self.client.pipeline()
+        pipe.incr(self.prefix + key)
+        pipe.expire(self.prefix + key, self.VERSION_TTL)
+        return int(pipe.execute()[0])
+
+    def version(self, key: str) -> int:
+        full_key = self.prefix + key
+        self.client.set(full_key, time.time_ns(), nx=True, ex=self.VERSION_TTL)
+        return int(self.client.get(full_key) or 0)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class ReadCache:
+    """
+    Kişi kayıtları, galeri sayfaları ve kişi eşleşmeleri için read-through önbellek.
+
+    Kayıtlar bir kapsama (ör. 'gallery', 'person:<uuid>') bağlı sürüm numarasıyla
+    anahtarlanır. Geçersiz kılma kapsamın sürümünü artırır; eski kayıtlar silinmez,
+    erişilemez hale gelir ve TTL/LRU ile düşer. Böylece yazma ile eşzamanlı bir
+    okuma, geçersiz kılınmış veriyi yeni sürümün altına yazamaz.
+    """
+
+    def __init__(self, backend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+    def _lookup(self, name: str, scope: str, suffix: str):
+        version = self.backend.version(f"ver:{scope}")
+        key = f"{name}:{scope}:{version}:{suffix}"
+        return key, self.backend.get(key)
+
+    async def _run(self, func, *args):
+        """Bloklayan backend (Redis) çağrılarını event loop'u tutmadan thread'de çalıştırır."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def get_or_load(self, name: str, scope: str, suffix: str, loader: Callable[[], Awaitable[Any]]):
+        """
+        Kayıt önbellekte varsa döner; yoksa loader ile yükleyip önbelleğe yazar.
+        Önbellek hatası okumayı bozmaz, doğrudan loader'a düşülür.
+
+        Args:
+            name: Metrik etiketi olarak da kullanılan önbellek adı (person, gallery, person_matches)
+            scope: Geçersiz kılma kapsamı
+            suffix: Kapsam içindeki kayıt (ör. sayfa cursor'ı)
+        """
+        if not self.enabled:
+            return await loader()
+        try:
+            key, value = await self._run(self._lookup, name, scope, suffix)
+        except Exception as e:
+            logger.error("Önbellek okuma hatası - %s: %s", name, e)
+            return await loader()
+        if value is not _MISSING:
+            CACHE_REQUESTS.labels(cache=name, result="hit").inc()
+            return value
+        CACHE_REQUESTS.labels(cache=name, result="miss").inc()
+        value = await loader()
+        try:
+            await self._run(self.backend.set, key, value, self.ttl)
+        except Exception as e:
+            logger.error("Önbellek yazma hatası - %s: %s", name, e)
+        return value
+
+    def invalidate(self, scopes: Iterable[str]):
+        """Verilen kapsamlardaki tüm kayıtları geçersiz kılar."""
+        if not self.enabled:
+            return
+        for scope in scopes:
+            try:
+                self.backend.bump(f"ver:{scope}")
+            except Exception as e:
+                logger.error("Önbellek geçersiz kılma hatası - %s: %s", scope, e)
+
+    def invalidate_persons(self, person_ids: Iterable, galleries: bool = True):
+        """Kişilerin kayıt ve eşleşme listelerini, istenirse galeri sayfalarını da geçersiz kılar."""
+        scopes = [person_scope(person_id) for person_id in set(person_ids)]
+        if galleries:
+            scopes.append(GALLERY_SCOPE)
+        self.invalidate(scopes)
+
+    async def invalidate_persons_async(self, person_ids: Iterable, galleries: bool = True):
+        """invalidate_persons'ın async yoldan çağrılabilen, event loop'u bloklamayan hali."""
+        await self._run(self.invalidate_persons, list(person_ids), galleries)
+
+
+GALLERY_SCOPE = "gallery"
+
+
+def person_scope(person_id) -> str:
+    return f"person:{str(person_id).lower()}"
+
+
+def _create_backend():
+    if settings.CACHE_BACKEND == "redis":
+        try:
+            return RedisBackend(settings.CACHE_REDIS_URL)
+        except Exception as e:
+            logger.error("Redis önbelleği kullanılamıyor, yerel önbelleğe geçildi: %s", e)
+    return LocalBackend(settings.CACHE_MAX_ENTRIES)
+
+
+read_cache = ReadCache(_create_backend(), settings.CACHE_TTL, enabled=settings.CACHE_ENABLED)
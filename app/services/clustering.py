@@ -0,0 +1,301 @@
+import argparse
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy import text
+from app.database import SessionLocal, engine
+from app.models import Person, Encoding
+from app.repository import encoding_service, merge_service
+from app.services.cache import read_cache
+from app.services.encoding_index import encoding_index
+from app.config.logging import setup_logger
+from app.config.settings import settings
+
+logger = setup_logger(__name__)
+
+# Birden fazla uvicorn işçisinde aynı anda tek kümeleme çalışsın (Postgres advisory lock anahtarı)
+CLUSTER_LOCK_KEY = 0x70697869
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+    def groups(self) -> list[set]:
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), set()).add(item)
+        return [members for members in groups.values() if len(members) > 1]
+
+
+@contextmanager
+def _cluster_lock(bind=engine):
+    """
+    Kümeleme kilidini alır; alınamazsa False verir. Advisory lock oturum düzeyinde
+    olduğu için ORM oturumunun havuza dönen bağlantısında değil, çalışma boyunca
+    tutulan ayrı bir bağlantıda alınır ve aynı bağlantıda bırakılır.
+    """
+    if bind.dialect.name != "postgresql":
+        yield True
+        return
+    # Autocommit: bağlantı çalışma boyunca "idle in transaction" kalmaz
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        locked = bool(conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": CLUSTER_LOCK_KEY}).scalar())
+        try:
+            yield locked
+        finally:
+            if locked:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": CLUSTER_LOCK_KEY})
+
+
+def run_clustering(db, auto_apply: bool = None) -> dict:
+    """
+    Son çalıştırmadan sonra eklenen (ya da o sırada henüz commit edilmemiş) isimsiz
+    kişi encoding'lerini bloklar halinde
+    indekste arar; CLUSTER_MERGE_DISTANCE altında kalan isimsiz kişileri aynı
+    kümeye bağlar (tek bağlantılı kümeleme). Her kümenin en eski kişisi hedef olur.
+    auto_apply açıksa kümeler birleştirilir, değilse birleştirme önerisi kaydedilir.
+
+    Returns:
+        dict: İşlenen encoding, bulunan küme ve birleştirilen/önerilen kişi sayıları
+    """
+    if auto_apply is None:
+        auto_apply = settings.CLUSTER_AUTO_APPLY
+    summary = {"encodings": 0, "clusters": 0, "merged": 0, "proposed": 0}
+
+    with _cluster_lock(db.get_bind()) as locked:
+        if not locked:
+            logger.info("Kümeleme başka bir süreçte çalışıyor, atlandı")
+            return summary
+        return _run_clustering(db, auto_apply, summary)
+
+
+def _unclustered_query(db):
+    return (
+        db.query(Encoding.id, Encoding.person_id, Encoding.encoding)
+        .join(Person, Person.uuid == Encoding.person_id)
+        .filter(Person.name == None)
+        .filter(Person.is_active == True)
+        .order_by(Encoding.id)
+    )
+
+
+def _link_rows(db, rows, union_find: _UnionFind, distances: dict):
+    """Satırları indekste arar; eşik altındaki aktif isimsiz komşu kişileri aynı kümeye bağlar."""
+    vectors = encoding_service.decode_vectors([row.encoding for row in rows])
+    hits = encoding_index.search(
+        vectors, settings.CLUSTER_MERGE_DISTANCE, k=settings.CLUSTER_NEIGHBORS
+    )
+
+    # Komşular arasından sadece aktif isimsiz kişiler birleştirilebilir
+    candidates = {person_id for row_hits in hits for person_id, _ in row_hits}
+    unnamed = {
+        row.uuid
+        for row in db.query(Person.uuid)
+        .filter(Person.uuid.in_(candidates))
+        .filter(Person.name == None)
+        .filter(Person.is_active == True)
+        .all()
+    } if candidates else set()
+
+    for row, row_hits in zip(rows, hits):
+        for person_id, distance in row_hits:
+            if person_id == row.person_id or person_id not in unnamed:
+                continue
+            union_find.union(row.person_id, person_id)
+            key = frozenset((row.person_id, person_id))
+            distances[key] = min(distance, distances.get(key, distance))
+
+
+def _record_gaps(db, gaps: dict, start_id: int, last_id: int):
+    """
+    Eşiğin (start_id, last_id] aralığında atladığı ID'leri boşluk olarak ekler.
+    Paralel ingest transaction'ları ID sırasıyla commit etmez; küçük ID'li bir satır
+    eşik geçildikten sonra görünebilir. Boşluklar sonraki çalıştırmalarda yeniden
+    aranır, CLUSTER_GAP_TTL dolunca (geri alınmış ya da silinmiş satır) bırakılır.
+    """
+    now = time.time()
+    present = {
+        row.id
+        for row in db.query(Encoding.id)
+        .filter(Encoding.id > start_id, Encoding.id <= last_id)
+        .all()
+    }
+    for encoding_id in range(start_id + 1, last_id + 1):
+        if encoding_id not in present:
+            gaps.setdefault(encoding_id, now)
+
+
+def _run_clustering(db, auto_apply: bool, summary: dict) -> dict:
+    try:
+        encoding_index.ensure_loaded(db)
+        last_id = merge_service.get_last_clustered_encoding_id(db)
+        gaps = merge_service.get_clustering_gaps(db)
+        union_find = _UnionFind()
+        distances = {}
+
+        # Önceki çalıştırmalarda eşiğin geride bıraktığı, sonradan commit edilen satırlar
+        gap_ids = sorted(gaps)
+        for start in range(0, len(gap_ids), settings.CLUSTER_CHUNK_SIZE):
+            chunk = gap_ids[start:start + settings.CLUSTER_CHUNK_SIZE]
+            for row in db.query(Encoding.id).filter(Encoding.id.in_(chunk)).all():
+                gaps.pop(row.id, None)
+            rows = _unclustered_query(db).filter(Encoding.id.in_(chunk)).all()
+            if rows:
+                _link_rows(db, rows, union_find, distances)
+                summary["encodings"] += len(rows)
+
+        while True:
+            rows = (
+                _unclustered_query(db)
+                .filter(Encoding.id > last_id)
+                .limit(settings.CLUSTER_CHUNK_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            _link_rows(db, rows, union_find, distances)
+            summary["encodings"] += len(rows)
+            _record_gaps(db, gaps, last_id, rows[-1].id)
+            last_id = rows[-1].id
+
+        now = time.time()
+        gaps = {
+            encoding_id: seen_at
+            for encoding_id, seen_at in gaps.items()
+            if now - seen_at < settings.CLUSTER_GAP_TTL
+        }
+
+        groups = union_find.groups()
+        summary["clusters"] = len(groups)
+        if groups:
+            involved = set().union(*groups)
+            person_order = dict(
+                db.query(Person.uuid, Person.id).filter(Person.uuid.in_(involved)).all()
+            )
+            mapping = {}
+            proposals = []
+            for members in groups:
+                target = min(members, key=lambda pid: person_order.get(pid, 0))
+                sources = [pid for pid in members if pid != target]
+                for source in sources:
+                    mapping[source] = target
+                    proposals.append({
+                        "source_person_id": source,
+                        "target_person_id": target,
+                        "distance": min(
+                            (d for key, d in distances.items() if source in key),
+                            default=settings.CLUSTER_MERGE_DISTANCE
+                        )
+                    })
+                if auto_apply:
+                    summary["merged"] += merge_service.merge_persons(db, target, sources, commit=False)
+
+            if not auto_apply:
+                summary["proposed"] = merge_service.create_merge_proposals(db, proposals, commit=False)
+            merge_service.set_last_clustered_encoding_id(db, last_id, gaps, commit=False)
+            db.commit()
+            if auto_apply:
+                encoding_index.remap_persons(mapping)
+                read_cache.invalidate_persons([*mapping, *mapping.values()])
+        else:
+            merge_service.set_last_clustered_encoding_id(db, last_id, gaps)
+
+        logger.info(f"Kümeleme tamamlandı: {summary}")
+        return summary
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Kümeleme hatası: {str(e)}")
+        raise
+
+
+def apply_proposal(db, proposal_id: int) -> bool:
+    """Bekleyen bir birleştirme önerisini uygular; kişiler hâlâ isimsiz ve aktif olmalıdır."""
+    proposal = merge_service.get_proposal_by_id(db, proposal_id)
+    if proposal is None or proposal.status != "pending":
+        return False
+    valid = (
+        db.query(Person)
+        .filter(Person.uuid.in_([proposal.source_person_id, proposal.target_person_id]))
+        .filter(Person.name == None)
+        .filter(Person.is_active == True)
+        .count()
+    ) == 2
+    if not valid:
+        # Öneriden sonra isimlendirilen ya da silinen kişi birleştirmeyle kaybolmasın
+        merge_service.set_proposal_status(db, proposal_id, "rejected")
+        return False
+    source, target = proposal.source_person_id, proposal.target_person_id
+    merge_service.merge_persons(db, target, [source], commit=False)
+    merge_service.set_proposal_status(db, proposal_id, "applied", commit=False)
+    db.commit()
+    encoding_index.remap_persons({source: target})
+    read_cache.invalidate_persons([source, target])
+    return True
+
+
+class ClusteringScheduler:
+    """Kümelemeyi belirli aralıklarla arka planda çalıştırır."""
+
+    def __init__(self, interval: float = settings.CLUSTER_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Kümeleme zamanlayıcısı başlatıldı: {self.interval} sn")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @staticmethod
+    def _run_once():
+        db = SessionLocal()
+        try:
+            run_clustering(db)
+        finally:
+            db.close()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self._run_once)
+            except Exception as e:
+                logger.error(f"Arka plan kümeleme hatası: {str(e)}")
+
+
+clustering_scheduler = ClusteringScheduler()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="İsimsiz kişileri kümeler")
+    parser.add_argument("--apply", action="store_true", help="Önermek yerine doğrudan birleştir")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(run_clustering(db, auto_apply=args.apply or None), indent=2))
+    finally:
+        db.close()
@@ -0,0 +1,180 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.config.logging import setup_logger
+from app.config.settings import settings
+from app.services.metrics import COMPUTE_IN_FLIGHT
+
+logger = setup_logger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_search_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker():
+    """
+    İşçi süreç açılırken dlib modellerini yükler ve bir kez ısıtır.
+    forkserver ile modeller zaten yüklü ve ısınmış gelir; bu çağrı ucuzdur.
+    """
+    from app.services.detection import warm_up
+
+    warm_up()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _analyze_image_data(
+    data: bytes,
+    filename,
+    face_folder: str,
+    original_path: str,
+    profile_name: str = None,
+    encoding_profile: str = None,
+    encode: bool = True
+) -> dict:
+    """İşçi süreçte çalışır: bellekteki resmi analiz eder ve sıkıştırılmış halini diske yazar."""
+    from app.services.detection import analyze_image_data
+
+    options = {"original_path": original_path, "encoding_profile": encoding_profile, "encode": encode}
+    if profile_name:
+        from app.services import profiling
+
+        with profiling.profile(f"{profile_name}-compute"):
+            return analyze_image_data(data, filename, face_folder, **options)
+    return analyze_image_data(data, filename, face_folder, **options)
+
+
+def _encode_chips(chips: list, encoding_profile: str = None) -> list:
+    """İşçi süreçte çalışır: farklı resimlerden toplanan yüz kırpımlarını tek seferde encode eder."""
+    from app.services.detection import encode_chips
+
+    return encode_chips(chips, encoding_profile)
+
+
+def _encode_query_image(data: bytes, encoding_profile: str = None, max_faces: int = None) -> dict:
+    """İşçi süreçte çalışır: arama sorgusunun yüzlerini diske yazmadan encode eder."""
+    from app.services.detection import encode_query_image
+
+    return encode_query_image(data, encoding_profile, max_faces)
+
+
+def pool_size() -> int:
+    """Hesaplama havuzunun işçi sayısı (COMPUTE_WORKERS=0 ise çekirdek sayısı)."""
+    return settings.COMPUTE_WORKERS or os.cpu_count() or 1
+
+
+def _mp_context():
+    """İşçi başlatma yöntemi; forkserver'da modeller fork öncesi bir kez yüklenir."""
+    method = settings.COMPUTE_START_METHOD
+    if method not in multiprocessing.get_all_start_methods():
+        logger.warning("%s başlatma yöntemi desteklenmiyor, spawn kullanılacak", method)
+        method = "spawn"
+    context = multiprocessing.get_context(method)
+    if method == "forkserver":
+        context.set_forkserver_preload(["app.services.model_preload"])
+    return context
+
+
+def _create_executor(workers: int, name: str) -> ProcessPoolExecutor:
+    context = _mp_context()
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker
+    )
+    logger.info("%s başlatıldı: %s işçi (%s)", name, workers, context.get_start_method())
+    return executor
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Çekirdek sayısına göre boyutlandırılmış hesaplama havuzunu döner (ilk çağrıda oluşturur)."""
+    global _executor
+    if _executor is None:
+        _executor = _create_executor(pool_size(), "Hesaplama havuzu")
+    return _executor
+
+
+def get_search_executor() -> ProcessPoolExecutor:
+    """
+    Arama sorgularının havuzunu döner. SEARCH_COMPUTE_WORKERS > 0 ise ayrı bir
+    havuzdur; ingest işleri bu işçileri meşgul edemez, kuyruk arkasında bekleyen
+    arama süre bütçesini boşa harcamaz.
+    """
+    global _search_executor
+    if settings.SEARCH_COMPUTE_WORKERS <= 0:
+        return get_executor()
+    if _search_executor is None:
+        _search_executor = _create_executor(settings.SEARCH_COMPUTE_WORKERS, "Arama havuzu")
+    return _search_executor
+
+
+async def prewarm() -> int:
+    """
+    Havuzdaki tüm işçileri ilk istekten önce başlatır; her işçi başlarken
+    modelleri ısıtır. Başlayan işçi sayısını döner.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    pings = [loop.run_in_executor(executor, _ping) for _ in range(pool_size())]
+    search_executor = get_search_executor()
+    if search_executor is not executor:
+        pings += [loop.run_in_executor(search_executor, _ping) for _ in range(settings.SEARCH_COMPUTE_WORKERS)]
+    pids = await asyncio.gather(*pings)
+    return len(set(pids))
+
+
+async def analyze_image_data(
+    data: bytes,
+    filename,
+    face_folder: str,
+    original_path: str,
+    profile_name: str = None,
+    encoding_profile: str = None,
+    encode: bool = True
+) -> dict:
+    """
+    Bellekteki resmin analizini event loop'u bloklamadan hesaplama havuzunda çalıştırır.
+    profile_name verilirse işçi süreçteki analiz de profillenir.
+    """
+    loop = asyncio.get_running_loop()
+    with COMPUTE_IN_FLIGHT.track_inprogress():
+        return await loop.run_in_executor(
+            get_executor(), _analyze_image_data, data, filename, face_folder, original_path,
+            profile_name, encoding_profile, encode
+        )
+
+
+async def encode_chips(chips: list, encoding_profile: str = None) -> list:
+    """Hizalanmış yüz kırpımlarını hesaplama havuzunda toplu olarak encode eder."""
+    loop = asyncio.get_running_loop()
+    with COMPUTE_IN_FLIGHT.track_inprogress():
+        return await loop.run_in_executor(get_executor(), _encode_chips, chips, encoding_profile)
+
+
+async def encode_query_image(data: bytes, encoding_profile: str = None, max_faces: int = None) -> dict:
+    """
+    Arama sorgusu resmini arama havuzunda analiz eder; hiçbir dosya yazılmaz.
+    Çağıranın süre sınırı sadece beklemeyi keser: işçiye gönderilmiş iş iptal
+    edilemez ve tamamlanana kadar işçiyi tutar (SEARCH_MAX_FACES bu süreyi sınırlar).
+    """
+    loop = asyncio.get_running_loop()
+    with COMPUTE_IN_FLIGHT.track_inprogress():
+        return await loop.run_in_executor(
+            get_search_executor(), _encode_query_image, data, encoding_profile, max_faces
+        )
+
+
+def shutdown():
+    """Hesaplama ve arama havuzlarını kapatır."""
+    global _executor, _search_executor
+    if _search_executor is not None:
+        _search_executor.shutdown(wait=True, cancel_futures=True)
+        _search_executor = None
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        logger.info("Hesaplama havuzu kapatıldı")
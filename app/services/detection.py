@@ -0,0 +1,297 @@
+import os
+import time
+import cv2
+import numpy as np
+from app.config.logging import setup_logger
+from app.config.settings import settings
+from app.services.image_service import decode_image, write_jpeg_async, write_thumbnails_async
+
+logger = setup_logger(__name__)
+
+# dlib HOG dedektörünün upsample olmadan yakalayabildiği yaklaşık en küçük yüz (piksel)
+DETECTOR_MIN_FACE = 80
+# Küçültmenin gerçekten devreye girdiğini doğrulamak için referans çözünürlük (12 MP)
+REFERENCE_SHAPE = (3000, 4000)
+
+# dlib ResNet'in beklediği hizalanmış yüz kırpımı (face_recognition ile aynı değerler)
+CHIP_SIZE = 150
+CHIP_PADDING = 0.25
+
+# Encoding profilleri: landmark modeli ve jitter sayısı (1 = jitter yok)
+ENCODING_PROFILES = {
+    "fast": {"landmarks": "small", "num_jitters": 1},
+    "accurate": {"landmarks": "large", "num_jitters": settings.ENCODING_ACCURATE_JITTERS},
+}
+
+
+def _face_api():
+    """
+    face_recognition import edilirken dlib modellerini yükler (~100 MB, ~1 sn).
+    Ana süreç bu maliyeti ödememeli; modeller sadece hesaplama işçilerinde
+    (ya da forkserver'da bir kez) yüklenir.
+    """
+    from face_recognition import api
+
+    return api
+
+
+def warm_up():
+    """Tespit, landmark ve encoding modellerini boş girdilerle bir kez çalıştırır."""
+    import dlib
+
+    face_api = _face_api()
+    blank = np.zeros((CHIP_SIZE, CHIP_SIZE, 3), dtype=np.uint8)
+    face_api.face_locations(blank)
+    rect = dlib.rectangle(0, 0, CHIP_SIZE - 1, CHIP_SIZE - 1)
+    face_api.pose_predictor_5_point(blank, rect)
+    face_api.pose_predictor_68_point(blank, rect)
+    face_api.face_encoder.compute_face_descriptor(blank)
+    check_detection_scale()
+
+
+def check_detection_scale() -> float:
+    """
+    12 MP bir resmin tespitte küçültülüp küçültülmediğini kontrol eder; ayarlar
+    (FACE_MIN_SIZE, DETECTION_UPSAMPLE, DETECTION_MAX_SIDE) küçültmeyi engelliyorsa uyarır.
+    """
+    scale = _detection_scale(*REFERENCE_SHAPE, settings.DETECTION_UPSAMPLE)
+    if scale >= 1.0:
+        logger.warning(
+            "Tespit ayarları büyük resimleri küçültmüyor (FACE_MIN_SIZE=%s, DETECTION_UPSAMPLE=%s); "
+            "12 MP resimler tam çözünürlükte taranacak",
+            settings.FACE_MIN_SIZE, settings.DETECTION_UPSAMPLE
+        )
+    return scale
+
+
+def resolve_profile(name: str = None) -> str:
+    """Geçerli profil adını döner; boşsa ENCODING_PROFILE kullanılır."""
+    name = name or settings.ENCODING_PROFILE
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"Bilinmeyen encoding profili: {name}")
+    return name
+
+
+def face_chips(image: np.ndarray, face_locations: list, profile: str = None) -> list[np.ndarray]:
+    """Yüz kutuları için landmark'ları bulur ve encoding'e hazır hizalanmış kırpımları döner."""
+    if not face_locations:
+        return []
+    import dlib
+
+    landmarks = _face_api()._raw_face_landmarks(
+        image, face_locations, model=ENCODING_PROFILES[resolve_profile(profile)]["landmarks"]
+    )
+    return [
+        dlib.get_face_chip(image, shape, size=CHIP_SIZE, padding=CHIP_PADDING)
+        for shape in landmarks
+    ]
+
+
+def encode_chips(chips: list, profile: str = None) -> list[np.ndarray]:
+    """
+    Hizalanmış yüz kırpımlarının encoding'lerini tek bir ResNet çağrısıyla hesaplar.
+    Kırpımlar farklı resimlerden gelebilir; sonuç sırası girişle aynıdır.
+    """
+    if not len(chips):
+        return []
+    num_jitters = ENCODING_PROFILES[resolve_profile(profile)]["num_jitters"]
+    descriptors = _face_api().face_encoder.compute_face_descriptor(list(chips), num_jitters)
+    return [np.array(descriptor) for descriptor in descriptors]
+
+
+def _detection_scale(height: int, width: int, upsample: int) -> float:
+    """
+    Tespitin yapılacağı küçültme oranını hesaplar. Oran, FACE_MIN_SIZE boyutundaki
+    bir yüzün küçültülmüş kopyada hâlâ tespit edilebileceği değerin altına inmez.
+
+    Varsayılanlarla (upsample 1, FACE_MIN_SIZE 100) 4000x3000 bir resim 0.4 oranında
+    küçültülür; FACE_MIN_SIZE düşürüldükçe küçük yüzler yakalanır ama küçültme azalır.
+    """
+    scale = min(1.0, settings.DETECTION_MAX_SIDE / max(height, width))
+    detectable = DETECTOR_MIN_FACE / (2 ** upsample)
+    min_scale = min(1.0, detectable / max(settings.FACE_MIN_SIZE, 1))
+    return max(scale, min_scale)
+
+
+def locate_faces(
+    image: np.ndarray,
+    model: str = None,
+    upsample: int = None
+) -> list[tuple]:
+    """
+    Yüzleri küçültülmüş kopya üzerinde tespit eder ve kutuları tam çözünürlüğe taşır.
+
+    Returns:
+        list[tuple]: Tam çözünürlükte (top, right, bottom, left) kutuları
+    """
+    model = model or settings.DETECTION_MODEL
+    upsample = settings.DETECTION_UPSAMPLE if upsample is None else upsample
+    height, width = image.shape[:2]
+    scale = _detection_scale(height, width, upsample)
+
+    if scale < 1.0:
+        small = cv2.resize(
+            image,
+            (max(1, int(width * scale)), max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+    else:
+        small = image
+
+    locations = _face_api().face_locations(
+        small, number_of_times_to_upsample=upsample, model=model
+    )
+
+    face_locations = []
+    for top, right, bottom, left in locations:
+        top = max(0, int(round(top / scale)))
+        right = min(width, int(round(right / scale)))
+        bottom = min(height, int(round(bottom / scale)))
+        left = max(0, int(round(left / scale)))
+        # Sadece küçültülmüş kopyada tespit sınırında kalan kutular güvenilmez; küçültülmeyen
+        # resimlerde (küçük ya da grup fotoğrafları) FACE_MIN_SIZE altındaki yüzler de tutulur
+        if scale < 1.0 and min(bottom - top, right - left) < settings.FACE_MIN_SIZE:
+            continue
+        face_locations.append((top, right, bottom, left))
+    return face_locations
+
+
+def analyze_image_data(
+    data: bytes,
+    filename,
+    face_folder: str,
+    original_path: str = None,
+    encoding_profile: str = None,
+    encode: bool = True
+) -> dict:
+    """
+    Resmi bir kez çözer; tespit, encoding, kırpma, küçük resimler ve sıkıştırılmış
+    orijinalin yazılması aynı bellek tamponu üzerinden yapılır. Disk yazmaları arka
+    planda yürür ve fonksiyon dönmeden önce tamamlanır.
+    Veritabanına dokunmaz; hesaplama havuzundaki işçi süreçlerde de çalışabilir.
+
+    Args:
+        data: Yüklenen dosyanın baytları
+        filename: Görüntü UUID'si (yüz dosya adlarında kullanılır)
+        face_folder: Yüz görüntülerinin kaydedileceği klasör
+        original_path: Verilirse sıkıştırılmış orijinal bu yola yazılır
+        encoding_profile: 'fast' / 'accurate' (boşsa ENCODING_PROFILE)
+        encode: False ise encoding hesaplanmaz, yüzlerde hizalanmış 'chip' döner
+            (birden fazla resmin yüzleri sonra encode_chips ile toplu encode edilir)
+
+    Returns:
+        dict: 'faces' (her yüz için 'location', 'encoding' ya da 'chip', 'face_path' ve 'thumbnails'),
+              'thumbnails' (orijinalin küçük resimleri; boyut adı -> dosya adı) ve
+              'timings' (metrikler için (aşama, saniye) çiftleri)
+    """
+    timings = []
+    start = time.perf_counter()
+    bgr_image = decode_image(data)
+    timings.append(("decode", time.perf_counter() - start))
+    original_write = write_jpeg_async(original_path, bgr_image) if original_path else None
+    original_thumbnails = write_thumbnails_async(bgr_image) if original_path else {}
+
+    image = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB)
+    start = time.perf_counter()
+    face_locations = locate_faces(image)
+    timings.append(("face_locations", time.perf_counter() - start))
+
+    # Kırpılan yüzler encoding hesaplanırken arka planda yazılır
+    faces = []
+    face_writes = []
+    for idx, (top, right, bottom, left) in enumerate(face_locations):
+        face_path = os.path.join(face_folder, f"face_{filename}_{idx}.jpg")
+        face_image = bgr_image[top:bottom, left:right]
+        face_writes.append(write_jpeg_async(face_path, face_image, quality=95))
+        faces.append({
+            'location': (top, right, bottom, left),
+            'face_path': face_path,
+            'thumbnails': write_thumbnails_async(face_image)
+        })
+
+    start = time.perf_counter()
+    chips = face_chips(image, face_locations, encoding_profile)
+    timings.append(("face_landmarks", time.perf_counter() - start))
+    if encode:
+        start = time.perf_counter()
+        face_encodings = encode_chips(chips, encoding_profile)
+        timings.append(("face_encodings", time.perf_counter() - start))
+        for face, encoding in zip(faces, face_encodings):
+            face['encoding'] = encoding
+    else:
+        for face, chip in zip(faces, chips):
+            face['chip'] = chip
+
+    for idx, (face, write) in enumerate(zip(faces, face_writes)):
+        try:
+            timings.extend(write.result())
+            logger.info(f"Yüz görüntüsü kaydedildi: {face['face_path']}")
+        except Exception as face_error:
+            logger.error(f"Yüz kaydetme hatası - idx {idx}: {str(face_error)}")
+            face['face_path'] = None
+        face['thumbnails'] = _collect_thumbnails(face['thumbnails'])
+
+    if original_write is not None:
+        timings.extend(original_write.result())
+    return {
+        'faces': faces,
+        'thumbnails': _collect_thumbnails(original_thumbnails),
+        'timings': timings
+    }
+
+
+def encode_query_image(data: bytes, encoding_profile: str = None, max_faces: int = None) -> dict:
+    """
+    Arama sorgusu için resmi çözer, yüzleri bulur ve encode eder. Diske hiçbir şey
+    yazmaz (orijinal, yüz kırpımı ya da küçük resim yok).
+
+    Args:
+        max_faces: Verilirse sadece en büyük bu kadar yüz encode edilir
+
+    Returns:
+        dict: 'faces' (her yüz için 'location' ve 'encoding') ve 'timings'
+    """
+    timings = []
+    start = time.perf_counter()
+    image = cv2.cvtColor(decode_image(data), cv2.COLOR_BGR2RGB)
+    timings.append(("decode", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    face_locations = locate_faces(image)
+    timings.append(("face_locations", time.perf_counter() - start))
+    if max_faces and len(face_locations) > max_faces:
+        face_locations = sorted(
+            face_locations,
+            key=lambda box: (box[2] - box[0]) * (box[1] - box[3]),
+            reverse=True
+        )[:max_faces]
+
+    start = time.perf_counter()
+    encodings = encode_chips(face_chips(image, face_locations, encoding_profile), encoding_profile)
+    timings.append(("face_encodings", time.perf_counter() - start))
+    return {
+        'faces': [
+            {'location': location, 'encoding': encoding}
+            for location, encoding in zip(face_locations, encodings)
+        ],
+        'timings': timings
+    }
+
+
+def _collect_thumbnails(pending: dict) -> dict:
+    """Küçük resim yazma işlerini bekler; başarısız olanlar None olarak döner."""
+    thumbnails = {}
+    for size_name, write in pending.items():
+        try:
+            thumbnails[size_name] = write.result()
+        except Exception as thumb_error:
+            logger.error(f"Küçük resim hatası - {size_name}: {str(thumb_error)}")
+            thumbnails[size_name] = None
+    return thumbnails
+
+
+def extract_faces(image_path: str, filename, face_folder: str) -> list[dict]:
+    """Diskteki resmi okuyup analyze_image_data ile yüzlerini çıkarır (orijinali değiştirmez)."""
+    with open(image_path, "rb") as f:
+        data = f.read()
+    return analyze_image_data(data, filename, face_folder)['faces']
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Optional
+from app.services import compute_pool, metrics
+from app.config.logging import setup_logger
+from app.config.settings import settings
+
+logger = setup_logger(__name__)
+
+
+class EncodingBatcher:
+    """
+    Aynı anda işlenen resimlerin yüz kırpımlarını toplayıp tek bir encoding
+    çağrısında hesaplatır.
+
+    Her profil için ayrı bekleyen grup tutulur. Grup ENCODING_BATCH_SIZE
+    kırpıma ulaştığında ya da ilk isteğin üzerinden ENCODING_BATCH_WAIT
+    saniye geçtiğinde hesaplama havuzuna gönderilir.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.ENCODING_BATCH_SIZE,
+        max_wait: float = settings.ENCODING_BATCH_WAIT
+    ):
+        self.batch_size = max(batch_size, 1)
+        self.max_wait = max_wait
+        # profil -> (kırpımlar, [(future, başlangıç, adet)], zamanlayıcı)
+        self._pending: dict = {}
+        # Çalışan toplu çağrılar; event loop görevlere sadece zayıf referans tutar
+        self._tasks: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.batch_size > 1
+
+    async def encode(self, chips: list, encoding_profile: str) -> list:
+        """Kırpımları bir sonraki toplu çağrıya ekler ve kendi encoding'lerini döner."""
+        if not chips:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = self._pending.get(encoding_profile)
+        if group is None:
+            timer = loop.call_later(self.max_wait, self._flush, encoding_profile)
+            group = ([], [], timer)
+            self._pending[encoding_profile] = group
+        batch, waiters, _ = group
+        waiters.append((future, len(batch), len(chips)))
+        batch.extend(chips)
+        if len(batch) >= self.batch_size:
+            self._flush(encoding_profile)
+        return await future
+
+    def _flush(self, encoding_profile: str):
+        group = self._pending.pop(encoding_profile, None)
+        if group is None:
+            return
+        batch, waiters, timer = group
+        timer.cancel()
+        task = asyncio.ensure_future(self._run(batch, waiters, encoding_profile))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(batch: list, waiters: list, encoding_profile: Optional[str]):
+        start = time.perf_counter()
+        try:
+            encodings = await compute_pool.encode_chips(batch, encoding_profile)
+        except Exception as e:
+            logger.error("Toplu encoding hatası - %s kırpım: %s", len(batch), e)
+            for future, _, _ in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        metrics.INGEST_STAGE_SECONDS.labels(stage="face_encodings").observe(time.perf_counter() - start)
+        metrics.ENCODING_BATCH_FACES.observe(len(batch))
+        for future, offset, count in waiters:
+            if not future.done():
+                future.set_result(encodings[offset:offset + count])
+
+
+encoding_batcher = EncodingBatcher()
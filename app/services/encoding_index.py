@@ -0,0 +1,218 @@
+import threading
+import numpy as np
+from typing import Optional
+from app.repository import encoding_service
+from app.config.logging import setup_logger
+from app.config.settings import settings
+
+logger = setup_logger(__name__)
+
+ENCODING_DIM = 128
+# Mesafe hesabı bu kadar satırlık bloklar halinde yapılır (bellek tepe noktasını sınırlar)
+SEARCH_CHUNK_SIZE = 65536
+
+
+def nearest(queries: np.ndarray, matrix: np.ndarray, sq_norms: np.ndarray, k: int):
+    """
+    Sorguların matristeki en yakın k satırını blok blok tam tarama ile bulur.
+
+    Returns:
+        tuple: Mesafeye göre sıralı (mesafeler, satır indeksleri); ikisi de (sorgu, k) boyutunda
+    """
+    size = len(matrix)
+    k = min(k, size)
+    if k == 0 or len(queries) == 0:
+        return np.empty((len(queries), 0), dtype=np.float32), np.empty((len(queries), 0), dtype=np.int64)
+
+    query_sq = np.einsum("ij,ij->i", queries, queries)[:, None]
+    best_dist = np.empty((len(queries), 0), dtype=np.float32)
+    best_idx = np.empty((len(queries), 0), dtype=np.int64)
+
+    for start in range(0, size, SEARCH_CHUNK_SIZE):
+        stop = min(start + SEARCH_CHUNK_SIZE, size)
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab
+        dist = query_sq + sq_norms[start:stop][None, :] - 2.0 * (queries @ matrix[start:stop].T)
+        chunk_k = min(k, stop - start)
+        if chunk_k < stop - start:
+            idx = np.argpartition(dist, chunk_k - 1, axis=1)[:, :chunk_k]
+        else:
+            idx = np.broadcast_to(np.arange(stop - start), dist.shape)
+        best_dist = np.concatenate([best_dist, np.take_along_axis(dist, idx, axis=1)], axis=1)
+        best_idx = np.concatenate([best_idx, idx + start], axis=1)
+        if best_dist.shape[1] > k:
+            keep = np.argpartition(best_dist, k - 1, axis=1)[:, :k]
+            best_dist = np.take_along_axis(best_dist, keep, axis=1)
+            best_idx = np.take_along_axis(best_idx, keep, axis=1)
+
+    best_dist = np.sqrt(np.maximum(best_dist, 0.0))
+    order = np.argsort(best_dist, axis=1)
+    return np.take_along_axis(best_dist, order, axis=1), np.take_along_axis(best_idx, order, axis=1)
+
+
+class EncodingIndex:
+    """
+    Süreç genelinde tutulan bellek içi encoding indeksi.
+
+    Tüm encoding'ler tek bir bitişik NumPy matrisinde, kişi UUID'leri ise
+    paralel bir dizide tutulur. Bir resimdeki bütün yüzler tek bir toplu
+    mesafe hesabıyla eşleştirilir.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.RLock()
+        # Yüklemeleri sıralar; DB okuması sırasında _lock tutulmaz, arama ve ekleme sürer
+        self._load_lock = threading.Lock()
+        self._capacity = initial_capacity
+        self._matrix = np.empty((initial_capacity, ENCODING_DIM), dtype=np.float32)
+        self._sq_norms = np.empty(initial_capacity, dtype=np.float32)
+        self._person_ids = np.empty(initial_capacity, dtype=object)
+        self._size = 0
+        self._loaded = False
+        self._loading = False
+        # Yükleme sürerken gelen eklemeler: (encoding_id, person_id, vektör)
+        self._pending = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def _reserve(self, extra: int):
+        """Kapasiteyi gerekirse ikiye katlayarak büyütür."""
+        required = self._size + extra
+        if required <= self._capacity:
+            return
+        capacity = max(self._capacity * 2, required)
+        matrix = np.empty((capacity, ENCODING_DIM), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        person_ids = np.empty(capacity, dtype=object)
+        matrix[:self._size] = self._matrix[:self._size]
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        person_ids[:self._size] = self._person_ids[:self._size]
+        self._matrix, self._sq_norms, self._person_ids = matrix, sq_norms, person_ids
+        self._capacity = capacity
+
+    def load(self, db):
+        """Tüm encoding'leri veritabanından okuyup indeksi baştan kurar."""
+        with self._load_lock:
+            self._load(db)
+
+    def _load(self, db):
+        with self._lock:
+            self._loading = True
+            self._pending = []
+        try:
+            encoding_ids, person_ids, matrix = encoding_service.load_encoding_matrix(db)
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._pending = []
+            raise
+        with self._lock:
+            self._size = 0
+            self._reserve(len(matrix))
+            self._matrix[:len(matrix)] = matrix
+            self._person_ids[:len(matrix)] = person_ids
+            self._size = len(matrix)
+            self._sq_norms[:self._size] = np.einsum(
+                "ij,ij->i", self._matrix[:self._size], self._matrix[:self._size]
+            )
+            # Okuma sırasında commit edilip anlık görüntüye girmemiş olabilecek eklemeler
+            loaded_ids = set(encoding_ids.tolist())
+            for encoding_id, person_id, vector in self._pending:
+                if encoding_id is None or encoding_id not in loaded_ids:
+                    self._append(person_id, vector)
+            self._pending = []
+            self._loading = False
+            self._loaded = True
+        logger.info(f"Encoding indeksi yüklendi: {self._size} kayıt")
+
+    def ensure_loaded(self, db):
+        """İndeks henüz yüklenmediyse yükler; eşzamanlı çağrılarda yükleme bir kez yapılır."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load(db)
+
+    def invalidate(self):
+        """İndeksi geçersiz kılar; bir sonraki kullanımda yeniden yüklenir."""
+        with self._lock:
+            self._loaded = False
+            self._size = 0
+
+    def remap_persons(self, mapping: dict):
+        """Birleştirilen kişilerin encoding'lerini yeni kişi UUID'sine taşır."""
+        if not mapping:
+            return
+        with self._lock:
+            person_ids = self._person_ids[:self._size]
+            for i, person_id in enumerate(person_ids):
+                if person_id in mapping:
+                    person_ids[i] = mapping[person_id]
+
+    def add(self, person_id, encoding: np.ndarray, encoding_id: int = None):
+        """Yeni bir encoding'i indekse ekler."""
+        vector = encoding_service.prepare_query(encoding)[0]
+        with self._lock:
+            if self._loading:
+                # Yüklemenin okuduğu anlık görüntü bu satırı içermeyebilir; yükleme bitince uygulanır
+                self._pending.append((encoding_id, person_id, vector))
+            if not self._loaded:
+                # Yüklenmemiş indekse ekleme yapılmaz, yükleme zaten DB'den okuyacak
+                return
+            self._append(person_id, vector)
+
+    def _append(self, person_id, vector: np.ndarray):
+        self._reserve(1)
+        self._matrix[self._size] = vector
+        self._sq_norms[self._size] = vector @ vector
+        self._person_ids[self._size] = person_id
+        self._size += 1
+
+    def search(self, encodings, tolerance: float, k: int = 1) -> list[list[tuple]]:
+        """
+        Her sorgu encoding'i için tolerans altındaki en yakın k kaydı döner.
+
+        Returns:
+            list[list[tuple]]: Her sorgu için mesafeye göre sıralı (person_id, mesafe) listesi
+        """
+        queries = encoding_service.prepare_query(encodings)
+        results = [[] for _ in range(len(queries))]
+
+        with self._lock:
+            size = self._size
+            matrix = self._matrix[:size]
+            sq_norms = self._sq_norms[:size]
+            person_ids = self._person_ids[:size]
+
+        best_dist, best_idx = nearest(queries, matrix, sq_norms, k)
+        for q in range(len(queries)):
+            for distance, row in zip(best_dist[q], best_idx[q]):
+                if distance > tolerance:
+                    break
+                results[q].append((person_ids[row], float(distance)))
+        return results
+
+    def best_matches(self, encodings, tolerance: float) -> list[Optional[tuple]]:
+        """Her sorgu için tolerans altındaki en yakın (person_id, mesafe) çiftini, yoksa None döner."""
+        return [hits[0] if hits else None for hits in self.search(encodings, tolerance, k=1)]
+
+
+def create_encoding_index():
+    """Ayarlardaki MATCH_ENGINE değerine göre eşleştirme indeksini oluşturur."""
+    if settings.MATCH_ENGINE == "hnsw":
+        from app.services.ann_index import HnswEncodingIndex
+        return HnswEncodingIndex()
+    if settings.MATCH_ENGINE == "shared":
+        from app.services.shared_index import SharedEncodingIndex
+        return SharedEncodingIndex()
+    if settings.MATCH_ENGINE == "prototype":
+        from app.services.prototype_index import PrototypeEncodingIndex
+        return PrototypeEncodingIndex()
+    return EncodingIndex()
+
+
+encoding_index = create_encoding_index()
@@ -0,0 +1,56 @@
+import argparse
+from sqlalchemy import func
+from app.models import Encoding
+from app.repository import encoding_service
+from app.config.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def migrate_encodings(db, batch_size: int = 5000, normalize: bool = None) -> int:
+    """
+    Eski formattaki (başlıksız float64) encoding satırlarını v1 float32 formatına
+    yeniden yazar. ID sırasıyla bloklar halinde ilerler ve her bloğu ayrı commit eder;
+    yarıda kesilirse kaldığı yerden devam edilebilir.
+
+    Returns:
+        int: Dönüştürülen satır sayısı
+    """
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Encoding.id, Encoding.encoding)
+            .filter(Encoding.id > last_id)
+            .filter(func.length(Encoding.encoding) == encoding_service.LEGACY_ENCODING_SIZE)
+            .order_by(Encoding.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        vectors = encoding_service.decode_vectors([row.encoding for row in rows], normalize=False)
+        db.bulk_update_mappings(Encoding, [
+            {"id": row.id, "encoding": encoding_service.encode_vector(vector, normalize=normalize)}
+            for row, vector in zip(rows, vectors)
+        ])
+        db.commit()
+        migrated += len(rows)
+        last_id = rows[-1].id
+        logger.info(f"{migrated} encoding dönüştürüldü (son ID: {last_id})")
+    return migrated
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Encoding'leri float32 v1 formatına dönüştürür")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = migrate_encodings(db, args.batch_size)
+        print(f"{count} encoding dönüştürüldü")
+    finally:
+        db.close()
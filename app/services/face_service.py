@@ -1,14 +1,29 @@
+import asyncio
 import shutil
-import face_recognition
 import os
 import uuid
+from datetime import datetime
+from typing import Optional
 from app.models import Person, Encoding, Match, Image
 import numpy as np
 import cv2
-from app.repository import user_service, image_service, encoding_service, match_service
+from app.repository import user_service, image_service, encoding_service, match_service, prototype_service
+from app.repository.aio import (
+    encoding_service as aio_encoding_service,
+    match_service as aio_match_service,
+    user_service as aio_user_service
+)
 from app.config.logging import setup_logger
 from app.config.settings import settings
-from app.services.image_service import compress_jpeg
+from app.database import SessionLocal
+from app.services.encoding_index import encoding_index
+from app.services.detection import extract_faces, resolve_profile
+from app.services.encoding_batcher import encoding_batcher
+from app.services import compute_pool, metrics
+from app.services.cache import GALLERY_SCOPE, person_scope, read_cache
+from app.services.image_service import compute_image_hashes
+from app.services.upload_stream import MAGIC_LENGTH, UploadRejected, detect_format
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 import aiofiles
 
@@ -19,25 +34,194 @@ FACE_FOLDER = settings.FACE_FOLDER
 
 os.makedirs(FACE_FOLDER, exist_ok=True)
 os.makedirs(IMAGE_FOLDER, exist_ok=True)
+os.makedirs(settings.THUMBNAIL_FOLDER, exist_ok=True)
+
+# Bir kişinin birden fazla encoding'i ilk k içinde yer kaplayabildiği için
+# aramada k'nın bu katı kadar encoding alınıp kişi bazında tekilleştirilir
+SEARCH_OVERFETCH = 4
 
 async def process_uploaded_image(file, db):
     """Yüklenen resmi işler ve yüz tespiti yapar."""
+    file_location = await save_upload(file)
+    await process_saved_image(file_location, db)
+    
+    return "Success"
+
+async def save_upload(file) -> str:
+    """
+    Yüklenen dosyayı UPLOAD_CHUNK_SIZE'lık bloklar halinde benzersiz isimle
+    diske kaydeder ve yolunu döner. Dosya tamamen belleğe alınmaz.
+
+    Raises:
+        UploadRejected: Dosya imzası desteklenmiyorsa (415) ya da boyut sınırı aşıldıysa (413)
+    """
+    # Boyutu önceden bilinen dosyalar okunmadan reddedilir
+    if file.size is not None and file.size > settings.UPLOAD_MAX_FILE_BYTES:
+        raise UploadRejected(413, "Dosya boyutu sınırı aşıldı")
+
+    head = await file.read(MAGIC_LENGTH)
+    if detect_format(head) is None:
+        raise UploadRejected(415, "Desteklenmeyen dosya formatı")
+
     filename = uuid.uuid4()
     file_location = f"{IMAGE_FOLDER}/{filename}.jpg"
+    size = len(head)
+    try:
+        # Resmi asenkron olarak kaydet
+        with metrics.time_stage("file_write"):
+            async with aiofiles.open(file_location, "wb") as buffer:
+                await buffer.write(head)
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > settings.UPLOAD_MAX_FILE_BYTES:
+                        raise UploadRejected(413, "Dosya boyutu sınırı aşıldı")
+                    await buffer.write(chunk)
+    except Exception:
+        if os.path.exists(file_location):
+            os.remove(file_location)
+        raise
     
-    # Resmi asenkron olarak kaydet
-    async with aiofiles.open(file_location, "wb") as buffer:
-        content = await file.read()
-        await buffer.write(content)
-
-    compress_jpeg(file_location, file_location)
-    image_id = image_service.create_image(db, file_location).uuid 
-    detect_faces(file_location, image_id, db)
+    return file_location
+
+async def read_query_image(file) -> bytes:
+    """
+    Arama sorgusu resmini boyut ve imza kontrolüyle belleğe okur; diske yazmaz.
+
+    Raises:
+        UploadRejected: Dosya imzası desteklenmiyorsa (415) ya da boyut sınırı aşıldıysa (413)
+    """
+    if file.size is not None and file.size > settings.UPLOAD_MAX_FILE_BYTES:
+        raise UploadRejected(413, "Dosya boyutu sınırı aşıldı")
+
+    data = await file.read(MAGIC_LENGTH)
+    if detect_format(data) is None:
+        raise UploadRejected(415, "Desteklenmeyen dosya formatı")
+    chunks = [data]
+    size = len(data)
+    while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > settings.UPLOAD_MAX_FILE_BYTES:
+            raise UploadRejected(413, "Dosya boyutu sınırı aşıldı")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+async def process_saved_image(
+    file_location: str,
+    db,
+    profile_name: str = None,
+    encoding_profile: str = None
+):
+    """
+    Diskteki resim için görüntü kaydı oluşturur, yüzleri tespit eder ve eşleştirir.
+    profile_name verilirse hesaplama havuzundaki analiz de bu adla profillenir.
     
-    return "Success"
+    Returns:
+        tuple: (görüntü UUID'si, tespit edilen yüzler listesi)
+    """
+    async with aiofiles.open(file_location, "rb") as f:
+        data = await f.read()
+    return await process_image_data(
+        data, file_location, db, profile_name=profile_name, encoding_profile=encoding_profile
+    )
+
+async def process_image_data(
+    data: bytes,
+    file_location: str,
+    db,
+    profile_name: str = None,
+    encoding_profile: str = None
+):
+    """
+    Bellekteki resmi işler. Resim daha önce yüklendiyse (birebir ya da algısal
+    olarak aynı) tespit yapılmaz, mevcut görüntünün sonuçları kullanılır.
+    Aksi halde sıkıştırılmış hali file_location'a yazılır ve yüzler eşleştirilir.
+    Toplu encoding açıksa yüzler, eşzamanlı işlenen diğer resimlerin yüzleriyle
+    birlikte tek çağrıda encode edilir.
+    
+    Returns:
+        tuple: (görüntü UUID'si, tespit edilen yüzler listesi)
+    """
+    # Senkron DB ve indeks adımları thread'de çalışır; event loop (HTTP, /health,
+    # /faces/search) ingest sırasında bloklanmaz
+    image_hashes = None
+    if settings.DEDUP_ENABLED:
+        image_hashes = await asyncio.to_thread(compute_image_hashes, data)
+        duplicate = await asyncio.to_thread(_duplicate_result, db, image_hashes, file_location)
+        if duplicate is not None:
+            metrics.IMAGES_PROCESSED.labels(result="duplicate").inc()
+            return duplicate
+    
+    image_id = uuid.uuid4()
+    # Analiz süresince DB bağlantısı tutulmaz; paralel işlenen dosyalar havuzu tüketmez
+    await asyncio.to_thread(db.rollback)
+    # Sıkıştırma, tespit ve encoding işlemleri event loop dışında, hesaplama havuzunda
+    encoding_profile = resolve_profile(encoding_profile)
+    batched = encoding_batcher.enabled
+    try:
+        analysis = await compute_pool.analyze_image_data(
+            data, image_id, FACE_FOLDER, file_location, profile_name=profile_name,
+            encoding_profile=encoding_profile, encode=not batched
+        )
+        if batched:
+            faces = analysis['faces']
+            encodings = await encoding_batcher.encode([face.pop('chip') for face in faces], encoding_profile)
+            for face, encoding in zip(faces, encodings):
+                face['encoding'] = encoding
+    except Exception:
+        metrics.IMAGES_PROCESSED.labels(result="failed").inc()
+        raise
+    metrics.observe_timings(analysis.get('timings'))
+    # Görüntü, kişi, encoding ve eşleşme kayıtları tek transaction içinde yazılır
+    detected_faces = await asyncio.to_thread(
+        persist_faces,
+        analysis['faces'],
+        image_id,
+        db,
+        image_path=file_location,
+        image_hashes=image_hashes,
+        image_thumbnails=analysis['thumbnails']
+    )
+    metrics.IMAGES_PROCESSED.labels(result="analyzed").inc()
+    
+    return image_id, detected_faces
+
+def _duplicate_result(db, image_hashes: tuple, file_location: str) -> Optional[tuple]:
+    """Görüntü daha önce yüklendiyse yeni dosyayı siler ve mevcut görüntünün sonuçlarını döner."""
+    duplicate = find_duplicate_image(db, *image_hashes)
+    if duplicate is None:
+        return None
+    # Tekrar yüklenen dosya saklanmaz
+    if duplicate.file_path != file_location and os.path.exists(file_location):
+        os.remove(file_location)
+    matches = match_service.get_matches_by_image(db, duplicate.uuid)
+    return duplicate.uuid, [
+        {
+            'person_id': str(match.person_id),
+            'confidence_score': match.confidence_score,
+            'is_new': False
+        }
+        for match in matches
+    ]
+
+def find_duplicate_image(db, sha256: str, phash: int):
+    """Önce birebir (SHA-256), sonra algısal hash ile daha önce yüklenmiş görüntüyü arar."""
+    image = image_service.get_image_by_sha256(db, sha256)
+    if image:
+        logger.info(f"Birebir aynı görüntü daha önce yüklenmiş: {image.uuid}")
+        return image
+    if settings.DEDUP_PHASH_THRESHOLD >= 0:
+        similar = image_service.find_similar_image(db, phash, settings.DEDUP_PHASH_THRESHOLD)
+        if similar:
+            image, distance = similar
+            logger.info(f"Benzer görüntü daha önce yüklenmiş: {image.uuid} (fark: {distance} bit)")
+            return image
+    return None
 
 # fotodaki yuzleri tesbit edip taniyip tanimadigini kontrol eder / performans problemi olabilir.
 def label_faces_in_image(image_path, filename, db):
+    # Ağır modeller sadece bu yardımcı çağrılırsa ana süreçte yüklenir
+    import face_recognition
+
     # Görüntüyü yükle
     image = face_recognition.load_image_file(image_path)
     face_locations = face_recognition.face_locations(image)
@@ -70,77 +254,93 @@ def detect_faces(image_path: str, filename: str, db) -> list[dict]:
        - Varsa: matching tablosuna kayıt atar
        - Yoksa: person -> encoding -> matching kayıtlarını oluşturur
     """
+    logger.info(f"Yüz tespiti başlatıldı: {image_path}")
+    faces = extract_faces(image_path, filename, FACE_FOLDER)
+    return persist_faces(faces, filename, db)
+
+
+def persist_faces(
+    faces: list[dict],
+    filename: str,
+    db,
+    image_path: str = None,
+    image_hashes: tuple = None,
+    image_thumbnails: dict = None
+) -> list[dict]:
+    """
+    Tespit edilmiş yüzleri (konum, encoding, yüz yolu) indeksle eşleştirir ve
+    person -> encoding -> matching kayıtlarını tek bir transaction içinde toplu olarak yazar.
+    
+    Args:
+        faces: extract_faces çıktısı
+        filename: Görüntü UUID'si
+        db: Veritabanı oturumu
+        image_path: Verilirse görüntü kaydı da aynı transaction içinde oluşturulur
+        image_hashes: Görüntü kaydına yazılacak (sha256, phash) (opsiyonel)
+        image_thumbnails: Görüntünün küçük resim dosya adları (opsiyonel)
+    """
     try:
-        logger.info(f"Yüz tespiti başlatıldı: {image_path}")
+        # Tüm yüzleri tek seferde indeksteki encodinglerle karşılaştır
+        encoding_index.ensure_loaded(db)
+        with metrics.time_stage("matching"):
+            best_matches = encoding_index.best_matches(
+                [face['encoding'] for face in faces], settings.FACE_MATCH_TOLERANCE
+            )
         
-        # Görüntüyü yükle ve yüzleri tespit et
-        image = face_recognition.load_image_file(image_path)
-        face_locations = face_recognition.face_locations(image)
-        face_encodings = face_recognition.face_encodings(image, face_locations)
+        if image_path is not None:
+            sha256, phash = image_hashes or (None, None)
+            image_service.create_image(
+                db,
+                image_path,
+                image_uuid=filename,
+                commit=False,
+                sha256=sha256,
+                phash=phash,
+                thumbnails=image_thumbnails
+            )
         
+        now = datetime.utcnow()
         detected_faces = []
+        new_person_ids = []
+        new_encodings = []
+        new_matches = []
         
-        # Her yüz için işlem yap
-        for idx, (encoding, face_location) in enumerate(zip(face_encodings, face_locations)):
+        # Her yüz için yazılacak satırları topla
+        for idx, (face, best_match) in enumerate(zip(faces, best_matches)):
             try:
-                # 1. Yüz görüntüsünü locale kaydet
-                top, right, bottom, left = face_location
-                face_image = image[top:bottom, left:right]
-                face_filename = f"face_{filename}_{idx}.jpg"
-                face_path = os.path.join(FACE_FOLDER, face_filename)
-                cv2.imwrite(face_path, cv2.cvtColor(face_image, cv2.COLOR_RGB2BGR))
-                logger.info(f"Yüz görüntüsü kaydedildi: {face_path}")
+                top, right, bottom, left = face['location']
+                face_path = face['face_path']
+                if face_path is None:
+                    raise ValueError("Yüz görüntüsü kaydedilemedi")
                 
-                # 2. Encoding'i bytes'a çevir
-                encoding_bytes = encoding.tobytes()
+                # İndeksteki en yakın eşleşmeyi kullan
+                found_match = best_match is not None
                 
-                # 3. DB'deki encodinglerle karşılaştır
-                known_encodings = db.query(Encoding).all()
-                found_match = False
-                
-                for known_encoding in known_encodings:
-                    known_face = np.frombuffer(known_encoding.encoding, dtype=np.float64)
-                    # Karşılaştırma yap
-                    if face_recognition.compare_faces([known_face], encoding)[0]:
-                        # Eşleşme bulundu
-                        confidence_score = int((1 - face_recognition.face_distance([known_face], encoding)[0]) * 100)
-                        
-                        # Matching tablosuna kaydet
-                        match_service.create_match(
-                            db=db,
-                            person_id=known_encoding.person_id,
-                            matched_image_id=filename,
-                            confidence_score=confidence_score
-                        )
-                        found_match = True
-                        logger.info(f"Eşleşme bulundu - Confidence: {confidence_score}%")
-                        break
+                if found_match:
+                    person_id, distance = best_match
+                    confidence_score = int((1 - distance) * 100)
+                    logger.info(f"Eşleşme bulundu - Confidence: {confidence_score}%")
+                else:
+                    # Eşleşme yoksa yeni person ve encoding kaydı
+                    person_id = uuid.uuid4()
+                    confidence_score = 100  # İlk kayıt olduğu için 100
+                    new_person_ids.append(person_id)
+                    thumbnails = face.get('thumbnails') or {}
+                    new_encodings.append({
+                        'uuid': uuid.uuid4(),
+                        'person_id': person_id,
+                        'face_path': face_path,
+                        'thumb_small': thumbnails.get('small'),
+                        'thumb_medium': thumbnails.get('medium'),
+                        'encoding': face['encoding']
+                    })
                 
-                # 4. Eşleşme bulunamadıysa yeni kayıtlar oluştur
-                if not found_match:
-                    # Önce person kaydı oluştur
-                    new_person = Person(uuid=uuid.uuid4(), is_active=True)
-                    db.add(new_person)
-                    db.flush()  # ID'yi al
-                    
-                    # Sonra encoding kaydı oluştur
-                    new_encoding = Encoding(
-                        uuid=uuid.uuid4(),
-                        person_id=new_person.uuid,
-                        face_path=face_path,
-                        encoding=encoding_bytes
-                    )
-                    db.add(new_encoding)
-                    
-                    # Son olarak matching kaydı oluştur
-                    match_service.create_match(
-                        db=db,
-                        person_id=new_person.uuid,
-                        matched_image_id=filename,
-                        confidence_score=100  # İlk kayıt olduğu için 100
-                    )
-                    
-                    logger.info("Yeni yüz kaydedildi ve ilişkiler oluşturuldu")
+                new_matches.append({
+                    'person_id': person_id,
+                    'matched_image_id': filename,
+                    'confidence_score': confidence_score,
+                    'created_at': now
+                })
                 
                 detected_faces.append({
                     'face_path': face_path,
@@ -152,103 +352,369 @@ def detect_faces(image_path: str, filename: str, db) -> list[dict]:
                 logger.error(f"Yüz işleme hatası - idx {idx}: {str(face_error)}")
                 continue
         
-        db.commit()
-        logger.info(f"Toplam {len(detected_faces)} yüz işlendi")
+        # Tek transaction: person -> encoding -> matching (FK sırasıyla)
+        user_service.bulk_create_unknown_users(db, new_person_ids)
+        encoding_service.bulk_create_encodings(db, [
+            {**row, 'encoding': encoding_service.encode_vector(row['encoding'])} for row in new_encodings
+        ])
+        match_service.bulk_create_matches(db, new_matches)
+        vectors_by_person = {}
+        for row in new_encodings:
+            vectors_by_person.setdefault(row['person_id'], []).append(row['encoding'])
+        prototype_service.add_to_prototypes(db, vectors_by_person, commit=False)
+        with metrics.time_stage("db_commit"):
+            db.commit()
+        # Eşleşen ve yeni oluşan kişilerin sayfaları ile galeriler değişti
+        if new_matches:
+            read_cache.invalidate_persons(match['person_id'] for match in new_matches)
+        metrics.FACES_DETECTED.inc(len(faces))
+        metrics.FACE_MATCHES.labels(result="new").inc(len(new_person_ids))
+        metrics.FACE_MATCHES.labels(result="matched").inc(len(new_matches) - len(new_person_ids))
+        
+        # Kalıcı hale gelen yeni encodingleri indekse ekle
+        if new_encodings:
+            encoding_ids = encoding_service.get_encoding_ids_by_uuids(
+                db, [row['uuid'] for row in new_encodings]
+            )
+            for row in new_encodings:
+                encoding_index.add(
+                    row['person_id'], row['encoding'], encoding_id=encoding_ids.get(row['uuid'])
+                )
+        
+        logger.info(
+            f"Toplam {len(detected_faces)} yüz işlendi "
+            f"({len(new_person_ids)} yeni kişi, {len(new_matches)} eşleşme)"
+        )
         return detected_faces
         
     except Exception as e:
         db.rollback()
+        # DB ile indeks ayrışmış olabilir, bir sonraki çağrıda yeniden yüklensin
+        encoding_index.invalidate()
         logger.error(f"Yüz tespiti genel hatası: {str(e)}")
         raise
 
 
-def get_unknown_faces(db) -> list[dict]:
-    """Tanınmayan kişileri ve yüz resimlerini getirir."""
+def ensure_index_loaded():
+    """Eşleştirme indeksi yüklenmediyse kendi oturumuyla yükler (thread içinde çağrılır)."""
+    if encoding_index.is_loaded:
+        return
+    db = SessionLocal()
     try:
-        # İsmi olmayan aktif kişileri ve encoding'lerini getir
-        unknown_faces = (
-            db.query(Person, Encoding, Match)
-            .join(Encoding, Person.uuid == Encoding.person_id)
-            .join(Match, Person.uuid == Match.person_id)
-            .filter(Person.name == None)
-            .filter(Person.is_active == True)
-            .order_by(Person.uuid, Match.created_at.desc())  # Önce uuid sonra tarih
-            .distinct(Person.uuid)  # Her kişi için en son eşleşme
+        encoding_index.ensure_loaded(db)
+    finally:
+        db.close()
+
+
+async def search_faces(
+    data: bytes,
+    db,
+    k: int = settings.SEARCH_TOP_K,
+    tolerance: float = None,
+    encoding_profile: str = None
+) -> list[dict]:
+    """
+    Sorgu resmindeki her yüz için en yakın k kişiyi mesafeleriyle döner.
+    Salt okunurdur: görüntü, kişi, encoding ya da eşleşme kaydı oluşturmaz,
+    diske dosya yazmaz ve indekse ekleme yapmaz.
+
+    Args:
+        data: Sorgu resminin baytları
+        db: AsyncSession (aday kişiler tek sorguda okunur)
+        k: Yüz başına döndürülecek en fazla aday kişi
+        tolerance: Bu mesafenin üstündeki adaylar atlanır (boşsa FACE_MATCH_TOLERANCE)
+        encoding_profile: 'fast' / 'accurate' (boşsa ENCODING_PROFILE)
+
+    Returns:
+        list[dict]: Her yüz için 'location' ve mesafeye göre sıralı 'candidates'
+    """
+    tolerance = settings.FACE_MATCH_TOLERANCE if tolerance is None else tolerance
+    analysis = await compute_pool.encode_query_image(
+        data, resolve_profile(encoding_profile), settings.SEARCH_MAX_FACES
+    )
+    faces = analysis['faces']
+    if not faces:
+        return []
+
+    hits = await asyncio.to_thread(
+        encoding_index.search,
+        [face['encoding'] for face in faces],
+        tolerance,
+        k * SEARCH_OVERFETCH
+    )
+
+    # Tüm yüzlerin aday kişileri tek IN sorgusuyla okunur; silinmiş ya da pasif kişiler gelmez
+    person_ids = list({person_id for face_hits in hits for person_id, _ in face_hits})
+    persons = {
+        str(person.uuid): person
+        for person in await aio_user_service.get_users_by_uuids(db, person_ids)
+    }
+    results = []
+    for face, face_hits in zip(faces, hits):
+        candidates = []
+        seen = set()
+        for person_id, distance in face_hits:
+            if person_id in seen:
+                continue
+            seen.add(person_id)
+            person = persons.get(str(person_id))
+            if person is None:
+                continue
+            candidates.append({
+                'person_id': str(person.uuid),
+                'name': person.name,
+                'surname': person.surname,
+                'distance': round(distance, 4),
+                'confidence_score': int((1 - distance) * 100)
+            })
+            if len(candidates) >= k:
+                break
+        top, right, bottom, left = face['location']
+        results.append({
+            'location': {'top': top, 'right': right, 'bottom': bottom, 'left': left},
+            'candidates': candidates
+        })
+    return results
+
+
+def thumbnail_url(thumbnail: str, fallback_path: str) -> str:
+    """Küçük resim varsa içerik özetli /thumbs URL'ini, yoksa orijinal statik yolu döner."""
+    if thumbnail:
+        return f"/thumbs/{thumbnail}"
+    return f"/{fallback_path[4:]}"
+
+
+def _gallery_page(db, filters: list, cursor: int = None, limit: int = None):
+    """
+    Aktif ve en az bir yüzü olan kişileri Person.id üzerinden keyset sayfalamayla getirir.
+    Temsilci yüz (kişinin ilk encoding'i) ve son eşleşme, sadece sayfadaki kişiler için
+    iki küçük sorguyla alınır; Person x Encoding x Match çarpımı oluşturulmaz.
+    
+    Returns:
+        tuple: (kişiler, {person_id: yüz URL'i}, {person_id: Match}, sonraki cursor)
+    """
+    limit = min(max(limit or settings.GALLERY_PAGE_SIZE, 1), settings.GALLERY_MAX_PAGE_SIZE)
+    
+    query = (
+        db.query(Person)
+        .filter(Person.is_active == True)
+        .filter(*filters)
+        .filter(exists().where(Encoding.person_id == Person.uuid))
+    )
+    if cursor is not None:
+        query = query.filter(Person.id < cursor)
+    persons = query.order_by(Person.id.desc()).limit(limit + 1).all()
+    
+    has_more = len(persons) > limit
+    persons = persons[:limit]
+    person_ids = [person.uuid for person in persons]
+    if not person_ids:
+        return [], {}, {}, None
+    
+    first_encodings = (
+        db.query(func.min(Encoding.id))
+        .filter(Encoding.person_id.in_(person_ids))
+        .group_by(Encoding.person_id)
+    )
+    face_urls = {
+        row.person_id: thumbnail_url(row.thumb_small, row.face_path)
+        for row in (
+            db.query(Encoding.person_id, Encoding.face_path, Encoding.thumb_small)
+            .filter(Encoding.id.in_(first_encodings))
             .all()
         )
+    }
+    
+    last_matches = (
+        db.query(func.max(Match.id))
+        .filter(Match.person_id.in_(person_ids))
+        .group_by(Match.person_id)
+    )
+    matches = {
+        match.person_id: match
+        for match in db.query(Match).filter(Match.id.in_(last_matches)).all()
+    }
+    
+    next_cursor = persons[-1].id if has_more else None
+    return persons, face_urls, matches, next_cursor
 
-        logger.info(f"Tanınmayan yüzler: {len(unknown_faces)} kişi bulundu")
 
-        result = []
-        for person, encoding, match in unknown_faces:
-            try:
-                # Dosyanın varlığını kontrol et
-                if os.path.exists(encoding.face_path):
-                    result.append({
-                        'person_id': str(person.uuid),
-                        'face_path': encoding.face_path[4:],
-                        'detected_at': match.created_at,
-                        'confidence_score': match.confidence_score
-                    })
-                else:
-                    logger.warning(f"Dosya bulunamadı: {encoding.face_path} - Kişi: {person.uuid}")
+async def _gallery_page_async(db, filters: list, cursor: int = None, limit: int = None):
+    """_gallery_page'in AsyncSession ile çalışan karşılığı; sorgular aynıdır."""
+    limit = min(max(limit or settings.GALLERY_PAGE_SIZE, 1), settings.GALLERY_MAX_PAGE_SIZE)
+    
+    query = (
+        select(Person)
+        .where(Person.is_active == True)
+        .where(*filters)
+        .where(exists().where(Encoding.person_id == Person.uuid))
+    )
+    if cursor is not None:
+        query = query.where(Person.id < cursor)
+    persons = (await db.execute(query.order_by(Person.id.desc()).limit(limit + 1))).scalars().all()
+    
+    has_more = len(persons) > limit
+    persons = persons[:limit]
+    person_ids = [person.uuid for person in persons]
+    if not person_ids:
+        return [], {}, {}, None
+    
+    face_urls = {
+        row.person_id: thumbnail_url(row.thumb_small, row.face_path)
+        for row in await aio_encoding_service.get_first_faces(db, person_ids)
+    }
+    matches = await aio_match_service.get_last_matches(db, person_ids)
+    
+    next_cursor = persons[-1].id if has_more else None
+    return persons, face_urls, matches, next_cursor
 
-            except Exception as person_error:
-                logger.error(f"Kişi işleme hatası - {person.uuid}: {str(person_error)}")
-                continue
 
-        logger.info(f"Toplam {len(result)} tanınmayan yüz bulundu")
-        return result
+UNKNOWN_FILTERS = [Person.name == None]
+KNOWN_FILTERS = [Person.name != None, Person.surname != None]
+
+
+def _unknown_face_rows(persons, face_urls: dict, matches: dict) -> list[dict]:
+    result = []
+    for person in persons:
+        match = matches.get(person.uuid)
+        if match is None:
+            continue
+        result.append({
+            'person_id': str(person.uuid),
+            'face_url': face_urls[person.uuid],
+            'detected_at': match.created_at,
+            'confidence_score': match.confidence_score
+        })
+    return result
+
 
+def _known_face_rows(persons, face_urls: dict, matches: dict) -> list[dict]:
+    result = []
+    for person in persons:
+        match = matches.get(person.uuid)
+        if match is None:
+            continue
+        result.append({
+            'person_id': str(person.uuid),
+            'name': person.name,
+            'surname': person.surname,
+            'face_url': face_urls[person.uuid],
+            'last_seen': match.created_at,
+            'confidence_score': match.confidence_score
+        })
+    return result
+
+
+def get_unknown_faces(db, cursor: int = None, limit: int = None) -> dict:
+    """
+    Tanınmayan kişileri ve yüz resimlerini sayfa sayfa getirir.
+    
+    Returns:
+        dict: 'faces' listesi ve sonraki sayfa için 'next_cursor' (son sayfada None)
+    """
+    try:
+        persons, face_urls, matches, next_cursor = _gallery_page(
+            db, UNKNOWN_FILTERS, cursor, limit
+        )
+        result = _unknown_face_rows(persons, face_urls, matches)
+        
+        logger.info(f"Toplam {len(result)} tanınmayan yüz bulundu")
+        return {'faces': result, 'next_cursor': next_cursor}
+    
     except Exception as e:
         logger.error(f"Tanınmayan yüzleri getirme hatası: {str(e)}")
         raise
 
 
-def get_known_faces(db) -> list[dict]:
-    """İsim ve soyismi bilinen kişileri ve son yüz resimlerini getirir."""
+async def get_unknown_faces_async(db, cursor: int = None, limit: int = None) -> dict:
+    """get_unknown_faces'in AsyncSession ile çalışan, önbellekli karşılığı."""
+    return await read_cache.get_or_load(
+        "gallery", GALLERY_SCOPE, f"unknown:{cursor}:{limit}",
+        lambda: _load_unknown_faces_async(db, cursor, limit)
+    )
+
+
+async def _load_unknown_faces_async(db, cursor: int = None, limit: int = None) -> dict:
     try:
-        # İsmi, soyismi olan aktif kişileri, encoding ve son eşleşmeleriyle getir
-        known_faces = (
-            db.query(Person, Encoding, Match)
-            .join(Encoding, Person.uuid == Encoding.person_id)
-            .join(Match, Person.uuid == Match.person_id)
-            .filter(Person.name != None)
-            .filter(Person.surname != None)
-            .filter(Person.is_active == True)
-            .order_by(Person.uuid, Match.created_at.desc())  # Önce uuid sonra tarih
-            .distinct(Person.uuid)  # Her kişi için en son eşleşme
-            .all()
+        persons, face_urls, matches, next_cursor = await _gallery_page_async(
+            db, UNKNOWN_FILTERS, cursor, limit
         )
+        result = _unknown_face_rows(persons, face_urls, matches)
+        
+        logger.info("Toplam %s tanınmayan yüz bulundu", len(result))
+        return {'faces': result, 'next_cursor': next_cursor}
+    
+    except Exception as e:
+        logger.error("Tanınmayan yüzleri getirme hatası: %s", e)
+        raise
 
-        result = []
-        for person, encoding, match in known_faces:
-            try:
-                # Dosyanın varlığını kontrol et
-                if os.path.exists(encoding.face_path):
-                    result.append({
-                        'person_id': str(person.uuid),
-                        'name': person.name,
-                        'surname': person.surname,
-                        'face_path': encoding.face_path[4:],
-                        'last_seen': match.created_at,
-                        'confidence_score': match.confidence_score
-                    })
-                else:
-                    logger.warning(f"Dosya bulunamadı: {encoding.face_path} - Kişi: {person.uuid}")
-
-            except Exception as person_error:
-                logger.error(f"Kişi işleme hatası - {person.uuid}: {str(person_error)}")
-                continue
 
+def get_known_faces(db, cursor: int = None, limit: int = None) -> dict:
+    """
+    İsim ve soyismi bilinen kişileri ve yüz resimlerini sayfa sayfa getirir.
+    
+    Returns:
+        dict: 'faces' listesi ve sonraki sayfa için 'next_cursor' (son sayfada None)
+    """
+    try:
+        persons, face_urls, matches, next_cursor = _gallery_page(
+            db, KNOWN_FILTERS, cursor, limit
+        )
+        result = _known_face_rows(persons, face_urls, matches)
+        
         logger.info(f"Toplam {len(result)} bilinen yüz bulundu")
-        return result
-
+        return {'faces': result, 'next_cursor': next_cursor}
+    
     except Exception as e:
         logger.error(f"Bilinen yüzleri getirme hatası: {str(e)}")
         raise
 
 
+async def get_known_faces_async(db, cursor: int = None, limit: int = None) -> dict:
+    """get_known_faces'in AsyncSession ile çalışan, önbellekli karşılığı."""
+    return await read_cache.get_or_load(
+        "gallery", GALLERY_SCOPE, f"known:{cursor}:{limit}",
+        lambda: _load_known_faces_async(db, cursor, limit)
+    )
+
+
+async def _load_known_faces_async(db, cursor: int = None, limit: int = None) -> dict:
+    try:
+        persons, face_urls, matches, next_cursor = await _gallery_page_async(
+            db, KNOWN_FILTERS, cursor, limit
+        )
+        result = _known_face_rows(persons, face_urls, matches)
+        
+        logger.info("Toplam %s bilinen yüz bulundu", len(result))
+        return {'faces': result, 'next_cursor': next_cursor}
+    
+    except Exception as e:
+        logger.error("Bilinen yüzleri getirme hatası: %s", e)
+        raise
+
+
+def _person_match_rows(rows, present: list[bool]) -> list[dict]:
+    """Eşleşme satırlarını, yüz dosyası diskte bulunanlarla sınırlı olarak şablon sözlüklerine çevirir."""
+    person_matches = []
+    for (match, image, encoding), exists_on_disk in zip(rows, present):
+        if exists_on_disk:
+            person_matches.append({
+                'face_path': encoding.face_path[4:],
+                'face_url': thumbnail_url(encoding.thumb_small, encoding.face_path),
+                'original_image_path': f"{image.file_path[4:]}",
+                'original_thumb_url': thumbnail_url(image.thumb_medium, image.file_path),
+                'detected_at': match.created_at,
+                'confidence_score': match.confidence_score
+            })
+        else:
+            logger.warning("Dosya bulunamadı: %s - Eşleşme ID: %s", encoding.face_path, match.uuid)
+    return person_matches
+
+
+def _faces_exist(rows) -> list[bool]:
+    return [os.path.exists(encoding.face_path) for _, _, encoding in rows]
+
+
 def get_person_matches(db: Session, person_id: str) -> list[dict]:
     """Kişinin tüm eşleşmelerini ve orijinal fotoğrafları getirir."""
     try:
@@ -261,19 +727,8 @@ def get_person_matches(db: Session, person_id: str) -> list[dict]:
             .order_by(Match.created_at.desc())
             .all()
         )
-
-        person_matches = []
-        for match, image, encoding in matches:
-            # Dosya varlığını kontrol et
-            if os.path.exists( encoding.face_path):
-                person_matches.append({
-                    'face_path': encoding.face_path[4:],
-                    'original_image_path': f"{image.file_path[4:]}",
-                    'detected_at': match.created_at,
-                    'confidence_score': match.confidence_score
-                })
-            else:
-                logger.warning(f"Dosya bulunamadı: {encoding.face_path} - Eşleşme ID: {match.uuid}")
+        # Dosya varlığını kontrol et
+        person_matches = _person_match_rows(matches, _faces_exist(matches))
 
         logger.info(f"Kişi {person_id} için {len(person_matches)} eşleşme bulundu")
         return person_matches
@@ -281,3 +736,78 @@ def get_person_matches(db: Session, person_id: str) -> list[dict]:
     except Exception as e:
         logger.error(f"Kişi eşleşmelerini getirme hatası: {str(e)}")
         raise
+
+
+async def get_person_async(db, person_id: str) -> Optional[dict]:
+    """
+    Aktif kişinin temel bilgilerini önbellekli olarak getirir.
+    Önbellek paylaşımlı olabildiği için ORM nesnesi değil sözlük döner.
+    """
+    async def load():
+        person = await aio_user_service.get_user_by_uuid(db, person_id)
+        if person is None:
+            return None
+        return {
+            'id': person.id,
+            'uuid': str(person.uuid),
+            'name': person.name,
+            'surname': person.surname
+        }
+
+    return await read_cache.get_or_load("person", person_scope(person_id), "record", load)
+
+
+async def update_person_async(db, person_id, name: str = None, surname: str = None):
+    """Kişinin adını günceller ve kişinin önbellek kayıtlarıyla galerileri geçersiz kılar."""
+    person = await aio_user_service.update_user(db, person_id, name=name, surname=surname)
+    if person is not None:
+        await read_cache.invalidate_persons_async([person.uuid])
+    return person
+
+
+def delete_person(db: Session, person_id) -> bool:
+    """Kişiyi soft delete yapar ve kişinin önbellek kayıtlarıyla galerileri geçersiz kılar."""
+    person = user_service.get_user_by_id(db, person_id)
+    if person is None:
+        return False
+    person_uuid = person.uuid
+    deleted = user_service.delete_user(db, person_id)
+    if deleted:
+        read_cache.invalidate_persons([person_uuid])
+    return deleted
+
+
+async def delete_person_async(db, person_id) -> bool:
+    """delete_person'ın AsyncSession ile çalışan karşılığı."""
+    person = await aio_user_service.get_user_by_id(db, person_id)
+    if person is None:
+        return False
+    # commit sonrası nesne süresi dolar; UUID önceden alınır
+    person_uuid = person.uuid
+    deleted = await aio_user_service.delete_user(db, person_id)
+    if deleted:
+        await read_cache.invalidate_persons_async([person_uuid])
+    return deleted
+
+
+async def get_person_matches_async(db, person_id: str) -> list[dict]:
+    """get_person_matches'in AsyncSession ile çalışan, önbellekli karşılığı."""
+    return await read_cache.get_or_load(
+        "person_matches", person_scope(person_id), "all",
+        lambda: _load_person_matches_async(db, person_id)
+    )
+
+
+async def _load_person_matches_async(db, person_id: str) -> list[dict]:
+    """Dosya varlık kontrolleri event loop dışında, iş parçacığında yapılır."""
+    try:
+        matches = await aio_match_service.get_person_match_rows(db, person_id)
+        present = await asyncio.to_thread(_faces_exist, matches)
+        person_matches = _person_match_rows(matches, present)
+
+        logger.info("Kişi %s için %s eşleşme bulundu", person_id, len(person_matches))
+        return person_matches
+
+    except Exception as e:
+        logger.error("Kişi eşleşmelerini getirme hatası: %s", e)
+        raise
@@ -1,8 +1,121 @@
+import hashlib
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+import cv2
+import numpy as np
 from PIL import Image
 from app.config.logging import setup_logger
+from app.config.settings import settings
 
 logger = setup_logger(__name__)
 
-def compress_jpeg(input_path, output_path, quality=85):
+JPEG_QUALITY = 85
+# Disk yazma işleri bu havuzda yapılır (cv2.imencode GIL'i bırakır)
+WRITER_THREADS = 4
+
+# Küçük resim boyutları (uzun kenar, piksel)
+THUMBNAIL_SIZES = {"small": 160, "medium": 640}
+THUMBNAIL_QUALITY = 80
+
+_writer: Optional[ThreadPoolExecutor] = None
+
+def compress_jpeg(input_path, output_path, quality=JPEG_QUALITY):
     img = Image.open(input_path)
-    img.save(output_path, "JPEG", quality=quality)
\ No newline at end of file
+    img.save(output_path, "JPEG", quality=quality)
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Görüntü baytlarını tek seferde BGR NumPy dizisine çözer."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Görüntü çözülemedi")
+    return image
+
+def compute_image_hashes(data: bytes) -> tuple[str, int]:
+    """
+    Tekrar yükleme tespiti için dosyanın SHA-256 özetini ve 64 bitlik dHash'ini hesaplar.
+    dHash, JPEG'in 1/8 ölçekte çözülmüş gri tonlu halinden hesaplanır.
+
+    Returns:
+        tuple: (sha256 hex, dhash)
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        raise ValueError("Görüntü çözülemedi")
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    dhash = 0
+    for bit in bits:
+        dhash = (dhash << 1) | int(bit)
+    return sha256, dhash
+
+def write_jpeg(path: str, bgr_image: np.ndarray, quality: int = JPEG_QUALITY) -> list[tuple]:
+    """
+    BGR diziyi JPEG olarak kodlar ve dosyaya atomik olarak yazar.
+
+    Returns:
+        list[tuple]: Ölçülen ('compress', saniye) ve ('file_write', saniye) süreleri
+    """
+    start = time.perf_counter()
+    ok, encoded = cv2.imencode(".jpg", bgr_image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError(f"JPEG kodlanamadı: {path}")
+    encoded_at = time.perf_counter()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encoded.tobytes())
+    os.replace(tmp_path, path)
+    return [("compress", encoded_at - start), ("file_write", time.perf_counter() - encoded_at)]
+
+def _submit(fn, *args) -> Future:
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=WRITER_THREADS, thread_name_prefix="jpeg-writer")
+    return _writer.submit(fn, *args)
+
+def write_thumbnail(bgr_image: np.ndarray, max_side: int, folder: str) -> str:
+    """
+    Uzun kenarı max_side olacak şekilde küçültülmüş bir kopya üretir ve içerik
+    özetinden türetilen isimle kaydeder. Aynı içerik her zaman aynı isme yazılır.
+
+    Returns:
+        str: Küçük resim dosya adı (ör. '3f2a...c1.webp')
+    """
+    height, width = bgr_image.shape[:2]
+    scale = min(1.0, max_side / max(height, width, 1))
+    if scale < 1.0:
+        bgr_image = cv2.resize(
+            bgr_image,
+            (max(1, int(width * scale)), max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+    if settings.THUMBNAIL_FORMAT == "webp":
+        ext, params = ".webp", [cv2.IMWRITE_WEBP_QUALITY, THUMBNAIL_QUALITY]
+    else:
+        ext, params = ".jpg", [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY]
+    ok, encoded = cv2.imencode(ext, bgr_image, params)
+    if not ok:
+        raise ValueError("Küçük resim kodlanamadı")
+    data = encoded.tobytes()
+    name = f"{hashlib.sha256(data).hexdigest()[:32]}{ext}"
+    path = os.path.join(folder, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return name
+
+def write_thumbnails_async(bgr_image: np.ndarray, folder: str = None) -> dict:
+    """Tüm THUMBNAIL_SIZES boyutları için write_thumbnail işlerini arka plan havuzuna gönderir."""
+    folder = folder or settings.THUMBNAIL_FOLDER
+    return {
+        size_name: _submit(write_thumbnail, bgr_image, max_side, folder)
+        for size_name, max_side in THUMBNAIL_SIZES.items()
+    }
+
+def write_jpeg_async(path: str, bgr_image: np.ndarray, quality: int = JPEG_QUALITY) -> Future:
+    """write_jpeg işini arka plan yazma havuzuna gönderir."""
+    return _submit(write_jpeg, path, bgr_image, quality)
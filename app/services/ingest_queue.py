@@ -0,0 +1,175 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from app.database import SessionLocal
+from app.repository import job_service
+from app.services import compute_pool, face_service, profiling
+from app.services.metrics import INGEST_IN_PROGRESS
+from app.config.logging import setup_logger
+from app.config.settings import settings
+
+logger = setup_logger(__name__)
+
+
+class IngestQueue:
+    """
+    Veritabanı tablosu üzerinde çalışan kalıcı yükleme kuyruğu.
+
+    Yüklenen dosyalar önce diske ve ingest_job_files tablosuna yazılır;
+    arka plan işçileri bekleyen dosyaları sırayla alıp işler. Kuyruk durumu
+    tabloda tutulduğu için yeniden başlatmalarda kaybolmaz.
+
+    İşlenen dosyaların updated_at'i her INGEST_HEARTBEAT_INTERVAL saniyede
+    yenilenir; INGEST_STALE_AFTER süresince nabzı gelmeyen dosyalar (işçisi
+    çökmüş ya da yeniden başlatılmış) aynı döngüde tekrar kuyruğa alınır.
+
+    Her dosya kendi oturumuyla işlenir; işçi sayısı varsayılan olarak
+    hesaplama havuzu kadardır, böylece çok dosyalı bir işin dosyaları
+    çekirdeklere paralel dağılır. INGEST_JOB_CONCURRENCY tek bir işin
+    aynı anda kullanabileceği işçi sayısını sınırlar.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        poll_interval: float = settings.INGEST_POLL_INTERVAL
+    ):
+        self.workers = workers or settings.INGEST_WORKERS or compute_pool.pool_size()
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+        # Bu süreçte işlenmekte olan dosya ID'leri (nabız için)
+        self._active: set[int] = set()
+
+    async def start(self):
+        """Yarım kalan dosyaları kuyruğa geri alır, işçileri ve nabız döngüsünü başlatır."""
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self._requeue, self._stale_before())
+        self._tasks = [
+            asyncio.create_task(self._worker(worker_id))
+            for worker_id in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info(f"Yükleme kuyruğu başlatıldı: {self.workers} işçi")
+
+    async def stop(self):
+        """
+        İşçileri durdurur; yarım kalan dosyaların nabzı kesilir ve INGEST_STALE_AFTER
+        sonra (bu ya da başka bir süreç tarafından) tekrar işlenir.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Yükleme kuyruğu durduruldu")
+
+    def notify(self):
+        """Yeni iş eklendiğini bekleyen işçilere bildirir."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @staticmethod
+    def _stale_before() -> datetime:
+        return datetime.utcnow() - timedelta(seconds=settings.INGEST_STALE_AFTER)
+
+    @classmethod
+    def _beat(cls, active_ids: list[int]):
+        db = SessionLocal()
+        try:
+            job_service.touch_files(db, active_ids)
+            job_service.requeue_interrupted_files(db, cls._stale_before())
+        finally:
+            db.close()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.INGEST_HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.to_thread(self._beat, list(self._active))
+            except Exception as e:
+                logger.error(f"Kuyruk nabız döngüsü hatası: {str(e)}")
+                continue
+            self.notify()
+
+    @staticmethod
+    def _requeue(stale_before: datetime):
+        db = SessionLocal()
+        try:
+            job_service.requeue_interrupted_files(db, stale_before)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _claim() -> Optional[tuple]:
+        db = SessionLocal()
+        try:
+            job_file = job_service.claim_next_file(db, job_limit=settings.INGEST_JOB_CONCURRENCY)
+            if job_file is None:
+                return None
+            return job_file.id, job_file.file_path, job_file.job.profile_id, job_file.job.encoding_profile
+        finally:
+            db.close()
+
+    async def _worker(self, worker_id: int):
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                logger.error(f"Kuyruk işçisi {worker_id} hatası: {str(e)}")
+                claimed = None
+
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            self._active.add(claimed[0])
+            try:
+                with INGEST_IN_PROGRESS.track_inprogress():
+                    await self._process(*claimed)
+            finally:
+                self._active.discard(claimed[0])
+
+    async def _process(
+        self,
+        job_file_id: int,
+        file_path: str,
+        profile_id: Optional[str] = None,
+        encoding_profile: Optional[str] = None
+    ):
+        db = SessionLocal()
+        try:
+            if profile_id and profiling.limiter.allow():
+                profile_name = f"{profile_id}-ingest-{job_file_id}"
+                with profiling.profile(profile_name, async_mode=True):
+                    image_id, detected_faces = await face_service.process_saved_image(
+                        file_path, db, profile_name=profile_name, encoding_profile=encoding_profile
+                    )
+            else:
+                image_id, detected_faces = await face_service.process_saved_image(
+                    file_path, db, encoding_profile=encoding_profile
+                )
+            await asyncio.to_thread(
+                job_service.complete_file,
+                db,
+                job_file_id,
+                image_id=image_id,
+                faces_detected=len(detected_faces),
+                new_faces=sum(1 for face in detected_faces if face['is_new'])
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Kuyruk dosyası işleme hatası - ID {job_file_id}: {str(e)}")
+            try:
+                await asyncio.to_thread(job_service.fail_file, db, job_file_id, str(e))
+            except Exception:
+                pass
+        finally:
+            db.close()
+
+
+ingest_queue = IngestQueue()
@@ -0,0 +1,109 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from app.config.logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# Aşama süreleri milisaniyelerden onlarca saniyeye kadar dağılır
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+INGEST_STAGE_SECONDS = Histogram(
+    "pixid_ingest_stage_seconds",
+    "Yükleme hattı aşama süreleri",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "pixid_http_request_seconds",
+    "HTTP istek süreleri",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS
+)
+IMAGES_PROCESSED = Counter(
+    "pixid_images_processed_total",
+    "İşlenen resimler",
+    ["result"]  # analyzed / duplicate / failed
+)
+FACES_DETECTED = Counter("pixid_faces_detected_total", "Tespit edilen yüzler")
+FACE_MATCHES = Counter(
+    "pixid_face_matches_total",
+    "Yüz eşleştirme sonuçları",
+    ["result"]  # new / matched
+)
+COMPUTE_IN_FLIGHT = Gauge("pixid_compute_pool_in_flight", "Hesaplama havuzunda bekleyen/çalışan analizler")
+INGEST_IN_PROGRESS = Gauge("pixid_ingest_in_progress", "Kuyruk işçilerinin işlediği dosyalar")
+INGEST_PENDING = Gauge("pixid_ingest_pending_files", "Kuyrukta bekleyen dosyalar")
+DB_POOL_CHECKED_OUT = Gauge("pixid_db_pool_checked_out", "Kullanımdaki DB bağlantıları")
+DB_POOL_SIZE = Gauge("pixid_db_pool_size", "DB bağlantı havuzu boyutu")
+DB_POOL_OVERFLOW = Gauge("pixid_db_pool_overflow", "Havuz boyutunu aşan DB bağlantıları")
+INDEX_SIZE = Gauge("pixid_encoding_index_size", "Eşleştirme indeksindeki encoding sayısı")
+ENCODING_BATCH_FACES = Histogram(
+    "pixid_encoding_batch_faces",
+    "Tek encoding çağrısında işlenen yüz sayısı",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+STARTUP_SECONDS = Gauge(
+    "pixid_startup_seconds",
+    "Açılış aşamalarının süreleri",
+    ["phase"]  # imports / schema / compute_pool / index / total
+)
+SEARCH_REQUESTS = Counter(
+    "pixid_search_requests_total",
+    "Fotoğrafla arama istekleri",
+    ["result"]  # matched / no_match / no_face / timeout
+)
+CACHE_REQUESTS = Counter(
+    "pixid_cache_requests_total",
+    "Okuma önbelleği istekleri",
+    ["cache", "result"]  # cache: person / gallery / person_matches, result: hit / miss
+)
+
+
+@contextmanager
+def time_stage(stage: str):
+    """Bloğun süresini ilgili aşama histogramına yazar."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        INGEST_STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def observe_timings(timings: list):
+    """İşçi süreçlerden dönen (aşama, saniye) çiftlerini histograma işler."""
+    for stage, seconds in timings or ():
+        INGEST_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+def _collect_gauges():
+    """Anlık değerli göstergeleri (havuz, indeks, kuyruk) okuma anında günceller."""
+    from app.database import SessionLocal, engine
+    from app.repository import job_service
+    from app.services.encoding_index import encoding_index
+
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_SIZE.set(pool.size())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    INDEX_SIZE.set(len(encoding_index))
+
+    db = SessionLocal()
+    try:
+        INGEST_PENDING.set(job_service.count_pending_files(db))
+    except Exception as e:
+        logger.error(f"Kuyruk derinliği okunamadı: {str(e)}")
+    finally:
+        db.close()
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Tüm metrikleri Prometheus metin formatında döner.
+
+    Returns:
+        tuple: (gövde, content-type)
+    """
+    _collect_gauges()
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,10 @@
+"""
+Hesaplama havuzunun forkserver süreci tarafından import edilir.
+
+dlib modelleri burada bir kez yüklenip ısıtılır; havuz işçileri forkserver'dan
+fork edildiği için model belleğini copy-on-write olarak paylaşır ve her işçi
+modelleri yeniden yüklemez.
+"""
+from app.services.detection import warm_up
+
+warm_up()
@@ -0,0 +1,145 @@
+import cProfile
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from app.config.logging import setup_logger
+from app.config.settings import settings
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # Opsiyonel bağımlılık; yoksa cProfile (pstats) kullanılır
+    Profiler = None
+
+logger = setup_logger(__name__)
+
+# Dışarıdan gelen istek kimliği dosya adında kullanılabilecek biçimde olmalı
+PROFILE_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class RateLimiter:
+    """Dakikada en fazla `per_minute` izin veren token bucket (süreç başına)."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(per_minute, 0)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.capacity / 60.0)
+            self._updated = now
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+limiter = RateLimiter(settings.PROFILE_RATE_LIMIT)
+# cProfile aynı anda tek profil toplayabilir; çakışan istekler profillenmez
+_active = threading.Lock()
+
+
+def is_requested(request) -> bool:
+    """İstek başlık ya da sorgu parametresiyle profil istiyor mu (PROFILING_TOKEN tanımlıysa eşleşmeli)."""
+    if not settings.PROFILING_ENABLED:
+        return False
+    value = request.headers.get(settings.PROFILE_HEADER) or request.query_params.get(settings.PROFILE_QUERY_PARAM)
+    if not value:
+        return False
+    if settings.PROFILING_TOKEN:
+        return value == settings.PROFILING_TOKEN
+    return value.lower() in ("1", "true", "yes")
+
+
+def new_profile_id(request) -> str:
+    """İstekteki X-Request-ID geçerliyse onu, değilse yeni bir kimlik döner."""
+    request_id = request.headers.get("X-Request-ID", "")
+    if PROFILE_ID.fullmatch(request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+
+def _prune():
+    """Profil dizininde en yeni PROFILE_KEEP dosyayı bırakır."""
+    try:
+        entries = [
+            entry for entry in os.scandir(settings.PROFILE_DIR)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+        if len(entries) <= settings.PROFILE_KEEP:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - settings.PROFILE_KEEP]:
+            os.remove(entry.path)
+    except OSError as e:
+        logger.error(f"Profil dizini temizleme hatası: {str(e)}")
+
+
+@contextmanager
+def profile(name: str, async_mode: bool = False):
+    """
+    Bloğu profiller ve sonucu PROFILE_DIR altına `name` ile yazar.
+    pyinstrument kuruluysa örnekleyici profil (speedscope JSON), değilse
+    deterministik cProfile (pstats) kullanılır. Başka bir profil sürerken
+    blok profillenmeden çalışır.
+
+    Args:
+        name: Dosya adı (uzantısız)
+        async_mode: Blok await içeriyorsa True; pyinstrument sadece bu görevi izler
+    """
+    if not _active.acquire(blocking=False):
+        logger.info(f"Profil atlandı, başka bir profil sürüyor: {name}")
+        yield
+        return
+    try:
+        if Profiler is not None:
+            profiler = Profiler(async_mode="enabled" if async_mode else "disabled")
+            path = os.path.join(settings.PROFILE_DIR, f"{name}.speedscope.json")
+        else:
+            profiler = cProfile.Profile()
+            path = os.path.join(settings.PROFILE_DIR, f"{name}.pstats")
+        _start(profiler)
+        try:
+            yield
+        finally:
+            _stop(profiler)
+            _save(profiler, path)
+    finally:
+        _active.release()
+
+
+def _start(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.enable()
+    else:
+        profiler.start()
+
+
+def _stop(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+def _save(profiler, path: str):
+    """Profili diske yazar; yazma hatası profillenen işi bozmaz."""
+    try:
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(tmp_path)
+        else:
+            with open(tmp_path, "w") as f:
+                f.write(profiler.output(SpeedscopeRenderer()))
+        os.replace(tmp_path, path)
+        logger.info(f"Profil kaydedildi: {path}")
+        _prune()
+    except Exception as e:
+        logger.error(f"Profil kaydetme hatası - {path}: {str(e)}")
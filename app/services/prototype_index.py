@@ -0,0 +1,283 @@
+import threading
+import numpy as np
+from typing import Optional
+from app.repository import encoding_service, prototype_service
+from app.config.logging import setup_logger
+from app.config.settings import settings
+from app.services.encoding_index import ENCODING_DIM, SEARCH_CHUNK_SIZE
+
+logger = setup_logger(__name__)
+
+
+class PrototypeEncodingIndex:
+    """
+    İki aşamalı eşleştirme indeksi.
+
+    İlk aşamada sadece kişi prototipleri (merkez + birkaç temsilci encoding)
+    taranır; böylece sıcak arama kümesi encoding sayısından kişi sayısına iner.
+    İkinci aşamada en yakın aday kişilerin tüm encoding'leriyle tam mesafe
+    hesaplanır. EncodingIndex ile aynı arayüzü sunar.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.RLock()
+        # Yüklemeleri sıralar; DB okuması sırasında _lock tutulmaz
+        self._load_lock = threading.Lock()
+        # Her kişi bir yuvada: ilk satır merkez, sonrakiler temsilciler
+        self._rows_per_slot = 1 + settings.PROTOTYPE_MEDOIDS
+        self._capacity = initial_capacity
+        self._prototypes = np.zeros((initial_capacity * self._rows_per_slot, ENCODING_DIM), dtype=np.float32)
+        self._sq_norms = np.full(initial_capacity * self._rows_per_slot, np.inf, dtype=np.float32)
+        self._slot_persons = np.empty(initial_capacity, dtype=object)
+        self._slots = {}        # kişi UUID'si -> yuva
+        self._free_slots = []
+        self._slot_count = 0
+        self._state = {}        # kişi UUID'si -> [merkez, sayı, temsilciler, bekleyen]
+        self._members = {}      # kişi UUID'si -> (n, 128) encoding matrisi
+        self._size = 0
+        self._loaded = False
+        self._loading = False
+        # Yükleme sürerken gelen eklemeler: (encoding_id, person_id, vektör)
+        self._pending = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def _reserve_slot(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+        if self._slot_count == self._capacity:
+            capacity = self._capacity * 2
+            rows = capacity * self._rows_per_slot
+            prototypes = np.zeros((rows, ENCODING_DIM), dtype=np.float32)
+            sq_norms = np.full(rows, np.inf, dtype=np.float32)
+            slot_persons = np.empty(capacity, dtype=object)
+            used = self._slot_count * self._rows_per_slot
+            prototypes[:used] = self._prototypes[:used]
+            sq_norms[:used] = self._sq_norms[:used]
+            slot_persons[:self._slot_count] = self._slot_persons[:self._slot_count]
+            self._prototypes, self._sq_norms, self._slot_persons = prototypes, sq_norms, slot_persons
+            self._capacity = capacity
+        self._slot_count += 1
+        return self._slot_count - 1
+
+    def _write_slot(self, person_id):
+        """Kişinin güncel prototipini yuvasına yazar (boş satırlar sonsuz mesafede kalır)."""
+        slot = self._slots.get(person_id)
+        if slot is None:
+            slot = self._reserve_slot()
+            self._slots[person_id] = slot
+            self._slot_persons[slot] = person_id
+        centroid, _, medoids, _ = self._state[person_id]
+        rows = np.vstack([centroid[None, :], medoids])[:self._rows_per_slot]
+        start = slot * self._rows_per_slot
+        self._prototypes[start:start + len(rows)] = rows
+        self._sq_norms[start:start + self._rows_per_slot] = np.inf
+        self._sq_norms[start:start + len(rows)] = np.einsum("ij,ij->i", rows, rows)
+
+    def _drop_slot(self, person_id):
+        slot = self._slots.pop(person_id, None)
+        if slot is None:
+            return
+        start = slot * self._rows_per_slot
+        self._sq_norms[start:start + self._rows_per_slot] = np.inf
+        self._slot_persons[slot] = None
+        self._free_slots.append(slot)
+
+    def _reset(self):
+        self._prototypes[:] = 0.0
+        self._sq_norms[:] = np.inf
+        self._slot_persons[:] = None
+        self._slots = {}
+        self._free_slots = []
+        self._slot_count = 0
+        self._state = {}
+        self._members = {}
+        self._size = 0
+
+    def load(self, db):
+        """Prototipleri ve kişi bazında gruplanmış encoding'leri veritabanından yükler."""
+        with self._load_lock:
+            self._load(db)
+
+    def _load(self, db):
+        with self._lock:
+            self._loading = True
+            self._pending = []
+        try:
+            prototype_service.backfill_prototypes(db)
+            prototypes = prototype_service.load_prototypes(db)
+            encoding_ids, person_ids, matrix = encoding_service.load_encoding_matrix(db)
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._pending = []
+            raise
+
+        members = {}
+        if len(person_ids):
+            order = np.argsort(person_ids, kind="stable")
+            matrix = matrix[order]
+            person_ids = person_ids[order]
+            boundaries = np.flatnonzero(person_ids[1:] != person_ids[:-1]) + 1
+            starts = np.concatenate([[0], boundaries])
+            stops = np.concatenate([boundaries, [len(person_ids)]])
+            for start, stop in zip(starts, stops):
+                members[person_ids[start]] = matrix[start:stop]
+
+        with self._lock:
+            self._reset()
+            self._members = members
+            self._size = len(matrix)
+            for person_id in members:
+                if person_id in prototypes:
+                    self._state[person_id] = list(prototypes[person_id])
+                else:
+                    # Yükleme sırasında eklenen kişi; prototipi bellekte hesapla
+                    self._state[person_id] = self._compute_state(members[person_id])
+                self._write_slot(person_id)
+            # Okuma sırasında commit edilip anlık görüntüye girmemiş olabilecek eklemeler
+            loaded_ids = set(encoding_ids.tolist())
+            for encoding_id, person_id, vector in self._pending:
+                if encoding_id is None or encoding_id not in loaded_ids:
+                    self._add_vector(person_id, vector)
+            self._pending = []
+            self._loading = False
+            self._loaded = True
+        logger.info(f"Prototip indeksi yüklendi: {len(self._slots)} kişi, {self._size} encoding")
+
+    @staticmethod
+    def _compute_state(vectors: np.ndarray) -> list:
+        return [vectors.mean(axis=0), len(vectors), prototype_service.select_medoids(vectors), 0]
+
+    def ensure_loaded(self, db):
+        """İndeks henüz yüklenmediyse yükler; eşzamanlı çağrılarda yükleme bir kez yapılır."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load(db)
+
+    def invalidate(self):
+        """İndeksi geçersiz kılar; bir sonraki kullanımda yeniden yüklenir."""
+        with self._lock:
+            self._loaded = False
+            self._reset()
+
+    def remap_persons(self, mapping: dict):
+        """Birleştirilen kişilerin encoding'lerini hedef kişiye taşır ve prototipini yeniden hesaplar."""
+        if not mapping:
+            return
+        with self._lock:
+            if not self._loaded:
+                return
+            targets = set()
+            for source, target in mapping.items():
+                vectors = self._members.pop(source, None)
+                self._state.pop(source, None)
+                self._drop_slot(source)
+                if vectors is None:
+                    continue
+                existing = self._members.get(target)
+                self._members[target] = vectors if existing is None else np.vstack([existing, vectors])
+                targets.add(target)
+            for target in targets:
+                self._state[target] = self._compute_state(self._members[target])
+                self._write_slot(target)
+
+    def add(self, person_id, encoding: np.ndarray, encoding_id: int = None):
+        """Yeni bir encoding'i kişinin encoding'lerine ekler ve prototipini artımlı günceller."""
+        vector = encoding_service.prepare_query(encoding)
+        with self._lock:
+            if self._loading:
+                # Yüklemenin okuduğu anlık görüntü bu satırı içermeyebilir; yükleme bitince uygulanır
+                self._pending.append((encoding_id, person_id, vector))
+            if not self._loaded:
+                return
+            self._add_vector(person_id, vector)
+
+    def _add_vector(self, person_id, vector: np.ndarray):
+        """_lock tutulurken çağrılır."""
+        existing = self._members.get(person_id)
+        self._members[person_id] = vector if existing is None else np.vstack([existing, vector])
+        self._size += 1
+        if existing is None:
+            self._state[person_id] = self._compute_state(self._members[person_id])
+        else:
+            centroid, count, medoids, pending, refresh = prototype_service.update_prototype(
+                *self._state[person_id], vector
+            )
+            if refresh:
+                self._state[person_id] = self._compute_state(self._members[person_id])
+            else:
+                self._state[person_id] = [centroid, count, medoids, pending]
+        self._write_slot(person_id)
+
+    def _candidate_slots(self, queries: np.ndarray, tolerance: float) -> list[np.ndarray]:
+        """İlk aşama: her sorgu için prototip mesafesine göre en yakın aday yuvaları seçer."""
+        rows_per_slot = self._rows_per_slot
+        slot_count = self._slot_count
+        query_sq = np.einsum("ij,ij->i", queries, queries)[:, None]
+        person_dist = np.empty((len(queries), slot_count), dtype=np.float32)
+        chunk_slots = max(1, SEARCH_CHUNK_SIZE // rows_per_slot)
+
+        for start in range(0, slot_count, chunk_slots):
+            stop = min(start + chunk_slots, slot_count)
+            rows = slice(start * rows_per_slot, stop * rows_per_slot)
+            dist = query_sq + self._sq_norms[rows][None, :] - 2.0 * (queries @ self._prototypes[rows].T)
+            person_dist[:, start:stop] = dist.reshape(len(queries), stop - start, rows_per_slot).min(axis=2)
+
+        limit = (tolerance + settings.PROTOTYPE_MARGIN) ** 2
+        n_candidates = min(settings.PROTOTYPE_CANDIDATES, slot_count)
+        if n_candidates < slot_count:
+            nearest = np.argpartition(person_dist, n_candidates - 1, axis=1)[:, :n_candidates]
+        else:
+            nearest = np.broadcast_to(np.arange(slot_count), person_dist.shape)
+        return [
+            slots[person_dist[q, slots] <= limit]
+            for q, slots in enumerate(nearest)
+        ]
+
+    def search(self, encodings, tolerance: float, k: int = 1) -> list[list[tuple]]:
+        """
+        Her sorgu encoding'i için tolerans altındaki en yakın k kaydı döner.
+        Mesafeler aday kişilerin tüm encoding'leri üzerinden tam olarak hesaplanır.
+
+        Returns:
+            list[list[tuple]]: Her sorgu için mesafeye göre sıralı (person_id, mesafe) listesi
+        """
+        queries = encoding_service.prepare_query(encodings)
+        results = [[] for _ in range(len(queries))]
+
+        with self._lock:
+            if self._slot_count == 0 or len(queries) == 0:
+                return results
+            candidates = [
+                [self._slot_persons[slot] for slot in slots]
+                for slots in self._candidate_slots(queries, tolerance)
+            ]
+            members = {
+                person_id: self._members[person_id]
+                for person_ids in candidates for person_id in person_ids
+            }
+
+        # İkinci aşama: aday kişilerin tüm encoding'leriyle tam sıralama
+        for q, person_ids in enumerate(candidates):
+            hits = []
+            for person_id in person_ids:
+                vectors = members[person_id]
+                distances = np.sqrt(((vectors - queries[q]) ** 2).sum(axis=1))
+                hits.extend(
+                    (person_id, float(distance)) for distance in distances if distance <= tolerance
+                )
+            hits.sort(key=lambda hit: hit[1])
+            results[q] = hits[:k]
+        return results
+
+    def best_matches(self, encodings, tolerance: float) -> list[Optional[tuple]]:
+        """Her sorgu için tolerans altındaki en yakın (person_id, mesafe) çiftini, yoksa None döner."""
+        return [hits[0] if hits else None for hits in self.search(encodings, tolerance, k=1)]
@@ -0,0 +1,482 @@
+import argparse
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+import numpy as np
+from app.repository import encoding_service
+from app.config.logging import setup_logger
+from app.config.settings import settings
+from app.services.encoding_index import ENCODING_DIM, nearest
+
+try:
+    import fcntl
+except ImportError:  # Süreçler arası dosya kilidi sadece POSIX sistemlerde var
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+META_FILE = "index.json"
+LOCK_FILE = "index.lock"
+# Ekleme günlüğü kaydı: encoding ID + kişi UUID'si + float32 vektör (536 bayt)
+LOG_RECORD = np.dtype([
+    ("encoding_id", "<i8"),
+    ("person_id", "u1", 16),
+    ("vector", "<f4", ENCODING_DIM)
+])
+ROW_BYTES = ENCODING_DIM * 4
+# DB'den eksik satırları tamamlarken kullanılan blok boyutu
+LOAD_BATCH_SIZE = 10000
+
+
+class SharedEncodingIndex:
+    """
+    Aynı sunucudaki tüm uvicorn işçilerinin paylaştığı, diske yazılmış encoding indeksi.
+
+    Anlık görüntü dört ham dosyadan oluşur: (N, 128) float32 matris, kare normlar,
+    16 baytlık kişi UUID'leri ve int64 encoding ID'leri. Her süreç bunları salt okunur mmap ile açar; sayfalar
+    işletim sisteminin sayfa önbelleğinde bir kez tutulur, işçi eklemek indeks
+    belleğini çoğaltmaz. Yeni Encoding satırları sabit uzunluklu kayıtlar olarak
+    ekleme günlüğüne yazılır; her süreç günlüğün yeni kısmını kendi küçük
+    kuyruğuna okur. Günlük SHARED_INDEX_COMPACT_EVERY kayda ulaşınca anlık
+    görüntüye katlanır (compaction).
+
+    Yeni bir süreç açılışta dosyaları eşler, Postgres'ten sadece ID kolonunu okuyup
+    indekste olmayan satırları tamamlar; vektörlerin tamamını okumaz. EncodingIndex ile aynı
+    arayüzü sunar.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.SHARED_INDEX_DIR,
+        compact_every: int = settings.SHARED_INDEX_COMPACT_EVERY
+    ):
+        if fcntl is None:
+            raise RuntimeError("MATCH_ENGINE=shared için POSIX dosya kilitleri (fcntl) gerekli")
+        self.directory = directory
+        self.meta_path = os.path.join(directory, META_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._compacting = threading.Lock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._meta = None
+        self._meta_stat = None
+        self._count = 0
+        self._matrix = np.empty((0, ENCODING_DIM), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._persons = np.empty((0, 16), dtype=np.uint8)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._log_offset = 0
+        self._tail_matrix = np.empty((0, ENCODING_DIM), dtype=np.float32)
+        self._tail_sq_norms = np.empty(0, dtype=np.float32)
+        self._tail_persons = []
+        self._tail_ids = set()
+
+    def __len__(self) -> int:
+        return self._count + len(self._tail_persons)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Süreçler arası kilit; her çağrı kendi dosya tanıtıcısını açar ki thread'ler de birbirini beklesin."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path) as meta_file:
+            meta = json.load(meta_file)
+        if meta.get("dim") != ENCODING_DIM or meta.get("normalized") != settings.ENCODING_NORMALIZE:
+            logger.warning("Paylaşımlı indeks formatı ayarlarla uyuşmuyor, yeniden kurulacak")
+            return None
+        if "ids" not in meta:
+            # Eski format sadece en büyük ID'yi tutuyordu; ID sırasıyla commit edilmeyen satırlar kaçabiliyordu
+            logger.warning("Paylaşımlı indekste encoding ID dosyası yok, yeniden kurulacak")
+            return None
+        return meta
+
+    def _write_meta(self, meta: dict):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(tmp_path, self.meta_path)
+
+    @staticmethod
+    def _map(path: str, dtype, shape: tuple) -> np.ndarray:
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+    def _attach(self, meta: dict):
+        """Anlık görüntü dosyalarını salt okunur eşler; yerel günlük kuyruğunu sıfırlar."""
+        count = int(meta["count"])
+        self._reset()
+        self._meta = meta
+        self._meta_stat = self._stat(self.meta_path)
+        self._count = count
+        self._matrix = self._map(self._path(meta["matrix"]), "<f4", (count, ENCODING_DIM))
+        self._sq_norms = self._map(self._path(meta["norms"]), "<f4", (count,))
+        self._persons = self._map(self._path(meta["persons"]), np.uint8, (count, 16))
+        self._ids = self._map(self._path(meta["ids"]), "<i8", (count,))
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Başka süreçlerin yaptığı compaction ve günlük eklemelerini yerel görünüme yansıtır."""
+        meta = self._meta
+        if not self._loaded or meta is None:
+            return
+        log_path = self._path(meta["log"])
+        # Hızlı yol: meta ve günlük değişmediyse kilit alınmaz
+        if self._stat(self.meta_path) == self._meta_stat and self._log_size(log_path) <= self._log_offset:
+            return
+        with self._lock, self._file_lock(exclusive=False):
+            if self._stat(self.meta_path) != self._meta_stat:
+                meta = self._read_meta()
+                if meta is None:
+                    return
+                self._attach(meta)
+                log_path = self._path(meta["log"])
+            self._read_log(log_path)
+
+    @staticmethod
+    def _log_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def _read_log(self, log_path: str):
+        size = self._log_size(log_path)
+        complete = (size // LOG_RECORD.itemsize) * LOG_RECORD.itemsize
+        if complete <= self._log_offset:
+            return
+        with open(log_path, "rb") as log_file:
+            log_file.seek(self._log_offset)
+            data = log_file.read(complete - self._log_offset)
+        self._log_offset = complete
+        records = _unique_records(np.frombuffer(data, dtype=LOG_RECORD), self._tail_ids)
+        if not len(records):
+            return
+        vectors = np.ascontiguousarray(records["vector"], dtype=np.float32)
+        self._tail_matrix = np.concatenate([self._tail_matrix, vectors])
+        self._tail_sq_norms = np.concatenate([self._tail_sq_norms, np.einsum("ij,ij->i", vectors, vectors)])
+        self._tail_persons.extend(uuid.UUID(bytes=raw.tobytes()) for raw in records["person_id"])
+
+    def load(self, db):
+        """Diskteki anlık görüntüyü eşler (yoksa DB'den kurar) ve eksik satırları günlüğe ekler."""
+        with self._lock:
+            with self._file_lock(exclusive=False):
+                meta = self._read_meta()
+            if meta is None:
+                self.build(db, force=False)
+                return
+            with self._file_lock(exclusive=False):
+                self._attach(self._read_meta() or meta)
+                self._read_log(self._path(self._meta["log"]))
+            self._loaded = True
+            added = self._catch_up(db)
+        logger.info(f"Paylaşımlı encoding indeksi eşlendi: {len(self)} kayıt ({added} eksik satır eklendi)")
+
+    def _catch_up(self, db) -> int:
+        """
+        Anlık görüntüde ve günlükte olmayan satırları tamamlar. En büyük ID yerine ID
+        kümesi farkı kullanılır; daha küçük ID'li bir transaction anlık görüntüden
+        sonra commit edilmiş olabilir.
+        """
+        known = np.concatenate([
+            np.asarray(self._ids, dtype=np.int64),
+            np.fromiter(self._tail_ids, dtype=np.int64, count=len(self._tail_ids))
+        ])
+        missing = encoding_service.missing_encoding_ids(db, known)
+        pending = 0
+        for rows in encoding_service.iter_encoding_rows(db, missing, batch_size=LOAD_BATCH_SIZE):
+            if not rows:
+                continue
+            vectors = encoding_service.prepare_query(
+                encoding_service.decode_vectors([row.encoding for row in rows])
+            )
+            pending = self._append([row.id for row in rows], [row.person_id for row in rows], vectors)
+        if not len(missing):
+            return 0
+        self._refresh()
+        if self.compact_every > 0 and pending >= self.compact_every:
+            self._compact_in_background()
+        return len(missing)
+
+    def ensure_loaded(self, db):
+        """İndeks henüz bu süreçte eşlenmediyse eşler."""
+        if not self._loaded:
+            self.load(db)
+
+    def invalidate(self):
+        """Yerel görünümü bırakır; bir sonraki kullanımda dosyalar yeniden eşlenip eksikler tamamlanır."""
+        with self._lock:
+            self._loaded = False
+            self._reset()
+
+    def build(self, db, force: bool = True):
+        """
+        İndeksi DB'den baştan kurar ve yeni bir anlık görüntü olarak yazar.
+
+        Args:
+            force: False ise ve kilidi beklerken başka bir süreç kurduysa onun görüntüsü eşlenir
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            meta = None if force else self._read_meta()
+            if meta is None:
+                encoding_ids, person_ids, matrix = encoding_service.load_encoding_matrix(db)
+                generation = self._next_generation()
+                meta = {
+                    "generation": generation,
+                    "dim": ENCODING_DIM,
+                    "normalized": settings.ENCODING_NORMALIZE,
+                    "count": len(matrix),
+                    "matrix": f"matrix-{generation}.f32",
+                    "norms": f"norms-{generation}.f32",
+                    "persons": f"persons-{generation}.bin",
+                    "ids": f"ids-{generation}.i64",
+                    "log": f"append-{generation}.log"
+                }
+                matrix = np.ascontiguousarray(matrix, dtype="<f4")
+                matrix.tofile(self._path(meta["matrix"]))
+                np.einsum("ij,ij->i", matrix, matrix).astype("<f4").tofile(self._path(meta["norms"]))
+                self._person_bytes(person_ids).tofile(self._path(meta["persons"]))
+                np.asarray(encoding_ids, dtype="<i8").tofile(self._path(meta["ids"]))
+                open(self._path(meta["log"]), "wb").close()
+                self._write_meta(meta)
+                self._remove_stale(meta)
+            self._attach(meta)
+            self._read_log(self._path(meta["log"]))
+            self._loaded = True
+        logger.info(f"Paylaşımlı encoding indeksi kuruldu: {len(self)} kayıt")
+
+    def _next_generation(self) -> int:
+        generation = 0
+        for name in os.listdir(self.directory):
+            stem = name.split(".")[0]
+            if "-" in stem and stem.rsplit("-", 1)[1].isdigit():
+                generation = max(generation, int(stem.rsplit("-", 1)[1]))
+        return generation + 1
+
+    def _remove_stale(self, meta: dict):
+        """Güncel anlık görüntüye ait olmayan dosyaları siler; eşlemiş süreçler eski inode'u kullanmaya devam eder."""
+        current = {meta["matrix"], meta["norms"], meta["persons"], meta["ids"], meta["log"], META_FILE, LOCK_FILE}
+        for name in os.listdir(self.directory):
+            if name not in current and not name.endswith(".tmp"):
+                try:
+                    os.remove(self._path(name))
+                except OSError as e:
+                    logger.warning(f"Eski indeks dosyası silinemedi - {name}: {e}")
+
+    @staticmethod
+    def _person_bytes(person_ids) -> np.ndarray:
+        raw = b"".join(person_id.bytes for person_id in person_ids)
+        return np.frombuffer(raw, dtype=np.uint8).reshape(-1, 16)
+
+    def _append(self, encoding_ids, person_ids, vectors: np.ndarray) -> int:
+        """Kayıtları güncel ekleme günlüğüne yazar; günlükteki kayıt sayısını döner."""
+        records = np.zeros(len(vectors), dtype=LOG_RECORD)
+        records["encoding_id"] = [encoding_id or 0 for encoding_id in encoding_ids]
+        records["person_id"] = self._person_bytes(person_ids)
+        records["vector"] = vectors
+        with self._file_lock(exclusive=True):
+            meta = self._read_meta()
+            if meta is None:
+                return 0
+            log_path = self._path(meta["log"])
+            with open(log_path, "ab") as log_file:
+                log_file.write(records.tobytes())
+            return self._log_size(log_path) // LOG_RECORD.itemsize
+
+    def add(self, person_id, encoding: np.ndarray, encoding_id: int = None):
+        """
+        Yeni bir encoding'i ekleme günlüğüne yazar; günlük dolunca arka planda compaction başlatır.
+        İndeksi eşlememiş süreç de (ör. ingest işçisi) anlık görüntü varsa günlüğe yazar,
+        böylece diğer süreçler satırı DB'den tamamlamak zorunda kalmaz.
+        """
+        vector = encoding_service.prepare_query(encoding)
+        pending = self._append([encoding_id], [person_id], vector)
+        self._refresh()
+        if self.compact_every > 0 and pending >= self.compact_every:
+            self._compact_in_background()
+
+    def _compact_in_background(self):
+        if not self._compacting.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Paylaşımlı indeks compaction hatası: {str(e)}")
+            finally:
+                self._compacting.release()
+
+        threading.Thread(target=run, name="shared-index-compact", daemon=True).start()
+
+    def compact(self, mapping: dict = None):
+        """
+        Ekleme günlüğünü anlık görüntüye katlar, verilirse kişi eşlemesini uygular.
+
+        Matris, norm ve ID dosyalarına yeni satırlar yerinde eklenir (eşlemiş süreçler
+        sadece kendi satır sayılarını gördüğü için etkilenmez); kişi dosyası ve
+        günlük yeni nesil adıyla yazılır, meta dosyası atomik olarak değiştirilir.
+        """
+        with self._file_lock(exclusive=True):
+            meta = self._read_meta()
+            if meta is None:
+                return
+            log_path = self._path(meta["log"])
+            with open(log_path, "rb") as log_file:
+                data = log_file.read()
+            records = np.frombuffer(data[:len(data) - len(data) % LOG_RECORD.itemsize], dtype=LOG_RECORD)
+            if not len(records) and not mapping:
+                return
+            records = _unique_records(records, set())
+
+            count = int(meta["count"])
+            vectors = np.ascontiguousarray(records["vector"], dtype="<f4")
+            for name, rows in (
+                (meta["matrix"], vectors),
+                (meta["norms"], np.einsum("ij,ij->i", vectors, vectors).astype("<f4")),
+                (meta["ids"], np.asarray(records["encoding_id"], dtype="<i8"))
+            ):
+                path = self._path(name)
+                row_size = ROW_BYTES if rows.ndim == 2 else rows.itemsize
+                # Yarım kalmış önceki bir compaction'ın artıklarını at
+                os.truncate(path, count * row_size)
+                with open(path, "ab") as snapshot_file:
+                    snapshot_file.write(rows.tobytes())
+
+            persons = np.fromfile(self._path(meta["persons"]), dtype=np.uint8, count=count * 16).reshape(-1, 16)
+            persons = np.concatenate([persons, np.asarray(records["person_id"], dtype=np.uint8)])
+            if mapping:
+                person_keys = persons.view("<u8")
+                for source, target in mapping.items():
+                    source_key = np.frombuffer(source.bytes, dtype="<u8")
+                    rows = np.all(person_keys == source_key, axis=1)
+                    persons[rows] = np.frombuffer(target.bytes, dtype=np.uint8)
+
+            generation = self._next_generation()
+            new_meta = {
+                **meta,
+                "generation": generation,
+                "count": count + len(records),
+                "persons": f"persons-{generation}.bin",
+                "log": f"append-{generation}.log"
+            }
+            tmp_persons = self._path(f"{new_meta['persons']}.tmp")
+            persons.tofile(tmp_persons)
+            os.replace(tmp_persons, self._path(new_meta["persons"]))
+            open(self._path(new_meta["log"]), "wb").close()
+            self._write_meta(new_meta)
+            self._remove_stale(new_meta)
+        logger.info(
+            f"Paylaşımlı indeks compaction tamamlandı: {new_meta['count']} kayıt "
+            f"({len(records)} günlük kaydı katlandı)"
+        )
+        self._refresh()
+
+    def remap_persons(self, mapping: dict):
+        """Birleştirilen kişileri paylaşımlı kişi dosyasında taşır; tüm süreçler yeni nesli eşler."""
+        if not mapping:
+            return
+        self.compact(mapping)
+
+    def search(self, encodings, tolerance: float, k: int = 1) -> list[list[tuple]]:
+        """
+        Her sorgu encoding'i için tolerans altındaki en yakın k kaydı döner.
+
+        Returns:
+            list[list[tuple]]: Her sorgu için mesafeye göre sıralı (person_id, mesafe) listesi
+        """
+        queries = encoding_service.prepare_query(encodings)
+        results = [[] for _ in range(len(queries))]
+        self._refresh()
+        with self._lock:
+            count = self._count
+            matrix, sq_norms, persons = self._matrix, self._sq_norms, self._persons
+            tail_matrix, tail_sq_norms, tail_persons = self._tail_matrix, self._tail_sq_norms, self._tail_persons
+
+        snapshot_dist, snapshot_idx = nearest(queries, matrix, sq_norms, k)
+        tail_dist, tail_idx = nearest(queries, tail_matrix, tail_sq_norms, k)
+        best_dist = np.concatenate([snapshot_dist, tail_dist], axis=1)
+        best_idx = np.concatenate([snapshot_idx, tail_idx + count], axis=1)
+        order = np.argsort(best_dist, axis=1)[:, :k]
+        best_dist = np.take_along_axis(best_dist, order, axis=1)
+        best_idx = np.take_along_axis(best_idx, order, axis=1)
+
+        for q in range(len(queries)):
+            for distance, row in zip(best_dist[q], best_idx[q]):
+                if distance > tolerance:
+                    break
+                if row < count:
+                    person_id = uuid.UUID(bytes=persons[row].tobytes())
+                else:
+                    person_id = tail_persons[row - count]
+                results[q].append((person_id, float(distance)))
+        return results
+
+    def best_matches(self, encodings, tolerance: float) -> list:
+        """Her sorgu için tolerans altındaki en yakın (person_id, mesafe) çiftini, yoksa None döner."""
+        return [hits[0] if hits else None for hits in self.search(encodings, tolerance, k=1)]
+
+
+def _unique_records(records: np.ndarray, seen: set) -> np.ndarray:
+    """
+    Daha önce görülen encoding ID'lerine ait günlük kayıtlarını atar ve seen'i günceller.
+    Aynı satır iki süreç tarafından yazılmış olabilir (tamamlama ile eşzamanlı ekleme).
+    """
+    keep = []
+    for i, encoding_id in enumerate(records["encoding_id"].tolist()):
+        if encoding_id:
+            if encoding_id in seen:
+                continue
+            seen.add(encoding_id)
+        keep.append(i)
+    return records[np.asarray(keep, dtype=np.int64)]
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Paylaşımlı (mmap) encoding indeksi araçları")
+    parser.add_argument("command", choices=["build", "compact", "stats"])
+    args = parser.parse_args()
+
+    index = SharedEncodingIndex()
+    if args.command == "compact":
+        index.compact()
+    db = SessionLocal()
+    try:
+        if args.command == "build":
+            index.build(db)
+        else:
+            index.ensure_loaded(db)
+        print(json.dumps({"records": len(index), **(index._meta or {})}, indent=2))
+    finally:
+        db.close()
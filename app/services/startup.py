@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+from app.config.logging import setup_logger
+from app.services.metrics import STARTUP_SECONDS
+
+logger = setup_logger(__name__)
+
+
+class StartupState:
+    """Açılış aşamalarının sürelerini ve uygulamanın hazır olup olmadığını tutar."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: dict = {}
+        self.ready = False
+        self.total_seconds = None
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+        STARTUP_SECONDS.labels(phase=phase).set(seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark_ready(self):
+        """Isınma bittiğinde çağrılır; toplam soğuk başlangıç süresini loglar."""
+        self.total_seconds = time.perf_counter() - self.started_at
+        self.record("total", self.total_seconds)
+        self.ready = True
+        details = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.phases.items())
+        logger.info("Uygulama hazır - soğuk başlangıç %.2f sn (%s)", self.total_seconds, details)
+
+
+startup_state = StartupState()
@@ -0,0 +1,218 @@
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+import aiofiles
+from app.config.logging import setup_logger
+from app.config.settings import settings
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = setup_logger(__name__)
+
+# Kabul edilen formatların dosya başı imzaları
+MAGIC_SIGNATURES = {
+    "jpeg": b"\xff\xd8\xff",
+    "png": b"\x89PNG\r\n\x1a\n",
+}
+MAGIC_LENGTH = max(len(signature) for signature in MAGIC_SIGNATURES.values())
+
+
+class UploadRejected(Exception):
+    """İstek bütünüyle reddedildiğinde (boyut sınırı, bozuk form) HTTP durumu ile fırlatılır."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class SavedUpload:
+    original_name: str
+    path: str
+    size: int
+
+
+@dataclass
+class StreamResult:
+    saved: list = field(default_factory=list)      # SavedUpload listesi
+    rejected: list = field(default_factory=list)   # {'filename', 'reason'} listesi
+
+
+def detect_format(head: bytes) -> Optional[str]:
+    """Dosyanın ilk baytlarından formatı belirler; desteklenmiyorsa None döner."""
+    for name, signature in MAGIC_SIGNATURES.items():
+        if head.startswith(signature):
+            return name
+    return None
+
+
+class _PartWriter:
+    """Tek bir dosya parçasını, ilk baytlarını doğruladıktan sonra diske bloklar halinde yazar."""
+
+    def __init__(self, filename: str, folder: str):
+        self.filename = filename
+        self.path = os.path.join(folder, f"{uuid.uuid4()}.jpg")
+        self.size = 0
+        self.reason: Optional[str] = None
+        self._head = b""
+        self._buffer = bytearray()
+        self._file = None
+
+    @property
+    def rejected(self) -> bool:
+        return self.reason is not None
+
+    async def feed(self, data: bytes):
+        if self.rejected:
+            return
+        self.size += len(data)
+        if self.size > settings.UPLOAD_MAX_FILE_BYTES:
+            await self.reject(f"dosya boyutu sınırı aşıldı ({settings.UPLOAD_MAX_FILE_BYTES} bayt)")
+            return
+        if self._file is None:
+            # İlk baytlar gelene kadar diske yazmadan bekle, imza uymazsa hiç dosya açılmaz
+            self._head += data
+            if len(self._head) < MAGIC_LENGTH:
+                return
+            if detect_format(self._head) is None:
+                await self.reject("desteklenmeyen dosya formatı")
+                return
+            self._file = await aiofiles.open(self.path, "wb")
+            data, self._head = self._head, b""
+        self._buffer += data
+        if len(self._buffer) >= settings.UPLOAD_CHUNK_SIZE:
+            await self._flush()
+
+    async def _flush(self):
+        if self._buffer:
+            await self._file.write(bytes(self._buffer))
+            self._buffer.clear()
+
+    async def finish(self) -> bool:
+        """Parçayı kapatır; dosya kabul edildiyse True döner."""
+        if not self.rejected and self._file is None:
+            # MAGIC_LENGTH'ten kısa dosya
+            await self.reject("desteklenmeyen dosya formatı")
+        if self.rejected:
+            return False
+        await self._flush()
+        await self._file.close()
+        return True
+
+    async def reject(self, reason: str):
+        self.reason = reason
+        self._head = b""
+        self._buffer.clear()
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+async def stream_upload(request, folder: str, field_name: str = "files") -> StreamResult:
+    """
+    multipart/form-data isteğini belleğe almadan okur; `field_name` alanındaki
+    dosyaları bloklar halinde doğrudan `folder` altına yazar.
+
+    Bellekte aynı anda en fazla bir ağ bloğu ve UPLOAD_CHUNK_SIZE kadar yazma
+    tamponu tutulur. Dosya imzası ilk baytlarda, dosya boyutu her blokta
+    kontrol edilir; uymayan dosyalar atlanır ve reddedilenler listesine eklenir.
+
+    Raises:
+        UploadRejected: İstek boyutu/dosya sayısı sınırı aşıldığında ya da form bozuk olduğunda
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.UPLOAD_MAX_REQUEST_BYTES:
+        raise UploadRejected(413, "İstek boyutu sınırı aşıldı")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadRejected(400, "multipart/form-data bekleniyor")
+
+    # Ayrıştırıcı geri çağrıları eşzamanlıdır; olaylar toplanıp her bloktan sonra async işlenir
+    events = []
+    header_field = bytearray()
+    header_value = bytearray()
+    headers = {}
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        events.append(("begin", dict(headers)))
+        headers.clear()
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    result = StreamResult()
+    current: Optional[_PartWriter] = None
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.UPLOAD_MAX_REQUEST_BYTES:
+                raise UploadRejected(413, "İstek boyutu sınırı aşıldı")
+            parser.write(chunk)
+
+            for kind, payload in events:
+                if kind == "begin":
+                    _, options = parse_options_header(payload.get(b"content-disposition", b""))
+                    filename = options.get(b"filename")
+                    if options.get(b"name", b"").decode("latin-1") != field_name or filename is None:
+                        current = None  # Diğer form alanları yok sayılır
+                        continue
+                    if len(result.saved) + len(result.rejected) >= settings.UPLOAD_MAX_FILES:
+                        raise UploadRejected(413, f"En fazla {settings.UPLOAD_MAX_FILES} dosya yüklenebilir")
+                    current = _PartWriter(filename.decode("utf-8", "replace"), folder)
+                elif kind == "data" and current is not None:
+                    await current.feed(payload)
+                elif kind == "end" and current is not None:
+                    if await current.finish():
+                        result.saved.append(SavedUpload(current.filename, current.path, current.size))
+                    else:
+                        logger.warning("Dosya reddedildi - %s: %s", current.filename, current.reason)
+                        result.rejected.append({"filename": current.filename, "reason": current.reason})
+                    current = None
+            events.clear()
+        parser.finalize()
+    except Exception as e:
+        # Yarım kalan ve kaydedilmiş dosyaları temizle
+        if current is not None:
+            await current.reject("istek iptal edildi")
+        for upload in result.saved:
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+        if isinstance(e, UploadRejected):
+            raise
+        logger.error("Yükleme akışı hatası: %s", e)
+        raise UploadRejected(400, "Form verisi okunamadı") from e
+
+    return result
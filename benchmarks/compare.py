@@ -0,0 +1,88 @@
+"""
+İki benchmark çıktısını karşılaştırır ve gerilemeleri raporlar.
+
+Kullanım:
+    python -m benchmarks.compare onceki.json sonraki.json [--threshold 0.1]
+
+Eşik oranından fazla yavaşlayan metrik varsa çıkış kodu 1 olur (CI'da kullanılabilir).
+"""
+import argparse
+import json
+import sys
+
+# Karşılaştırılan süre metrikleri; değeri büyük olan kötüdür
+TIMING_KEYS = ("p50_ms", "p95_ms")
+
+
+def _flatten(report: dict) -> dict:
+    """Raporu {metrik adı: değer} sözlüğüne düzleştirir."""
+    metrics = {}
+    for entry in report.get("matching", []):
+        if entry.get("skipped"):
+            continue
+        prefix = f"matching/{entry['engine']}/{entry['scale']}"
+        metrics[f"{prefix}/load_s"] = entry.get("load_s")
+        for section in ("single_query", "batch_query"):
+            for key in TIMING_KEYS:
+                metrics[f"{prefix}/{section}/{key}"] = entry.get(section, {}).get(key)
+    for entry in report.get("gallery", []):
+        prefix = f"gallery/{entry['scale']}"
+        for section in ("unknown_first_page", "known_first_page", "unknown_page_walk"):
+            for key in TIMING_KEYS:
+                metrics[f"{prefix}/{section}/{key}"] = entry.get(section, {}).get(key)
+    for stage, stats in report.get("ingest", {}).get("stages", {}).items():
+        for key in TIMING_KEYS:
+            metrics[f"ingest/{stage}/{key}"] = stats.get(key)
+    for profile, entry in report.get("ingest", {}).get("encoding_profiles", {}).items():
+        for section in ("landmarks", "encode_per_image"):
+            for key in TIMING_KEYS:
+                metrics[f"ingest/profile/{profile}/{section}/{key}"] = entry.get(section, {}).get(key)
+    return {name: value for name, value in metrics.items() if value is not None}
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    """
+    Returns:
+        list[dict]: Her ortak metrik için önceki/sonraki değer, değişim oranı ve gerileme bayrağı
+    """
+    old_metrics = _flatten(baseline)
+    new_metrics = _flatten(candidate)
+    rows = []
+    for name in sorted(old_metrics.keys() & new_metrics.keys()):
+        old, new = old_metrics[name], new_metrics[name]
+        change = (new - old) / old if old else 0.0
+        rows.append({
+            "metric": name,
+            "baseline": old,
+            "candidate": new,
+            "change": change,
+            "regression": change > threshold
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sonuçlarını karşılaştırır")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Gerileme sayılacak yavaşlama oranı")
+    parser.add_argument("--json", action="store_true", help="Sonucu JSON olarak yaz")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    rows = compare(baseline, candidate, args.threshold)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            flag = "GERİLEME" if row["regression"] else ""
+            print(f"{row['metric']:<60} {row['baseline']:>12.3f} {row['candidate']:>12.3f} {row['change']:>+8.1%} {flag}")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
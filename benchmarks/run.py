@@ -0,0 +1,487 @@
+"""
+pix-id performans benchmark'ları.
+
+Yükleme hattının aşamalarını (decode, detect, encode, match, persist), indeks
+boyutuna göre eşleştirme gecikmesini ve galeri sorgularını ölçer; sonuçları
+karşılaştırılabilir JSON olarak yazar.
+
+Kullanım:
+    python -m benchmarks.run                                  # geçici SQLite
+    python -m benchmarks.run --db postgresql://u:p@localhost/pixid_bench
+    python -m benchmarks.run --scales 10000,100000 --engines exact,prototype
+    python -m benchmarks.compare onceki.json sonraki.json
+
+Benchmark veritabanındaki tablolar her ölçekte silinip yeniden oluşturulur;
+uygulamanın kendi veritabanı ile çalıştırılmaz.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+from dotenv import dotenv_values
+
+DEFAULT_SCALES = "10000,100000,1000000"
+DEFAULT_ENGINES = "exact,prototype,hnsw"
+INSERT_BATCH_SIZE = 10000
+
+
+def summarize(samples: list) -> dict:
+    """Süre örneklerini (saniye) milisaniye cinsinden özet istatistiklere çevirir."""
+    import numpy as np
+
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    return {
+        "count": len(values),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def _register_sqlite_types():
+    """Postgres UUID kolonlarının SQLite üzerinde metin olarak oluşturulmasını sağlar."""
+    from sqlalchemy.dialects.postgresql import UUID
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(UUID, "sqlite")
+    def _compile_uuid(type_, compiler, **kw):
+        return "CHAR(36)"
+
+
+def reset_database():
+    """Benchmark veritabanındaki tabloları silip yeniden oluşturur."""
+    from app.database import Base, engine, init_db
+
+    init_db()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def populate(db, person_index, matrix, named_ratio: float = 0.1) -> dict:
+    """
+    Sentetik kişi, resim, encoding ve eşleşme satırlarını toplu olarak yazar.
+
+    Returns:
+        dict: Satır sayıları ve yazma süresi
+    """
+    import numpy as np
+    from app.models import Person, Image, Encoding, Match
+    from app.repository.encoding_service import FORMAT_V1
+
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    person_count = int(person_index.max()) + 1 if len(person_index) else 0
+    person_ids = [uuid.uuid4() for _ in range(person_count)]
+    named = set(range(0, person_count, max(1, int(1 / named_ratio)))) if named_ratio > 0 else set()
+
+    for offset in range(0, person_count, INSERT_BATCH_SIZE):
+        db.bulk_insert_mappings(Person, [
+            {
+                "uuid": person_ids[i],
+                "name": f"Kisi{i}" if i in named else None,
+                "surname": "Bench" if i in named else None,
+                "is_active": True,
+                "created_at": now
+            }
+            for i in range(offset, min(offset + INSERT_BATCH_SIZE, person_count))
+        ])
+        db.commit()
+
+    # Her yüz ayrı bir resimden geliyormuş gibi tek resim satırı yeterli
+    image_id = uuid.uuid4()
+    db.bulk_insert_mappings(Image, [{"uuid": image_id, "file_path": "app/static/uploads/bench.jpg", "created_at": now}])
+
+    # v1 formatı: başlık baytı + 128 x float32, toplu olarak tek dizide hazırlanır
+    payload = np.empty((len(matrix), 1 + matrix.shape[1] * 4), dtype=np.uint8)
+    payload[:, 0] = FORMAT_V1
+    payload[:, 1:] = np.ascontiguousarray(matrix.astype("<f4")).view(np.uint8)
+
+    for offset in range(0, len(matrix), INSERT_BATCH_SIZE):
+        stop = min(offset + INSERT_BATCH_SIZE, len(matrix))
+        db.bulk_insert_mappings(Encoding, [
+            {
+                "uuid": uuid.uuid4(),
+                "person_id": person_ids[person_index[i]],
+                "face_path": f"app/static/detected_faces/bench_{i}.jpg",
+                "encoding": payload[i].tobytes()
+            }
+            for i in range(offset, stop)
+        ])
+        db.commit()
+
+    for offset in range(0, person_count, INSERT_BATCH_SIZE):
+        db.bulk_insert_mappings(Match, [
+            {"person_id": person_ids[i], "matched_image_id": image_id, "confidence_score": 90, "created_at": now}
+            for i in range(offset, min(offset + INSERT_BATCH_SIZE, person_count))
+        ])
+        db.commit()
+
+    return {
+        "persons": person_count,
+        "named_persons": len(named),
+        "encodings": len(matrix),
+        "populate_s": time.perf_counter() - start
+    }
+
+
+def _create_index(engine_name: str, workdir: str):
+    if engine_name == "exact":
+        from app.services.encoding_index import EncodingIndex
+        return EncodingIndex()
+    if engine_name == "prototype":
+        from app.services.prototype_index import PrototypeEncodingIndex
+        return PrototypeEncodingIndex()
+    if engine_name == "hnsw":
+        from app.services.ann_index import HnswEncodingIndex, hnswlib
+        if hnswlib is None:
+            return None
+        return HnswEncodingIndex(path=os.path.join(workdir, f"bench_{uuid.uuid4().hex}.hnsw"))
+    raise ValueError(f"Bilinmeyen motor: {engine_name}")
+
+
+def bench_matching(db, scale: int, engines: list, queries, workdir: str, batch_size: int) -> list:
+    """Her motor için indeks yükleme süresini ve tekli/toplu sorgu gecikmesini ölçer."""
+    from app.config.settings import settings
+    from app.repository import prototype_service
+
+    tolerance = settings.FACE_MATCH_TOLERANCE
+    results = []
+    reference = None
+    for engine_name in engines:
+        entry = {"scale": scale, "engine": engine_name}
+        if engine_name == "prototype":
+            _, entry["prototype_backfill_s"] = _timed(prototype_service.backfill_prototypes, db)
+        index = _create_index(engine_name, workdir)
+        if index is None:
+            entry["skipped"] = "hnswlib kurulu değil"
+            results.append(entry)
+            continue
+
+        _, entry["load_s"] = _timed(index.load, db)
+        index.search(queries[:1], tolerance)  # ısınma
+
+        single = [_timed(index.best_matches, queries[i:i + 1], tolerance)[1] for i in range(len(queries))]
+        entry["single_query"] = summarize(single)
+        batches = [
+            _timed(index.best_matches, queries[i:i + batch_size], tolerance)[1]
+            for i in range(0, len(queries), batch_size)
+        ]
+        entry["batch_query"] = {"batch_size": batch_size, **summarize(batches)}
+
+        # Tam taramaya göre ilk eşleşme uyumu
+        matches = [match[0] if match else None for match in index.best_matches(queries, tolerance)]
+        if reference is None and engine_name == "exact":
+            reference = matches
+        if reference is not None:
+            agree = sum(1 for a, b in zip(reference, matches) if a == b)
+            entry["top1_agreement_vs_exact"] = agree / len(queries)
+        entry["match_rate"] = sum(1 for m in matches if m is not None) / len(queries)
+        results.append(entry)
+        del index
+    return results
+
+
+def bench_gallery(db, scale: int, repeats: int, deep_pages: int) -> dict:
+    """Galeri sayfalarının (ilk sayfa ve derin sayfa) sorgu sürelerini ölçer."""
+    from app.services import face_service
+
+    first_unknown = [_timed(face_service.get_unknown_faces, db)[1] for _ in range(repeats)]
+    first_known = [_timed(face_service.get_known_faces, db)[1] for _ in range(repeats)]
+
+    # Cursor'ı takip ederek derin sayfaya in
+    cursor = None
+    walk = []
+    for _ in range(deep_pages):
+        page, elapsed = _timed(face_service.get_unknown_faces, db, cursor=cursor)
+        walk.append(elapsed)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    return {
+        "scale": scale,
+        "unknown_first_page": summarize(first_unknown),
+        "known_first_page": summarize(first_known),
+        "unknown_page_walk": {"pages": len(walk), **summarize(walk)}
+    }
+
+
+def _iou(a: tuple, b: tuple) -> float:
+    top, right, bottom, left = max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, bottom - top) * max(0, right - left)
+    area = lambda box: (box[2] - box[0]) * (box[1] - box[3])
+    union = area(a) + area(b) - inter
+    return inter / union if union else 0.0
+
+
+def _match_labels(locations: list, boxes: list, labels: list) -> list:
+    """Tespit edilen her kutuya en çok örtüşen gerçek kutunun kimliğini verir (IoU < 0.3 ise None)."""
+    result = []
+    for location in locations:
+        scored = [(_iou(location, box), label) for box, label in zip(boxes, labels)]
+        best = max(scored, default=(0.0, None))
+        result.append(best[1] if best[0] >= 0.3 else None)
+    return result
+
+
+def verification_accuracy(encodings: list, labels: list, tolerance: float) -> Optional[dict]:
+    """
+    Kimliği bilinen yüz çiftleri üzerinde tolerans eşiğiyle aynı/farklı kişi kararının doğruluğu.
+    Kimlik yoksa (çizilmiş yüzler) None döner.
+    """
+    import numpy as np
+
+    pairs = [(encoding, label) for encoding, label in zip(encodings, labels) if label is not None]
+    if len(pairs) < 2:
+        return None
+    matrix = np.asarray([encoding for encoding, _ in pairs], dtype=np.float64)
+    names = np.asarray([label for _, label in pairs])
+    distances = np.linalg.norm(matrix[:, None, :] - matrix[None, :, :], axis=2)
+    upper = np.triu_indices(len(pairs), k=1)
+    same = (names[:, None] == names[None, :])[upper]
+    accepted = distances[upper] <= tolerance
+    return {
+        "faces": len(pairs),
+        "pairs": int(len(same)),
+        "accuracy": float((accepted == same).mean()),
+        "true_accept_rate": float(accepted[same].mean()) if same.any() else None,
+        "false_accept_rate": float(accepted[~same].mean()) if (~same).any() else None,
+        "mean_same_distance": float(distances[upper][same].mean()) if same.any() else None,
+        "mean_different_distance": float(distances[upper][~same].mean()) if (~same).any() else None
+    }
+
+
+def bench_ingest(db, image_count: int, faces_per_image: int, faces_dir: str, workdir: str) -> dict:
+    """
+    Sentetik resimler üzerinde yükleme hattının aşamalarını ayrı ayrı ölçer.
+    'persist' süresi persist_faces'in tamamıdır (kendi eşleştirmesi dahil).
+    Her encoding profili için resim başına ve resimler arası toplu encoding hızı
+    ile (faces_dir kimlikli kırpımlar içeriyorsa) doğrulama doğruluğu raporlanır.
+    """
+    import cv2
+    from app.config.settings import settings
+    from app.services import detection, image_service
+    from app.services.encoding_index import encoding_index
+    from app.services.face_service import persist_faces
+    from benchmarks.synthetic import make_images
+
+    encoding_index.ensure_loaded(db)
+    stages = {name: [] for name in ("decode", "detect", "encode", "match", "persist", "analyze_total")}
+    profiles = {
+        name: {"landmarks": [], "encode": [], "chips": [], "encodings": [], "labels": []}
+        for name in detection.ENCODING_PROFILES
+    }
+    expected = 0
+    detected = 0
+    face_folder = os.path.join(workdir, "faces")
+    os.makedirs(face_folder, exist_ok=True)
+
+    for data, boxes, labels in make_images(image_count, faces_per_image, faces_dir=faces_dir):
+        expected += len(boxes)
+        bgr, elapsed = _timed(image_service.decode_image, data)
+        stages["decode"].append(elapsed)
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        locations, elapsed = _timed(detection.locate_faces, rgb)
+        stages["detect"].append(elapsed)
+        detected += len(locations)
+        face_labels = _match_labels(locations, boxes, labels)
+
+        for name, samples in profiles.items():
+            chips, landmark_time = _timed(detection.face_chips, rgb, locations, name)
+            encodings, encode_time = _timed(detection.encode_chips, chips, name)
+            samples["landmarks"].append(landmark_time)
+            samples["encode"].append(encode_time)
+            samples["chips"].extend(chips)
+            samples["encodings"].extend(encodings)
+            samples["labels"].extend(face_labels)
+            if name == settings.ENCODING_PROFILE:
+                stages["encode"].append(landmark_time + encode_time)
+                profile_encodings = encodings
+
+        if locations:
+            _, elapsed = _timed(
+                encoding_index.best_matches, profile_encodings, settings.FACE_MATCH_TOLERANCE
+            )
+            stages["match"].append(elapsed)
+
+        # Disk yazmaları dahil tek süreçteki uçtan uca analiz
+        image_uuid = uuid.uuid4()
+        analysis, elapsed = _timed(
+            detection.analyze_image_data, data, image_uuid, face_folder,
+            original_path=os.path.join(workdir, f"{image_uuid}.jpg")
+        )
+        stages["analyze_total"].append(elapsed)
+        if analysis["faces"]:
+            _, elapsed = _timed(
+                persist_faces, analysis["faces"], image_uuid, db,
+                image_path=os.path.join(workdir, f"{image_uuid}.jpg"),
+                image_thumbnails=analysis["thumbnails"]
+            )
+            stages["persist"].append(elapsed)
+
+    profile_report = {}
+    batch_size = max(settings.ENCODING_BATCH_SIZE, 1)
+    for name, samples in profiles.items():
+        chips = samples["chips"]
+        # Resimler arası toplu encoding: aynı kırpımlar ENCODING_BATCH_SIZE'lık gruplarla
+        batch_start = time.perf_counter()
+        for offset in range(0, len(chips), batch_size):
+            detection.encode_chips(chips[offset:offset + batch_size], name)
+        batch_elapsed = time.perf_counter() - batch_start
+        per_image_elapsed = sum(samples["encode"])
+        profile_report[name] = {
+            **detection.ENCODING_PROFILES[name],
+            "faces": len(chips),
+            "landmarks": summarize(samples["landmarks"]),
+            "encode_per_image": summarize(samples["encode"]),
+            "faces_per_s": len(chips) / per_image_elapsed if per_image_elapsed else None,
+            "batched_faces_per_s": len(chips) / batch_elapsed if batch_elapsed else None,
+            "batch_size": batch_size,
+            "verification": verification_accuracy(
+                samples["encodings"], samples["labels"], settings.FACE_MATCH_TOLERANCE
+            )
+        }
+
+    return {
+        "images": image_count,
+        "expected_faces": expected,
+        "detected_faces": detected,
+        # 4000x3000 bir resmin tespit ölçeği; 1.0 ise ayarlar küçültmeyi kapatıyor
+        "detection_scale_12mp": detection.check_detection_scale(),
+        "stages": {name: summarize(samples) for name, samples in stages.items()},
+        "encoding_profiles": profile_report
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pix-id performans benchmark'ları")
+    parser.add_argument("--db", help="Benchmark veritabanı URL'i (varsayılan: geçici SQLite)")
+    parser.add_argument("--allow-app-db", action="store_true",
+                        help="--db uygulamanın DATABASE_URL'i ile aynı olsa da çalıştır (tablolar silinir!)")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Virgülle ayrılmış encoding sayıları")
+    parser.add_argument("--engines", default=DEFAULT_ENGINES, help="exact, prototype, hnsw")
+    parser.add_argument("--per-person", type=int, default=4, help="Kişi başına ortalama encoding")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=8, help="Toplu sorguda resim başına yüz")
+    parser.add_argument("--gallery-repeats", type=int, default=20)
+    parser.add_argument("--gallery-pages", type=int, default=50)
+    parser.add_argument("--images", type=int, default=20, help="Yükleme hattı için sentetik resim sayısı (0 = atla)")
+    parser.add_argument("--faces-per-image", type=int, default=3)
+    parser.add_argument("--faces-dir", help="Sentetik resimlere yapıştırılacak gerçek yüz kırpımları")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON çıktı dosyası (varsayılan: benchmarks/results/<zaman>.json)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="pixid-bench-")
+    db_url = args.db or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    app_db_url = os.getenv("DATABASE_URL") or dotenv_values(".env").get("DATABASE_URL")
+    if db_url == app_db_url and not args.allow_app_db:
+        parser.error("--db uygulamanın veritabanını gösteriyor; tablolar silineceği için reddedildi")
+
+    # Uygulama modülleri ayarları import sırasında okur; önce ortamı hazırla.
+    # Küçük resimler ve ANN indeksi uygulamanın dizinlerine değil geçici dizine yazılır.
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["THUMBNAIL_FOLDER"] = os.path.join(workdir, "thumbs")
+    os.environ["ANN_INDEX_PATH"] = os.path.join(workdir, "encodings.hnsw")
+    if db_url.startswith("sqlite"):
+        _register_sqlite_types()
+
+    import numpy as np
+    from app.config.settings import settings
+    from app.database import SessionLocal, engine
+    from benchmarks.synthetic import make_encodings, make_queries
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    scales = [int(value) for value in args.scales.split(",") if value.strip()]
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "db_dialect": engine.dialect.name,
+            "args": vars(args),
+            "settings": {
+                "FACE_MATCH_TOLERANCE": settings.FACE_MATCH_TOLERANCE,
+                "ENCODING_NORMALIZE": settings.ENCODING_NORMALIZE,
+                "DETECTION_MODEL": settings.DETECTION_MODEL,
+                "DETECTION_UPSAMPLE": settings.DETECTION_UPSAMPLE,
+                "DETECTION_MAX_SIDE": settings.DETECTION_MAX_SIDE,
+                "FACE_MIN_SIZE": settings.FACE_MIN_SIZE,
+                "ENCODING_PROFILE": settings.ENCODING_PROFILE,
+                "ENCODING_ACCURATE_JITTERS": settings.ENCODING_ACCURATE_JITTERS,
+                "ENCODING_BATCH_SIZE": settings.ENCODING_BATCH_SIZE,
+                "HNSW_EF_SEARCH": settings.HNSW_EF_SEARCH,
+                "PROTOTYPE_MEDOIDS": settings.PROTOTYPE_MEDOIDS,
+                "PROTOTYPE_CANDIDATES": settings.PROTOTYPE_CANDIDATES
+            }
+        },
+        "datasets": [],
+        "matching": [],
+        "gallery": []
+    }
+
+    db = SessionLocal()
+    try:
+        for scale in scales:
+            print(f"[bench] {scale} encoding hazırlanıyor...", file=sys.stderr)
+            reset_database()
+            person_index, matrix = make_encodings(scale, args.per_person, seed=args.seed)
+            report["datasets"].append({"scale": scale, **populate(db, person_index, matrix)})
+            queries = make_queries(matrix, args.queries, seed=args.seed + 1)
+            del person_index, matrix
+
+            print(f"[bench] {scale}: eşleştirme", file=sys.stderr)
+            report["matching"].extend(bench_matching(db, scale, engines, queries, workdir, args.batch_size))
+            print(f"[bench] {scale}: galeri", file=sys.stderr)
+            report["gallery"].append(bench_gallery(db, scale, args.gallery_repeats, args.gallery_pages))
+
+        if args.images > 0:
+            print("[bench] yükleme hattı", file=sys.stderr)
+            reset_database()
+            report["ingest"] = bench_ingest(db, args.images, args.faces_per_image, args.faces_dir, workdir)
+    finally:
+        db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report["meta"]["finished_at"] = datetime.utcnow().isoformat()
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
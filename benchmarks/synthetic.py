@@ -0,0 +1,123 @@
+"""
+Benchmark'lar için tekrarlanabilir sentetik veri üretimi.
+
+Tüm üreticiler sabit bir tohum (seed) alır; aynı parametrelerle her çalıştırmada
+birebir aynı encoding'ler ve resimler üretilir.
+"""
+import os
+import cv2
+import numpy as np
+
+ENCODING_DIM = 128
+# dlib encoding'lerinde aynı kişinin yüzleri tipik olarak ~0.3-0.5, farklı kişiler ~0.8+ uzaklıktadır.
+# Kişi merkezleri arası beklenen mesafe PERSON_DISTANCE, aynı kişinin iki yüzü arası ~0.4 olur.
+PERSON_DISTANCE = 1.0
+FACE_NOISE = 0.025
+
+
+def make_encodings(count: int, per_person: int = 4, seed: int = 0):
+    """
+    Kişi kümeleri halinde sentetik 128 boyutlu encoding'ler üretir.
+
+    Returns:
+        tuple: (her satırın kişi sırası, (count, 128) float32 matris)
+    """
+    rng = np.random.default_rng(seed)
+    person_count = max(1, count // per_person)
+    centers = rng.normal(0.0, PERSON_DISTANCE / np.sqrt(2 * ENCODING_DIM), (person_count, ENCODING_DIM))
+    person_index = rng.integers(0, person_count, count)
+    # Her kişinin en az bir encoding'i olsun
+    person_index[:person_count] = np.arange(person_count)
+    person_index.sort()
+    matrix = centers[person_index] + rng.normal(0.0, FACE_NOISE, (count, ENCODING_DIM))
+    return person_index, matrix.astype(np.float32)
+
+
+def make_queries(matrix: np.ndarray, count: int, miss_ratio: float = 0.2, seed: int = 1) -> np.ndarray:
+    """Var olan encoding'lere gürültü eklenmiş (eşleşen) ve tamamen rastgele (eşleşmeyen) sorgular üretir."""
+    rng = np.random.default_rng(seed)
+    misses = int(count * miss_ratio)
+    hits = count - misses
+    picked = matrix[rng.integers(0, len(matrix), hits)]
+    hit_queries = picked + rng.normal(0.0, FACE_NOISE, picked.shape)
+    scale = float(np.std(matrix)) if len(matrix) else 0.1
+    miss_queries = rng.normal(0.0, scale, (misses, ENCODING_DIM))
+    queries = np.vstack([hit_queries, miss_queries]).astype(np.float32)
+    return queries[rng.permutation(len(queries))]
+
+
+def _load_face_crops(faces_dir: str) -> list:
+    """
+    Yüz kırpımlarını kimlikleriyle yükler. Kimlik, dosya adının ilk '_' öncesi
+    kısmıdır (ör. ayse_01.jpg ve ayse_02.jpg aynı kişi).
+
+    Returns:
+        list: (kırpım, kimlik) çiftleri
+    """
+    crops = []
+    for name in sorted(os.listdir(faces_dir)):
+        if name.lower().endswith((".jpg", ".jpeg", ".png")):
+            crop = cv2.imread(os.path.join(faces_dir, name))
+            if crop is not None:
+                crops.append((crop, os.path.splitext(name)[0].split("_")[0]))
+    return crops
+
+
+def _draw_face(size: int, rng) -> np.ndarray:
+    """Yüz kırpımı verilmediğinde basit çizilmiş bir yüz döner (HOG dedektörü bulamayabilir)."""
+    face = np.full((size, size, 3), rng.integers(150, 220, 3), dtype=np.uint8)
+    center = (size // 2, size // 2)
+    skin = tuple(int(c) for c in rng.integers(120, 230, 3))
+    cv2.ellipse(face, center, (int(size * 0.35), int(size * 0.45)), 0, 0, 360, skin, -1)
+    for dx in (-0.15, 0.15):
+        cv2.circle(face, (int(size * (0.5 + dx)), int(size * 0.4)), max(2, size // 20), (40, 40, 40), -1)
+    cv2.ellipse(face, (size // 2, int(size * 0.68)), (int(size * 0.12), int(size * 0.05)), 0, 0, 180, (60, 40, 120), 2)
+    return face
+
+
+def make_images(
+    count: int,
+    faces_per_image: int = 3,
+    size: tuple = (1920, 1280),
+    faces_dir: str = None,
+    seed: int = 2
+):
+    """
+    Yerleri bilinen yüzler içeren sentetik JPEG resimler üretir.
+
+    faces_dir verilirse içindeki gerçek yüz kırpımları rastgele arka planlara
+    yapıştırılır; verilmezse çizilmiş yüzler kullanılır.
+
+    Yields:
+        tuple: (JPEG baytları, [(top, right, bottom, left), ...] gerçek yüz kutuları,
+                her kutunun kimliği; çizilmiş yüzlerde None)
+    """
+    rng = np.random.default_rng(seed)
+    crops = _load_face_crops(faces_dir) if faces_dir else []
+    width, height = size
+    for _ in range(count):
+        # Gürültülü degrade arka plan
+        gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+        background = gradient * rng.uniform(0.2, 0.8, 3)[None, None, :]
+        image = np.clip(background + rng.normal(0, 12, (height, width, 3)), 0, 255).astype(np.uint8)
+
+        boxes = []
+        labels = []
+        cell = width // max(faces_per_image, 1)
+        for idx in range(faces_per_image):
+            face_size = int(rng.integers(120, min(cell, height) - 20))
+            if crops:
+                crop, label = crops[int(rng.integers(0, len(crops)))]
+                face = cv2.resize(crop, (face_size, face_size))
+            else:
+                face, label = _draw_face(face_size, rng), None
+            left = idx * cell + int(rng.integers(0, max(1, cell - face_size)))
+            top = int(rng.integers(0, height - face_size))
+            image[top:top + face_size, left:left + face_size] = face
+            boxes.append((top, left + face_size, top + face_size, left))
+            labels.append(label)
+
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if not ok:
+            raise RuntimeError("Sentetik resim kodlanamadı")
+        yield buffer.tobytes(), boxes, labels